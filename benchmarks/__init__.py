@@ -0,0 +1 @@
+"""Performance benchmarks and synthetic data generators (not shipped with the package)."""
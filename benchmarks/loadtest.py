@@ -0,0 +1,248 @@
+"""End-to-end load test against the local stand-in server.
+
+Starts the stand-in (``benchmarks.standin_server``) and points the application at
+it through the environment, then measures:
+
+- refresh latency: a cold refresh into an empty data directory followed by forced
+  refreshes of the populated cache, through the real rate limiter and planner;
+- currency lookups: historical ``download_exchange_rate`` calls, including mirror
+  fallback when ``--down-mirror primary`` is given;
+- Dash callback throughput: concurrent clients posting the page callback, both a
+  first render and an "unchanged data" refresh.
+
+Usage::
+
+    python -m benchmarks.loadtest --clients 8 --duration 10 --latency 0.05 --error-rate 0.01
+    python -m benchmarks.loadtest --daily-quota 5          # exercise quota exhaustion
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from . import standin_server
+
+
+def _percentiles(latencies: list[float]) -> dict[str, float | None]:
+    if not latencies:
+        return {'p50_s': None, 'p95_s': None, 'p99_s': None, 'max_s': None}
+    ordered = sorted(latencies)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {'p50_s': at(0.50), 'p95_s': at(0.95), 'p99_s': at(0.99), 'max_s': ordered[-1]}
+
+
+def _configure_environment(port: int, data_dir: str, args: argparse.Namespace) -> None:
+    """Point the application at the stand-in; must run before vivendi_stock is imported."""
+    os.environ.update({
+        'ALPHAVANTAGE_BASE_URL': f'http://127.0.0.1:{port}/query',
+        # A different host name keeps currency requests out of the Alpha Vantage rate limit, as in production.
+        'CURRENCY_API_URLS': ','.join(
+            f'http://localhost:{port}/currency/{mirror}/{{date}}/{{base}}.json' for mirror in ('primary', 'fallback')
+        ),
+        'ALPHAVANTAGE_API_KEY': 'loadtest',
+        'ALPHAVANTAGE_CACHE': 'false',
+        'ALPHAVANTAGE_DAILY_QUOTA': str(args.client_quota),
+        'API_RATE_LIMIT_SECONDS': str(args.rate_limit_seconds),
+        'API_TIMEOUT_SECONDS': str(args.timeout),
+        'DATA_DIR': data_dir,
+        'REFRESH_MODE': 'external',
+        'CACHE_JOURNAL': 'true'
+    })
+
+
+def measure_refreshes(count: int) -> list[dict]:
+    from vivendi_stock.core.vivendi_data import VivendiStock
+
+    results = []
+    stock_data = VivendiStock(auto_update=False)
+    for run in range(count + 1):
+        start = time.perf_counter()
+        ok = stock_data.update(force=True, wait=True)
+        results.append({
+            'kind': 'cold' if run == 0 else 'forced',
+            'seconds': time.perf_counter() - start,
+            'ok': ok,
+            'status': stock_data.update_status_message,
+            'rows': len(stock_data.data.index)
+        })
+        print(f'refresh {run:>3} ({results[-1]["kind"]}): {results[-1]["seconds"]:.3f}s {results[-1]["status"]}',
+              file=sys.stderr)
+    return results
+
+
+def measure_currency(count: int) -> dict:
+    from vivendi_stock.core.web_api import download_exchange_rate
+
+    latencies, failures = [], 0
+    today = datetime.date.today()
+    for offset in range(1, count + 1):
+        start = time.perf_counter()
+        rate = download_exchange_rate('EUR.AUD', today - datetime.timedelta(days=offset))
+        latencies.append(time.perf_counter() - start)
+        failures += rate == 0.0
+    return {'requests': count, 'failures': failures, **_percentiles(latencies)}
+
+
+def measure_callbacks(clients: int, duration: float, scenario: str) -> dict:
+    """Drive the Dash page callback from concurrent clients for duration seconds."""
+    import requests
+    from werkzeug.serving import make_server
+    from vivendi_stock import dash_app
+
+    server = make_server('127.0.0.1', 0, dash_app.app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, name='dash-server', daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    try:
+        output = requests.get(f'{base}/_dash-dependencies', timeout=30).json()[0]['output']
+        series_ids = dash_app._series_ids()
+        initial = {
+            'output': output,
+            'outputs': [{'id': 'output-graphs', 'property': 'children'}, [], [], [], [],
+                        {'id': 'generated-at', 'property': 'children'}, {'id': 'snapshot-store', 'property': 'data'}],
+            'inputs': [{'id': 'refresh-button', 'property': 'n_clicks', 'value': 0}],
+            'changedPropIds': [],
+            'state': [{'id': 'snapshot-store', 'property': 'data', 'value': None}]
+        }
+        if scenario == 'initial':
+            body = initial
+        else:
+            store = requests.post(f'{base}/_dash-update-component', json=initial, timeout=30).json()
+            wildcard = [
+                [{'id': {'type': kind, 'index': series_id}, 'property': prop} for series_id in series_ids]
+                for kind, prop in (('stock-figure', 'figure'), ('stock-price', 'children'),
+                                   ('stock-change', 'children'), ('stock-change', 'className'))
+            ]
+            body = {
+                **initial,
+                'outputs': [initial['outputs'][0], *wildcard, *initial['outputs'][5:]],
+                'inputs': [{'id': 'refresh-button', 'property': 'n_clicks', 'value': 1}],
+                'changedPropIds': ['refresh-button.n_clicks'],
+                'state': [{'id': 'snapshot-store', 'property': 'data',
+                           'value': store['response']['snapshot-store']['data']}]
+            }
+
+        latencies: list[float] = []
+        statuses: dict[int, int] = {}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client() -> None:
+            session = requests.Session()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status = session.post(f'{base}/_dash-update-component', json=body, timeout=30).status_code
+                except requests.RequestException:
+                    status = 0
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    return {
+        'scenario': scenario,
+        'clients': clients,
+        'seconds': elapsed,
+        'requests': len(latencies),
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_s': statistics.fmean(latencies) if latencies else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        **_percentiles(latencies)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load-test refreshes and Dash callbacks against the stand-in server.')
+    standin_server.add_behaviour_arguments(parser)
+    parser.add_argument('--refreshes', type=int, default=3, help='Forced refreshes after the cold one (default 3).')
+    parser.add_argument('--currency-requests', type=int, default=10, help='Historical currency lookups (default 10).')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent Dash clients (default 8).')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per callback scenario (default 10).')
+    parser.add_argument('--scenario', choices=('initial', 'unchanged', 'both'), default='both')
+    parser.add_argument('--rate-limit-seconds', type=float, default=0.05,
+                        help='Client-side Alpha Vantage spacing (API_RATE_LIMIT_SECONDS, default 0.05).')
+    parser.add_argument('--client-quota', type=int, default=100000,
+                        help='Client-side daily quota (ALPHAVANTAGE_DAILY_QUOTA, default 100000).')
+    parser.add_argument('--timeout', type=float, default=5.0, help='Client request timeout (API_TIMEOUT_SECONDS).')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout.')
+    args = parser.parse_args()
+
+    server, state = standin_server.start_server(standin_server.behaviour_from_args(args))
+    with tempfile.TemporaryDirectory(prefix='vivendi-loadtest-') as data_dir:
+        _configure_environment(server.server_port, data_dir, args)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+        refreshes = measure_refreshes(args.refreshes)
+        currency = measure_currency(args.currency_requests)
+        scenarios = ('initial', 'unchanged') if args.scenario == 'both' else (args.scenario,)
+        callbacks = []
+        for scenario in scenarios:
+            callbacks.append(measure_callbacks(args.clients, args.duration, scenario))
+            print(f'callbacks[{scenario}]: {callbacks[-1]["throughput_rps"]:.1f} req/s, '
+                  f'p95 {callbacks[-1]["p95_s"]}', file=sys.stderr)
+
+        from vivendi_stock.utils import metrics
+
+        application_metrics = metrics.registry.collect()
+        # The temporary METRICS_DIR is removed with data_dir; don't recreate it at exit.
+        metrics.registry.enabled = False
+
+    with state.lock:
+        server_stats = {'counters': dict(state.counters), 'used_today': state.used_today}
+    server.shutdown()
+
+    from .run import _environment
+
+    forced = [item['seconds'] for item in refreshes if item['kind'] == 'forced']
+    report = {
+        'schema_version': 1,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'refresh': {
+            'runs': refreshes,
+            'cold_s': refreshes[0]['seconds'],
+            'forced_median_s': statistics.median(forced) if forced else None
+        },
+        'currency': currency,
+        'callbacks': callbacks,
+        'standin': server_stats,
+        'metrics': {
+            name: {
+                'type': metric['type'],
+                'samples': [[list(labels), value] for labels, value in metric['samples'].items()]
+            }
+            for name, metric in application_metrics.items()
+        }
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""Benchmark the data hot paths across portfolio sizes and write JSON results.
+
+Usage::
+
+    python -m benchmarks.run                              # default size matrix, JSON to stdout
+    python -m benchmarks.run --sizes 4x1,100x10 --output results.json
+    python -m benchmarks.run --compare baseline.json      # exit 1 on regressions
+
+Each size is ``<symbols>x<years>``. Every benchmark runs against synthetic data in a
+temporary data directory; nothing under the project ``data/`` directory is touched
+and no network requests are made (downloads are served from recorded payloads in
+the response cache).
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy
+import pandas
+
+from . import synthetic
+from vivendi_stock.core import fx_store, vivendi_data, web_api
+from vivendi_stock.core.analytics import AnalyticsEngine
+from vivendi_stock.core.coordination import LeaderLock
+from vivendi_stock.core.portfolios import PortfolioRegistry
+from vivendi_stock.core.response_cache import ResponseCache
+from vivendi_stock.core.valuation import PortfolioValuation
+from vivendi_stock.utils import metrics
+from vivendi_stock.utils.config import config
+
+RESULT_SCHEMA_VERSION = 1
+DEFAULT_SIZES = '4x1,50x5,250x10,1000x25'
+
+
+def _parse_sizes(text: str) -> list[tuple[int, float]]:
+    sizes = []
+    for item in text.split(','):
+        symbols, _, years = item.strip().partition('x')
+        sizes.append((int(symbols), float(years)))
+    return sizes
+
+
+def _time(function: Callable[[], object], repeat: int, budget_seconds: float) -> list[float]:
+    """Run function up to repeat times (at least once), stopping early once budget_seconds is spent."""
+    timings = []
+    spent = 0.0
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+        if spent >= budget_seconds:
+            break
+    return timings
+
+
+def _point_at(directory: str) -> None:
+    """Point every module-level data path at directory."""
+    config.DATA_DIR = Path(directory)
+    config.RESPONSE_CACHE_DIR = Path(directory) / 'responses'
+    config.METRICS_DIR = Path(directory) / 'metrics'
+    for module in (web_api, vivendi_data, fx_store):
+        module.DATA_STORAGE = directory
+    web_api.response_cache = ResponseCache(
+        str(config.RESPONSE_CACHE_DIR),
+        max_bytes=1 << 40,
+        ttl_seconds={'daily': 1e9, 'fx': 1e9}
+    )
+
+
+def _use_portfolio(stock: dict[str, dict], pairs: tuple[str, ...]) -> None:
+    """Make the data and web layers value the synthetic portfolio instead of the configured one."""
+    from vivendi_stock import dash_app
+
+    vivendi_data.STOCK = dash_app.STOCK = stock
+    vivendi_data.CURRENCIES = pairs
+    vivendi_data.VALUATION = PortfolioValuation(stock)
+
+
+class Suite:
+    """Runs every benchmark for one portfolio size and collects result records."""
+
+    def __init__(self, symbols: int, years: float, args: argparse.Namespace) -> None:
+        self.symbols = symbols
+        self.years = years
+        self.args = args
+        self.results: list[dict] = []
+        self.stock, self.pairs, self.prices = synthetic.synthetic_market(symbols, years, seed=args.seed)
+        self.cache = synthetic.cache_frame(self.stock, self.prices)
+
+    def record(self, name: str, timings: list[float], **extra: object) -> None:
+        result = {
+            'name': name,
+            'symbols': self.symbols,
+            'years': self.years,
+            'rows': len(self.cache.index),
+            'columns': len(self.cache.columns),
+            'runs': len(timings),
+            'min_s': min(timings),
+            'median_s': statistics.median(timings),
+            'mean_s': statistics.fmean(timings),
+            'max_s': max(timings),
+            **extra
+        }
+        self.results.append(result)
+        print(f'{name:<36} {self.symbols:>5}x{self.years:<4g} median {result["median_s"] * 1000:>10.2f} ms',
+              file=sys.stderr)
+
+    def bench(self, name: str, function: Callable[[], object], **extra: object) -> None:
+        self.record(name, _time(function, self.args.repeat, self.args.budget), **extra)
+
+    def run(self) -> list[dict]:
+        with tempfile.TemporaryDirectory(prefix='vivendi-bench-') as directory:
+            _point_at(directory)
+            _use_portfolio(self.stock, self.pairs)
+            self._cache_io()
+            self._download()
+            self._update()
+            self._portfolios()
+            self._analytics()
+            self._service(directory)
+            metrics.registry.flush()
+        return self.results
+
+    def _cache_io(self) -> None:
+        cells = self.cache.size
+        for file_name in ('cache.bin', 'cache.json'):
+            if file_name.endswith('.json') and cells > self.args.max_json_cells:
+                continue
+            store = file_name.rsplit('.', 1)[1]
+            self.bench(f'save_cached_data[{store}]', lambda: web_api.save_cached_data(self.cache, file_name))
+            self.bench(f'load_cached_data[{store}]', lambda: web_api.load_cached_data(file_name))
+        self.bench('load_cached_data[bin,mmap]', lambda: web_api.load_cached_data('cache.bin', mmap=True))
+
+    def _download(self) -> None:
+        symbols = list(self.stock)[:self.args.max_download_symbols]
+        for symbol in symbols:
+            web_api.response_cache.put(
+                f'{symbol}.full', 'daily', synthetic.alphavantage_daily(self.prices[symbol], symbol))
+        for pair in self.pairs:
+            web_api.response_cache.put(
+                f'{pair}.full', 'fx', synthetic.alphavantage_fx_daily(self.prices[pair], pair))
+        outputsize = {series_id: 'full' for series_id in (*symbols, *self.pairs)}
+        self.bench(
+            'download_stock_data[recorded]',
+            lambda: web_api.download_stock_data(symbols, self.pairs, outputsize=outputsize, join='outer'),
+            series=len(symbols) + len(self.pairs)
+        )
+
+    def _update(self) -> None:
+        current = self.cache.iloc[:-1]
+        # A compact Alpha Vantage response, the usual size of a refresh.
+        fresh = self.prices.iloc[-config.COMPACT_WINDOW_SESSIONS:]
+        self.bench('update_stock_data[append day]', lambda: vivendi_data.update_stock_data(current, fresh))
+        self.bench('update_stock_data[full]', lambda: vivendi_data.update_stock_data(None, self.prices))
+
+    def _portfolios(self) -> None:
+        registry = PortfolioRegistry(self.stock, self.pairs)
+        rng = numpy.random.default_rng(self.args.seed)
+        symbols = list(self.stock)
+        for index in range(self.args.portfolios):
+            held = rng.choice(symbols, size=min(len(symbols), 20), replace=False)
+            registry.register(f'P{index}', dict(zip(held, rng.integers(1, 1000, size=len(held)).tolist())))
+        self.bench('PortfolioRegistry.value[all rows]', lambda: registry.value(self.cache), portfolios=len(registry))
+
+    def _analytics(self) -> None:
+        def engine() -> AnalyticsEngine:
+            return AnalyticsEngine(
+                config.ANALYTICS_RETURN_WINDOWS,
+                config.ANALYTICS_MA_WINDOWS,
+                config.ANALYTICS_VOLATILITY_WINDOW,
+                config.ANALYTICS_CORRELATION_WINDOW
+            )
+
+        self.bench('AnalyticsEngine.update[full]', lambda: engine().update(self.cache))
+        previous = self.cache.iloc[:-1]
+        warm = engine()
+        warm.update(previous)
+
+        def append_day() -> None:
+            # A copy of the saved state, so every run folds in the same row; the copy is history-independent.
+            copy.deepcopy(warm).update(self.cache, changed_from=self.cache.index[-1])
+
+        self.bench('AnalyticsEngine.update[append day]', append_day)
+
+    def _service(self, directory: str) -> None:
+        from vivendi_stock import dash_app
+
+        web_api.save_cached_data(self.cache, config.CACHE_FILE)
+        self.bench('VivendiStock[from cache]', lambda: vivendi_data.VivendiStock(auto_update=False))
+        stock_data = vivendi_data.VivendiStock(auto_update=False)
+        series_ids = ['STOCK.VALUE', *self.stock]
+        self.bench('VivendiStock.get_data[all series]', lambda: [stock_data.get_data(s) for s in series_ids])
+
+        graph_ids = series_ids[:self.args.max_graphs]
+        dash_app.STOCK = {symbol: self.stock[symbol] for symbol in graph_ids[1:]}
+        dash_app._stock_data = stock_data
+        dash_app._leader = LeaderLock(os.path.join(directory, config.LEADER_LOCK_FILE))
+        refresh_mode, config.REFRESH_MODE = config.REFRESH_MODE, 'external'
+        try:
+            def cold() -> None:
+                dash_app._figure_cache.clear()
+                dash_app.stock_graphs()
+
+            self.bench('dash_app.stock_graphs[cold]', cold, graphs=len(graph_ids))
+            self.bench('dash_app.stock_graphs[warm]', dash_app.stock_graphs, graphs=len(graph_ids))
+        finally:
+            config.REFRESH_MODE = refresh_mode
+            dash_app._stock_data = None
+            dash_app._figure_cache.clear()
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    from importlib import metadata
+
+    def version(package: str) -> str | None:
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'dash': version('dash'),
+        'vivendi_stock': version('vivendi-stock'),
+        'git_commit': commit
+    }
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> bool:
+    """Print median ratios against a baseline run. Returns False when any benchmark regressed past threshold."""
+    with open(baseline_path, encoding='utf8') as f:
+        baseline = {
+            (item['name'], item['symbols'], item['years']): item for item in json.load(f)['results']
+        }
+    ok = True
+    print(f'{"benchmark":<36} {"size":>10} {"baseline":>12} {"current":>12} {"ratio":>7}', file=sys.stderr)
+    for item in results:
+        before = baseline.get((item['name'], item['symbols'], item['years']))
+        if before is None or not before['median_s']:
+            continue
+        ratio = item['median_s'] / before['median_s']
+        flag = ' REGRESSION' if ratio > threshold else ''
+        ok = ok and not flag
+        print(
+            f'{item["name"]:<36} {item["symbols"]:>5}x{item["years"]:<4g} '
+            f'{before["median_s"] * 1000:>10.2f}ms {item["median_s"] * 1000:>10.2f}ms {ratio:>6.2f}x{flag}',
+            file=sys.stderr
+        )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark vivendi_stock hot paths on synthetic portfolios.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'Comma-separated <symbols>x<years> (default {DEFAULT_SIZES}).')
+    parser.add_argument('--repeat', type=int, default=5, help='Maximum runs per benchmark (default 5).')
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help='Stop repeating a benchmark once this many seconds were spent (default 10).')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic data seed (default 0).')
+    parser.add_argument('--max-json-cells', type=int, default=2_000_000,
+                        help='Skip the legacy JSON store above this many cache cells (default 2,000,000).')
+    parser.add_argument('--max-download-symbols', type=int, default=100,
+                        help='Symbols fed through download_stock_data per size (default 100).')
+    parser.add_argument('--max-graphs', type=int, default=25,
+                        help='Series rendered by the dash_app.stock_graphs benchmark (default 25).')
+    parser.add_argument('--portfolios', type=int, default=1000,
+                        help='Portfolios valued by the PortfolioRegistry.value benchmark (default 1000).')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout.')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare medians with a previous JSON result file.')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='With --compare, median ratio that counts as a regression (default 1.25).')
+    args = parser.parse_args()
+
+    # Keep per-call INFO logging out of the timings and the console.
+    for name, logger in logging.Logger.manager.loggerDict.items():
+        if name.startswith('vivendi_stock') and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.WARNING)
+    os.environ.setdefault('ALPHAVANTAGE_API_KEY', 'benchmark')
+
+    results = []
+    for symbols, years in _parse_sizes(args.sizes):
+        results.extend(Suite(symbols, years, args).run())
+    # Each suite's temporary METRICS_DIR is gone; don't recreate it at exit.
+    metrics.registry.enabled = False
+
+    report = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'results': results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
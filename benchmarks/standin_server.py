@@ -0,0 +1,281 @@
+"""Local stand-in for the Alpha Vantage and fawazahmed0 currency APIs.
+
+Serves deterministic synthetic data with configurable latency, error rates,
+hanging requests and quota exhaustion, so refresh behaviour can be exercised and
+load-tested without the live services::
+
+    python -m benchmarks.standin_server --port 8800 --latency 0.05 --error-rate 0.02 --daily-quota 500
+
+Point the application at it with::
+
+    ALPHAVANTAGE_BASE_URL=http://127.0.0.1:8800/query
+    CURRENCY_API_URLS=http://localhost:8800/currency/primary/{date}/{base}.json
+
+Append ``,http://localhost:8800/currency/fallback/{date}/{base}.json`` to
+CURRENCY_API_URLS to exercise the mirror fallback.
+
+Endpoints:
+
+- ``/query?function=TIME_SERIES_DAILY&symbol=...&outputsize=compact|full``
+- ``/query?function=FX_DAILY&from_symbol=...&to_symbol=...&outputsize=compact|full``
+- ``/query?function=GLOBAL_QUOTE&symbol=...``
+- ``/currency/<mirror>/<date|latest>/<base>.json`` (the currency-api file layout)
+- ``/stats`` (request counters as JSON)
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas
+
+from . import synthetic
+
+COMPACT_ROWS = 100
+CURRENCY_PATH = re.compile(r'^/currency/(?P<mirror>[^/]+)/(?P<date>latest|\d{4}-\d{2}-\d{2})/(?P<base>[a-z]+)\.json$')
+# Quote currencies served in every currency file, relative to one unit of EUR.
+CURRENCY_LEVELS = {'eur': 1.0, 'aud': 1.65, 'gbp': 0.85, 'usd': 1.08, 'jpy': 160.0, 'chf': 0.95}
+DAILY_LIMIT_MESSAGE = (
+    'We have detected your API key as demo and our standard API rate limit is 25 requests per day. '
+    'Please subscribe to any of the premium plans to instantly remove all daily rate limits.'
+)
+MINUTE_LIMIT_NOTE = (
+    'Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute and 500 calls per day.'
+)
+
+
+@dataclass
+class Behaviour:
+    """Fault injection settings shared by all request handlers."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 60.0
+    daily_quota: int = 0
+    per_minute: int = 0
+    down_mirrors: frozenset[str] = frozenset()
+    years: float = 5.0
+    end: str | None = None
+    seed: int = 0
+
+
+@dataclass
+class ServerState:
+    """Counters and quota usage, guarded by a lock."""
+
+    behaviour: Behaviour
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    counters: Counter = field(default_factory=Counter)
+    used_today: int = 0
+    minute_window: list[float] = field(default_factory=list)
+    _series: dict[str, pandas.Series] = field(default_factory=dict)
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counters[key] += 1
+
+    def take_quota(self) -> str | None:
+        """Account one Alpha Vantage call; returns 'Information' or 'Note' when a limit is hit."""
+        behaviour = self.behaviour
+        now = time.monotonic()
+        with self.lock:
+            if behaviour.daily_quota and self.used_today >= behaviour.daily_quota:
+                return 'Information'
+            if behaviour.per_minute:
+                self.minute_window = [t for t in self.minute_window if now - t < 60]
+                if len(self.minute_window) >= behaviour.per_minute:
+                    return 'Note'
+                self.minute_window.append(now)
+            self.used_today += 1
+        return None
+
+    def series(self, series_id: str) -> pandas.Series:
+        """Deterministic daily closes for any series id."""
+        with self.lock:
+            series = self._series.get(series_id)
+        if series is None:
+            seed = self.behaviour.seed + zlib.crc32(series_id.encode('utf8'))
+            end = self.behaviour.end or (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+            series = synthetic.synthetic_prices([series_id], self.behaviour.years, end=end, seed=seed)[series_id]
+            with self.lock:
+                self._series[series_id] = series
+        return series
+
+
+def make_handler(state: ServerState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            behaviour = state.behaviour
+            delay = behaviour.latency + random.uniform(0, behaviour.jitter)
+            if delay:
+                time.sleep(delay)
+            url = urlsplit(self.path)
+
+            if url.path == '/stats':
+                with state.lock:
+                    payload = {'counters': dict(state.counters), 'used_today': state.used_today}
+                return self._json(200, payload)
+            if behaviour.hang_rate and random.random() < behaviour.hang_rate:
+                state.count('hang')
+                time.sleep(behaviour.hang_seconds)
+            if behaviour.error_rate and random.random() < behaviour.error_rate:
+                state.count('error')
+                return self._json(500, {'error': 'injected failure'})
+
+            if url.path == '/query':
+                return self._alphavantage({key: values[0] for key, values in parse_qs(url.query).items()})
+            match = CURRENCY_PATH.match(url.path)
+            if match:
+                return self._currency(match['mirror'], match['date'], match['base'])
+            state.count('not_found')
+            return self._json(404, {'error': f'unknown path {url.path}'})
+
+        def _alphavantage(self, query: dict[str, str]) -> None:
+            function = query.get('function', '')
+            state.count(function or 'missing_function')
+            if not query.get('apikey'):
+                return self._json(200, {'Error Message': 'the parameter apikey is invalid or missing.'})
+            limited = state.take_quota()
+            if limited == 'Information':
+                state.count('quota_exhausted')
+                return self._json(200, {'Information': DAILY_LIMIT_MESSAGE})
+            if limited == 'Note':
+                state.count('rate_limited')
+                return self._json(200, {'Note': MINUTE_LIMIT_NOTE})
+
+            if function == 'TIME_SERIES_DAILY':
+                symbol = query.get('symbol', '')
+                series = self._window(state.series(symbol), query.get('outputsize', 'compact'))
+                return self._json(200, synthetic.alphavantage_daily(series, symbol))
+            if function == 'FX_DAILY':
+                pair = f'{query.get("from_symbol", "")}.{query.get("to_symbol", "")}'
+                series = self._window(state.series(pair), query.get('outputsize', 'compact'))
+                series = series / series.iloc[0] * _cross_rate(*pair.lower().split('.'))
+                return self._json(200, synthetic.alphavantage_fx_daily(series, pair))
+            if function == 'GLOBAL_QUOTE':
+                symbol = query.get('symbol', '')
+                series = state.series(symbol)
+                latest, previous = float(series.iloc[-1]), float(series.iloc[-2])
+                return self._json(200, {'Global Quote': {
+                    '01. symbol': symbol,
+                    '05. price': f'{latest:.4f}',
+                    '07. latest trading day': series.index[-1].strftime('%Y-%m-%d'),
+                    '08. previous close': f'{previous:.4f}',
+                    '09. change': f'{latest - previous:.4f}',
+                    '10. change percent': f'{(latest - previous) / previous * 100:.4f}%'
+                }})
+            return self._json(200, {'Error Message': f'Invalid API call: unknown function {function!r}.'})
+
+        def _currency(self, mirror: str, date: str, base: str) -> None:
+            state.count(f'currency:{mirror}')
+            if mirror in state.behaviour.down_mirrors:
+                return self._json(503, {'error': f'mirror {mirror} unavailable'})
+            if base not in CURRENCY_LEVELS:
+                return self._json(404, {'error': f'unknown currency {base}'})
+            day = datetime.date.today() if date == 'latest' else datetime.date.fromisoformat(date)
+            # Small deterministic day-to-day wobble so historical lookups differ by date.
+            wobble = 1 + ((zlib.crc32(f'{base}{day}'.encode('ascii')) % 200) - 100) / 10000
+            rates = {quote: round(_cross_rate(base, quote) * wobble, 6) for quote in CURRENCY_LEVELS}
+            return self._json(200, {'date': day.isoformat(), base: rates})
+
+        @staticmethod
+        def _window(series: pandas.Series, outputsize: str) -> pandas.Series:
+            return series if outputsize == 'full' else series.iloc[-COMPACT_ROWS:]
+
+        def _json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode('utf8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def _cross_rate(base: str, quote: str) -> float:
+    return CURRENCY_LEVELS.get(quote, 1.0) / CURRENCY_LEVELS.get(base, 1.0)
+
+
+def start_server(
+    behaviour: Behaviour,
+    host: str = '127.0.0.1',
+    port: int = 0
+) -> tuple[ThreadingHTTPServer, ServerState]:
+    """Start the stand-in on a daemon thread; port 0 picks a free port (see server.server_port)."""
+    state = ServerState(behaviour)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='standin-server', daemon=True).start()
+    return server, state
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, uniform in [0, jitter].')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500.')
+    parser.add_argument('--hang-rate', type=float, default=0.0,
+                        help='Fraction of requests held for --hang-seconds (to exercise client timeouts).')
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--daily-quota', type=int, default=0,
+                        help='Alpha Vantage calls before every response is the daily rate-limit Information payload.')
+    parser.add_argument('--per-minute', type=int, default=0,
+                        help='Alpha Vantage calls per rolling minute before a Note payload is returned.')
+    parser.add_argument('--down-mirror', action='append', default=[],
+                        help='Currency mirror name answering 503 (repeatable), e.g. primary.')
+    parser.add_argument('--years', type=float, default=5.0, help='History length of outputsize=full responses.')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def behaviour_from_args(args: argparse.Namespace) -> Behaviour:
+    return Behaviour(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        daily_quota=args.daily_quota,
+        per_minute=args.per_minute,
+        down_mirrors=frozenset(args.down_mirror),
+        years=args.years,
+        seed=args.seed
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local Alpha Vantage / currency-api stand-in server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(ServerState(behaviour_from_args(args))))
+    server.daemon_threads = True
+    print(f'Stand-in server on http://{args.host}:{server.server_port} (Ctrl+C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
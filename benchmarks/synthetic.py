@@ -0,0 +1,121 @@
+"""Synthetic market data in the shapes the application consumes.
+
+Generates portfolios of any size in the ``config.STOCK`` layout, daily closes as
+geometric random walks, Alpha Vantage ``TIME_SERIES_DAILY``/``FX_DAILY`` payloads
+and the computed cache frame. Output is deterministic for a given seed.
+"""
+from __future__ import annotations
+
+import os
+from typing import Iterable
+
+import numpy
+import pandas
+
+# (exchange suffix, currency, price multiplier) cycled across generated symbols.
+EXCHANGES = (('PA', 'EUR', 1), ('AS', 'EUR', 1), ('L', 'GBP', 0.01))
+BASE_CURRENCY = 'AUD'
+END_DATE = '2025-12-31'
+
+
+def synthetic_portfolio(symbols: int, seed: int = 0) -> dict[str, dict]:
+    """Return a holdings definition with the given number of symbols."""
+    rng = numpy.random.default_rng(seed)
+    stock = {}
+    for position in range(symbols):
+        suffix, currency, multiplier = EXCHANGES[position % len(EXCHANGES)]
+        symbol = f'SYN{position:04d}.{suffix}'
+        stock[symbol] = {
+            'stock': int(rng.integers(10, 5000)),
+            'currency': currency,
+            'multiplier': multiplier,
+            'name': f'Synthetic holding {position}'
+        }
+    return stock
+
+
+def currency_pairs(stock: dict[str, dict], base_currency: str = BASE_CURRENCY) -> tuple[str, ...]:
+    return tuple(sorted({f'{holding["currency"]}.{base_currency}' for holding in stock.values()}))
+
+
+def synthetic_prices(
+    series_ids: Iterable[str],
+    years: float,
+    end: str = END_DATE,
+    seed: int = 0
+) -> pandas.DataFrame:
+    """Return business-day closes for each series as independent geometric random walks."""
+    series_ids = list(series_ids)
+    index = pandas.bdate_range(end=end, periods=max(2, int(round(years * 261))))
+    rng = numpy.random.default_rng(seed)
+    start = rng.uniform(1.0, 500.0, size=len(series_ids))
+    drift = rng.normal(0.0002, 0.0001, size=len(series_ids))
+    volatility = rng.uniform(0.005, 0.03, size=len(series_ids))
+    shocks = rng.standard_normal((len(index), len(series_ids))) * volatility + drift
+    closes = start * numpy.exp(numpy.cumsum(shocks, axis=0))
+    return pandas.DataFrame(numpy.round(closes, 4), index=index, columns=series_ids)
+
+
+def synthetic_market(
+    symbols: int,
+    years: float,
+    seed: int = 0
+) -> tuple[dict[str, dict], tuple[str, ...], pandas.DataFrame]:
+    """Return (stock, currency_pairs, closes) for a portfolio of the given size."""
+    stock = synthetic_portfolio(symbols, seed)
+    pairs = currency_pairs(stock)
+    prices = synthetic_prices([*stock, *pairs], years, seed=seed)
+    # Exchange rates live in a much narrower band than share prices.
+    prices[list(pairs)] = numpy.round(prices[list(pairs)] / prices[list(pairs)].iloc[0] * 1.6, 5)
+    return stock, pairs, prices
+
+
+def cache_frame(stock: dict[str, dict], prices: pandas.DataFrame) -> pandas.DataFrame:
+    """Return the computed cache (prices, rates and value columns) for prices."""
+    # Application imports stay local so the stand-in server can use this module without loading app config.
+    from vivendi_stock.core.valuation import PortfolioValuation
+
+    return PortfolioValuation(stock).apply(prices)
+
+
+def alphavantage_daily(series: pandas.Series, symbol: str) -> dict:
+    """Return a TIME_SERIES_DAILY payload (newest first, string values) for series."""
+    days = {}
+    for day, close in zip(series.index[::-1].strftime('%Y-%m-%d'), series.to_numpy()[::-1]):
+        days[day] = {
+            '1. open': f'{close:.4f}',
+            '2. high': f'{close * 1.01:.4f}',
+            '3. low': f'{close * 0.99:.4f}',
+            '4. close': f'{close:.4f}',
+            '5. volume': '100000'
+        }
+    return {
+        'Meta Data': {'1. Information': 'Daily Prices (open, high, low, close) and Volumes', '2. Symbol': symbol},
+        'Time Series (Daily)': days
+    }
+
+
+def alphavantage_fx_daily(series: pandas.Series, pair: str) -> dict:
+    """Return an FX_DAILY payload (newest first, string values) for series."""
+    from_symbol, to_symbol = pair.split('.')
+    days = {}
+    for day, close in zip(series.index[::-1].strftime('%Y-%m-%d'), series.to_numpy()[::-1]):
+        days[day] = {
+            '1. open': f'{close:.5f}',
+            '2. high': f'{close * 1.005:.5f}',
+            '3. low': f'{close * 0.995:.5f}',
+            '4. close': f'{close:.5f}'
+        }
+    return {
+        'Meta Data': {'1. Information': 'Forex Daily Prices', '2. From Symbol': from_symbol, '3. To Symbol': to_symbol},
+        'Time Series FX (Daily)': days
+    }
+
+
+def write_cache(data: pandas.DataFrame, directory: str, file_name: str = 'cache.json') -> str:
+    """Write the computed cache in the format selected by file_name; returns the path."""
+    from vivendi_stock.core.cache_store import get_cache_store
+
+    path = os.path.join(directory, file_name)
+    get_cache_store(file_name).save(data, path)
+    return path
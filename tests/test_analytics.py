@@ -0,0 +1,93 @@
+import math
+
+import numpy
+import pandas
+import pytest
+
+from vivendi_stock.core.analytics import AnalyticsEngine, AnalyticsSnapshot
+
+COLUMNS = ['VIV.PA', 'CAN.L', 'EUR.AUD']
+
+
+def _engine() -> AnalyticsEngine:
+    return AnalyticsEngine({'1W': 5, '1M': 21}, (5, 20), 20, 30)
+
+
+def _data(rows: int = 260, seed: int = 3) -> pandas.DataFrame:
+    rng = numpy.random.default_rng(seed)
+    prices = 50 * numpy.exp(numpy.cumsum(rng.normal(0, 0.01, size=(rows, len(COLUMNS))), axis=0))
+    prices[rng.random(prices.shape) < 0.05] = numpy.nan
+    prices[rng.random(prices.shape) < 0.02] = 0.0
+    return pandas.DataFrame(prices, index=pandas.bdate_range('2023-01-02', periods=rows), columns=COLUMNS)
+
+
+def _assert_same(actual: AnalyticsSnapshot, expected: AnalyticsSnapshot) -> None:
+    assert actual.series.keys() == expected.series.keys()
+    for series_id, series in expected.series.items():
+        other = actual.series[series_id]
+        assert other.as_of == series.as_of
+        assert other.latest == pytest.approx(series.latest, nan_ok=True)
+        # Running sums and a fresh pass can round the last digit differently.
+        for label in series.returns:
+            assert other.returns[label] == pytest.approx(series.returns[label], abs=0.011, nan_ok=True)
+        for window in series.moving_averages:
+            assert other.moving_averages[window] == pytest.approx(
+                series.moving_averages[window], abs=0.0011, nan_ok=True)
+        assert other.volatility == pytest.approx(series.volatility, abs=0.011, nan_ok=True)
+        assert other.drawdown == pytest.approx(series.drawdown, abs=0.011, nan_ok=True)
+        assert other.max_drawdown == pytest.approx(series.max_drawdown, abs=0.011, nan_ok=True)
+    pandas.testing.assert_frame_equal(actual.correlation, expected.correlation, atol=2e-4)
+
+
+def test_incremental_update_equals_full_rebuild():
+    data = _data()
+    engine = _engine()
+    assert engine.update(data.iloc[:200]).rebuilt
+    for end in range(201, len(data) + 1, 7):
+        snapshot = engine.update(data.iloc[:end], changed_from=data.index[engine.rows])
+        assert not snapshot.rebuilt
+        _assert_same(snapshot, _engine().update(data.iloc[:end]))
+
+
+def test_incremental_update_processes_only_new_rows():
+    data = _data()
+    engine = _engine()
+    engine.update(data.iloc[:250])
+    snapshot = engine.update(data, changed_from=data.index[250])
+    assert (snapshot.rows_processed, snapshot.rebuilt) == (10, False)
+
+
+def test_change_before_last_date_rebuilds():
+    data = _data()
+    engine = _engine()
+    engine.update(data.iloc[:250])
+    corrected = data.copy()
+    corrected.iloc[240, 0] *= 1.1
+    snapshot = engine.update(corrected, changed_from=corrected.index[240])
+    assert snapshot.rebuilt and snapshot.rows_processed == len(data)
+    _assert_same(snapshot, _engine().update(corrected))
+
+
+def test_reordered_columns_resume():
+    data = _data()
+    engine = _engine()
+    engine.update(data.iloc[:250])
+    snapshot = engine.update(data[COLUMNS[::-1]], changed_from=data.index[250])
+    assert not snapshot.rebuilt
+    _assert_same(snapshot, _engine().update(data))
+
+
+def test_indicators_match_pandas():
+    data = _data()
+    prices = data.replace(0.0, numpy.nan).ffill()
+    returns = numpy.log(prices).diff()
+    analytics = _engine().update(data).series['VIV.PA']
+
+    assert analytics.latest == pytest.approx(round(prices['VIV.PA'].iloc[-1], 3))
+    assert analytics.moving_averages[20] == pytest.approx(prices['VIV.PA'].iloc[-20:].mean(), abs=0.001)
+    assert analytics.returns['1W'] == pytest.approx(
+        (prices['VIV.PA'].iloc[-1] / prices['VIV.PA'].iloc[-6] - 1) * 100, abs=0.01)
+    window = returns['VIV.PA'].iloc[-20:].dropna()
+    assert analytics.volatility == pytest.approx(window.std() * math.sqrt(252) * 100, abs=0.01)
+    peak = prices['VIV.PA'].cummax()
+    assert analytics.max_drawdown == pytest.approx(((prices['VIV.PA'] / peak - 1).min()) * 100, abs=0.01)
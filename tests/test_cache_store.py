@@ -0,0 +1,114 @@
+import numpy
+import pandas
+import pytest
+
+from vivendi_stock.core.cache_store import (
+    BINARY_MAGIC,
+    BinaryCacheStore,
+    CacheJournal,
+    JsonCacheStore,
+    get_cache_store,
+    migrate_legacy_cache,
+)
+
+
+def _frame(rows: int = 6, start: str = '2024-06-03') -> pandas.DataFrame:
+    index = pandas.bdate_range(start, periods=rows)
+    values = numpy.arange(rows * 3, dtype=float).reshape(rows, 3) + 0.125
+    values[-1, 2] = numpy.nan
+    return pandas.DataFrame(values, index=index, columns=['VIV.PA', 'EUR.AUD', 'STOCK.VALUE'])
+
+
+def test_binary_round_trip(tmp_path):
+    path = str(tmp_path / 'cache.bin')
+    data = _frame()
+    BinaryCacheStore().save(data, path)
+    loaded = BinaryCacheStore().load(path)
+    pandas.testing.assert_frame_equal(loaded, data, check_freq=False)
+    header = loaded.attrs['cache_header']
+    assert (header['rows'], header['columns']) == (6, ['VIV.PA', 'EUR.AUD', 'STOCK.VALUE'])
+    assert header['normalized'] and header['sorted']
+
+
+def test_binary_save_normalizes_and_sorts_the_index(tmp_path):
+    path = str(tmp_path / 'cache.bin')
+    data = _frame()
+    shuffled = data.iloc[[3, 0, 5, 1, 4, 2]].set_axis(data.index[[3, 0, 5, 1, 4, 2]] + pandas.Timedelta(hours=16))
+    BinaryCacheStore().save(shuffled, path)
+    pandas.testing.assert_frame_equal(BinaryCacheStore().load(path), data, check_freq=False)
+
+
+def test_binary_round_trip_of_empty_frame(tmp_path):
+    path = str(tmp_path / 'cache.bin')
+    BinaryCacheStore().save(_frame().iloc[:0], path)
+    loaded = BinaryCacheStore().load(path)
+    assert loaded.empty and list(loaded.columns) == ['VIV.PA', 'EUR.AUD', 'STOCK.VALUE']
+
+
+def test_binary_load_rejects_foreign_and_truncated_files(tmp_path):
+    path = tmp_path / 'cache.bin'
+    path.write_bytes(b'{"VIV.PA": {}}')
+    with pytest.raises(ValueError):
+        BinaryCacheStore().load(str(path))
+
+    BinaryCacheStore().save(_frame(), str(path))
+    raw = path.read_bytes()
+    assert raw.startswith(BINARY_MAGIC)
+    path.write_bytes(raw[:-8])
+    with pytest.raises(ValueError):
+        BinaryCacheStore().load(str(path))
+
+
+def test_store_is_chosen_by_extension():
+    assert isinstance(get_cache_store('cache.json'), JsonCacheStore)
+    assert isinstance(get_cache_store('cache.bin'), BinaryCacheStore)
+
+
+def test_legacy_json_cache_is_migrated_once(tmp_path):
+    legacy, target = str(tmp_path / 'cache.json'), str(tmp_path / 'cache.bin')
+    JsonCacheStore().save(_frame(), legacy)
+    assert migrate_legacy_cache(legacy, target)
+    # The JSON layout sorts its keys, so only the column order differs.
+    pandas.testing.assert_frame_equal(BinaryCacheStore().load(target), _frame(), check_freq=False, check_like=True)
+    assert not migrate_legacy_cache(legacy, target)
+
+
+def test_journal_replay_replaces_and_appends_rows(tmp_path):
+    base = _frame()
+    journal = CacheJournal(str(tmp_path / 'cache.bin.journal'))
+    changed = base.iloc[[-1]] * 2
+    new_rows = _frame(2, start='2024-06-11')
+    assert journal.append(changed) > 0
+    journal.append(new_rows)
+
+    replayed = journal.replay(base)
+    assert list(replayed.index) == [*base.index, *new_rows.index]
+    pandas.testing.assert_frame_equal(replayed.loc[changed.index], changed, check_freq=False)
+    pandas.testing.assert_frame_equal(replayed.iloc[:5], base.iloc[:5], check_freq=False)
+    assert numpy.isnan(replayed.loc[new_rows.index[1], 'STOCK.VALUE'])
+
+
+def test_journal_later_entries_win(tmp_path):
+    journal = CacheJournal(str(tmp_path / 'cache.bin.journal'))
+    row = _frame(1)
+    journal.append(row)
+    journal.append(row + 1)
+    pandas.testing.assert_frame_equal(journal.read(), row + 1, check_freq=False)
+
+
+def test_journal_skips_a_torn_last_line(tmp_path):
+    journal = CacheJournal(str(tmp_path / 'cache.bin.journal'))
+    journal.append(_frame(2))
+    with open(journal.path, 'a', encoding='utf8') as f:
+        f.write('{"date": "2024-06-05", "val')
+    assert list(journal.read().index) == list(_frame(2).index)
+
+
+def test_journal_truncate(tmp_path):
+    journal = CacheJournal(str(tmp_path / 'cache.bin.journal'))
+    base = _frame()
+    assert journal.replay(base) is base
+    journal.append(base.iloc[[0]])
+    assert journal.size > 0
+    journal.truncate()
+    assert journal.size == 0 and journal.replay(base) is base
@@ -0,0 +1,90 @@
+import datetime
+import json
+
+import numpy
+import pandas
+import pytest
+from flask import Flask
+
+from vivendi_stock import data_api
+from vivendi_stock.core import vivendi_data
+from vivendi_stock.core.portfolios import PortfolioRegistry
+from vivendi_stock.core.snapshot import DataSnapshot
+from vivendi_stock.utils.config import config
+
+MODIFIED = datetime.datetime(2024, 6, 14, 18, 30, 5, tzinfo=datetime.timezone.utc)
+
+
+class _Stock:
+    """The part of VivendiStock the data API reads."""
+
+    def __init__(self, snapshot: DataSnapshot) -> None:
+        self.snapshot = snapshot
+
+    def latest_portfolio_values(self) -> pandas.Series:
+        return pandas.Series({'default': numpy.nan})
+
+
+def _snapshot(version: int = 1, modified_at: datetime.datetime | None = MODIFIED, last: float = 11.0):
+    index = pandas.bdate_range('2024-06-10', periods=5)
+    data = pandas.DataFrame({'VIV.PA': [10.0, numpy.nan, 10.5, 10.8, last]}, index=index)
+    return DataSnapshot.build(data, version, '2024-01-01', modified_at=modified_at)
+
+
+@pytest.fixture
+def stock():
+    return _Stock(_snapshot())
+
+
+@pytest.fixture
+def client(stock, monkeypatch):
+    monkeypatch.setattr(vivendi_data, 'REGISTRY', PortfolioRegistry(config.STOCK, config.CURRENCIES))
+    monkeypatch.setattr(data_api, '_body_cache', data_api.OrderedDict())
+    app = Flask(__name__)
+    app.register_blueprint(data_api.create_blueprint(lambda: stock))
+    return app.test_client()
+
+
+def test_etag_revalidates_until_the_version_changes(client, stock):
+    first = client.get('/api/series/VIV.PA')
+    assert first.status_code == 200
+    assert client.get('/api/series/VIV.PA', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    stock.snapshot = _snapshot(version=2, last=12.0)
+    second = client.get('/api/series/VIV.PA', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['values'][-1] == 12.0
+
+
+def test_etag_changes_with_the_portfolio_registry(client):
+    before = client.get('/api/summary').headers['ETag']
+    vivendi_data.REGISTRY.register('desk-a', {'VIV.PA': 10})
+    response = client.get('/api/summary', headers={'If-None-Match': before})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != before
+
+
+def test_last_modified_comes_from_the_shared_cache(client, stock):
+    response = client.get('/api/summary')
+    assert response.headers['Last-Modified'] == 'Fri, 14 Jun 2024 18:30:05 GMT'
+    # Another worker publishing the same version at a different time serves the same validators.
+    stock.snapshot = _snapshot()
+    headers = {'If-Modified-Since': response.headers['Last-Modified']}
+    assert client.get('/api/summary', headers=headers).status_code == 304
+    assert client.get('/api/summary', headers={'If-Modified-Since': 'Fri, 14 Jun 2024 18:00:00 GMT'}).status_code == 200
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    headers = {'If-None-Match': '"stale"', 'If-Modified-Since': 'Sat, 15 Jun 2024 00:00:00 GMT'}
+    assert client.get('/api/summary', headers=headers).status_code == 200
+
+
+def test_nan_is_sent_as_null(client, stock):
+    stock.snapshot = _snapshot(last=numpy.nan)
+    summary = client.get('/api/summary')
+    assert summary.status_code == 200
+    body = json.loads(summary.data)
+    assert body['series']['VIV.PA']['latest'] is None
+    assert body['portfolios'] == {'default': None}
+    assert client.get('/api/series/VIV.PA').get_json()['values'] == [10.0, None, 10.5, 10.8, None]
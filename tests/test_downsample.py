@@ -0,0 +1,82 @@
+import numpy
+import pandas
+import pytest
+
+from vivendi_stock.core.downsample import SeriesPyramid, lttb, lttb_indices
+
+
+def _series(count: int, seed: int = 7) -> pandas.Series:
+    rng = numpy.random.default_rng(seed)
+    return pandas.Series(
+        100 + numpy.cumsum(rng.normal(size=count)), index=pandas.bdate_range('2010-01-01', periods=count)
+    )
+
+
+def _reference_lttb(x: numpy.ndarray, y: numpy.ndarray, threshold: int) -> list[int]:
+    """Straightforward per-bucket LTTB over the same bucket edges."""
+    count = len(x)
+    edges = numpy.linspace(1, count - 1, threshold - 1).astype(int)
+    edges[-1] = count - 1
+    selected, previous = [0], 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 1 < threshold - 2:
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+            next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        areas = [
+            abs((x[previous] - next_x) * (y[i] - y[previous]) - (x[previous] - x[i]) * (next_y - y[previous]))
+            for i in range(start, end)
+        ]
+        previous = start + int(numpy.argmax(areas))
+        selected.append(previous)
+    return selected + [count - 1]
+
+
+@pytest.mark.parametrize('count, threshold', [(1000, 100), (257, 10), (50, 3)])
+def test_lttb_keeps_endpoints_and_requested_count(count, threshold):
+    series = _series(count)
+    indices = lttb_indices(numpy.arange(count, dtype=float), series.to_numpy(), threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == count - 1
+    assert (numpy.diff(indices) > 0).all()
+
+
+def test_lttb_matches_reference_implementation():
+    y = _series(500).to_numpy()
+    x = numpy.arange(500, dtype=float)
+    assert lttb_indices(x, y, 60).tolist() == _reference_lttb(x, y, 60)
+
+
+def test_lttb_keeps_extremes():
+    y = numpy.zeros(200)
+    y[73], y[151] = 50.0, -40.0
+    indices = lttb_indices(numpy.arange(200, dtype=float), y, 20)
+    assert {73, 151} <= set(indices.tolist())
+
+
+def test_lttb_skips_nan_when_a_bucket_has_values():
+    y = _series(100).to_numpy()
+    y[10:60:2] = numpy.nan
+    indices = lttb_indices(numpy.arange(100, dtype=float), y, 20)
+    assert not numpy.isnan(y[indices]).any()
+
+
+@pytest.mark.parametrize('threshold', [0, 100, 500])
+def test_lttb_returns_short_series_unchanged(threshold):
+    series = _series(100)
+    assert lttb(series, threshold) is series
+
+
+def test_pyramid_selects_finest_level_within_budget():
+    series = _series(4000)
+    pyramid = SeriesPyramid(series, 500)
+    assert [len(level) for level in pyramid.levels] == [4000, 2000, 1000, 500]
+
+    assert len(pyramid.select()) == 500
+    zoomed = pyramid.select(series.index[1000], series.index[1399])
+    assert zoomed.equals(series.iloc[1000:1400])
+    medium = pyramid.select(series.index[0], series.index[1999])
+    assert 250 < len(medium) <= 500
+    assert medium.index[0] >= series.index[0] and medium.index[-1] <= series.index[1999]
@@ -0,0 +1,99 @@
+import datetime
+
+import numpy
+import pandas
+import pytest
+
+from vivendi_stock.core.fetch_planner import FetchState, FetchTask, fill_closed_sessions, plan_fetches
+
+UTC = datetime.timezone.utc
+# Friday evening, after the Paris close and the New York FX rollover.
+NOW = datetime.datetime(2024, 6, 14, 22, tzinfo=UTC)
+SYMBOLS = ('VIV.PA',)
+PAIRS = ('EUR.AUD',)
+
+
+def _frame(end: str, start: str = '2023-06-01') -> pandas.DataFrame:
+    index = pandas.bdate_range(start, end)
+    return pandas.DataFrame(1.0, index=index, columns=[*SYMBOLS, *PAIRS])
+
+
+@pytest.fixture
+def state(tmp_path):
+    return FetchState(str(tmp_path / 'fetch_state.json'))
+
+
+def _plan(data, state, **kwargs):
+    kwargs.setdefault('now', NOW)
+    return {task.series_id: task.outputsize for task in plan_fetches(data, SYMBOLS, PAIRS, state, **kwargs)}
+
+
+def test_no_history_fetches_full(state):
+    assert _plan(pandas.DataFrame(), state) == {'VIV.PA': 'full', 'EUR.AUD': 'full'}
+
+
+def test_up_to_date_series_are_skipped(state):
+    assert _plan(_frame('2024-06-14'), state) == {}
+
+
+def test_weekend_plans_nothing(state):
+    assert _plan(_frame('2024-06-14'), state, now=datetime.datetime(2024, 6, 15, 12, tzinfo=UTC)) == {}
+
+
+def test_force_refetches_compact(state):
+    assert _plan(_frame('2024-06-14'), state, force=True) == {'VIV.PA': 'compact', 'EUR.AUD': 'compact'}
+
+
+def test_new_session_fetches_compact(state):
+    assert _plan(_frame('2024-06-13'), state) == {'VIV.PA': 'compact', 'EUR.AUD': 'compact'}
+
+
+def test_recent_gap_is_covered_by_compact(state):
+    data = _frame('2024-06-13')
+    data.loc['2024-06-10', 'VIV.PA'] = 0.0
+    assert _plan(data, state) == {'VIV.PA': 'compact', 'EUR.AUD': 'compact'}
+
+
+def test_checkpoint_before_compact_window_fetches_full(state):
+    tasks = plan_fetches(_frame('2023-12-29'), SYMBOLS, PAIRS, state, now=NOW)
+    assert {task.outputsize for task in tasks} == {'full'}
+    assert all('before compact window' in task.reason for task in tasks)
+
+
+def test_old_gap_fetches_full(state):
+    data = _frame('2024-06-14')
+    data.loc['2023-09-05', 'VIV.PA'] = numpy.nan
+    assert _plan(data, state) == {'VIV.PA': 'full'}
+
+
+def test_gap_before_last_full_fetch_is_permanent(state):
+    data = _frame('2024-06-14')
+    data.loc['2023-09-05', 'VIV.PA'] = 0.0
+    state.record(FetchTask('VIV.PA', False, 'full', 'no history'), datetime.date(2024, 5, 31))
+    assert _plan(data, state) == {}
+
+
+def test_holiday_gap_is_not_a_gap(state):
+    data = _frame('2024-06-14')
+    # Good Friday: Euronext is closed, so the missing close is expected.
+    data.loc['2024-03-29', 'VIV.PA'] = 0.0
+    assert _plan(data, state) == {}
+
+
+def test_fill_closed_sessions_on_empty_cache():
+    index = pandas.to_datetime(['2024-05-02', '2024-05-03', '2024-05-06', '2024-05-07'])
+    fresh = pandas.DataFrame({
+        'VIV.PA': [10.0, 10.5, 11.0, numpy.nan],
+        'CAN.L': [5.0, 5.5, numpy.nan, 6.0],
+        'EUR.AUD': [1.6, 1.61, 1.62, 1.63],
+    }, index=index)
+    merged = fill_closed_sessions(pandas.DataFrame(), fresh, ['VIV.PA', 'CAN.L'], PAIRS + ('GBP.AUD',))
+    # London was closed on 6 May (Early May bank holiday), so its close carries forward; Paris traded on
+    # 7 May without a bar, so that incomplete new date is dropped.
+    assert list(merged.index) == list(index[:3])
+    assert merged.loc['2024-05-06', 'CAN.L'] == 5.5
+    assert list(merged.columns) == ['VIV.PA', 'CAN.L']
+
+
+def test_fill_closed_sessions_with_empty_fresh_data():
+    assert fill_closed_sessions(_frame('2024-06-14'), pandas.DataFrame(), SYMBOLS, PAIRS).empty
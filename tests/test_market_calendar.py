@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+from vivendi_stock.core.market_calendar import (
+    EXCHANGES,
+    _easter,
+    exchange_for,
+    holidays,
+    is_trading_day,
+    last_closed_session,
+    next_close,
+    sessions_between,
+)
+
+UTC = datetime.timezone.utc
+
+
+@pytest.mark.parametrize('year, expected', [
+    (2008, datetime.date(2008, 3, 23)),
+    (2019, datetime.date(2019, 4, 21)),
+    (2024, datetime.date(2024, 3, 31)),
+    (2025, datetime.date(2025, 4, 20)),
+    (2038, datetime.date(2038, 4, 25)),
+])
+def test_easter(year, expected):
+    assert _easter(year) == expected
+
+
+def test_euronext_holidays():
+    assert holidays('euronext', 2024) == {
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 3, 29),
+        datetime.date(2024, 4, 1),
+        datetime.date(2024, 5, 1),
+        datetime.date(2024, 12, 25),
+        datetime.date(2024, 12, 26),
+    }
+
+
+def test_lse_holidays():
+    assert holidays('lse', 2024) == {
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 3, 29),
+        datetime.date(2024, 4, 1),
+        datetime.date(2024, 5, 6),
+        datetime.date(2024, 5, 27),
+        datetime.date(2024, 8, 26),
+        datetime.date(2024, 12, 25),
+        datetime.date(2024, 12, 26),
+    }
+
+
+@pytest.mark.parametrize('year, expected', [
+    # Christmas on a Saturday: both days move to Monday and Tuesday.
+    (2021, {datetime.date(2021, 12, 27), datetime.date(2021, 12, 28)}),
+    # Christmas on a Sunday: Boxing Day keeps Monday and Christmas takes Tuesday.
+    (2022, {datetime.date(2022, 12, 26), datetime.date(2022, 12, 27)}),
+])
+def test_lse_christmas_substitutes(year, expected):
+    assert expected <= holidays('lse', year)
+
+
+def test_lse_new_year_on_weekend_moves_to_monday():
+    assert datetime.date(2022, 1, 3) in holidays('lse', 2022)
+    assert datetime.date(2022, 1, 1) not in holidays('lse', 2022)
+
+
+def test_fx_trades_every_weekday():
+    fx = EXCHANGES['FX']
+    assert holidays('none', 2024) == frozenset()
+    assert is_trading_day(fx, datetime.date(2024, 12, 25))
+    assert not is_trading_day(fx, datetime.date(2024, 12, 28))
+
+
+def test_exchange_for():
+    assert exchange_for('VIV.PA').code == 'XPAR'
+    assert exchange_for('HAVAS.AS').code == 'XAMS'
+    assert exchange_for('CAN.L').code == 'XLON'
+    assert exchange_for('EUR.AUD', ('EUR.AUD',)).code == 'FX'
+    assert exchange_for('UNKNOWN').code == 'FX'
+
+
+def test_last_closed_session():
+    paris = EXCHANGES['XPAR']
+    # Before Thursday's close the last session is Wednesday; after it, Thursday.
+    assert last_closed_session(paris, datetime.datetime(2024, 3, 28, 12, tzinfo=UTC)) == datetime.date(2024, 3, 27)
+    assert last_closed_session(paris, datetime.datetime(2024, 3, 28, 17, tzinfo=UTC)) == datetime.date(2024, 3, 28)
+    # Good Friday, the weekend and Easter Monday are closed.
+    assert last_closed_session(paris, datetime.datetime(2024, 4, 2, 10, tzinfo=UTC)) == datetime.date(2024, 3, 28)
+    assert last_closed_session(paris, datetime.datetime(2024, 4, 2, 16, tzinfo=UTC)) == datetime.date(2024, 4, 2)
+
+
+def test_next_close_skips_closed_days():
+    london = EXCHANGES['XLON']
+    close = next_close(london, datetime.datetime(2024, 5, 3, 16, tzinfo=UTC))
+    assert close.date() == datetime.date(2024, 5, 7)
+    assert close.time() == datetime.time(16, 30)
+
+
+def test_sessions_between():
+    london = EXCHANGES['XLON']
+    assert sessions_between(london, datetime.date(2024, 12, 23), datetime.date(2024, 12, 31)) == [
+        datetime.date(2024, 12, 23),
+        datetime.date(2024, 12, 24),
+        datetime.date(2024, 12, 27),
+        datetime.date(2024, 12, 30),
+        datetime.date(2024, 12, 31),
+    ]
@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from vivendi_stock.utils import metrics
+from vivendi_stock.utils.config import config
+
+# A separate process that exports a counter and a histogram, then exits (flushing at exit).
+WORKER = '''
+from vivendi_stock.utils import metrics
+requests = metrics.counter('test_requests_total', 'Requests.', ('path',))
+latency = metrics.histogram('test_latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+metrics.registry.export()
+requests.inc('/api/summary', amount=3)
+latency.observe(0.05)
+latency.observe(0.5)
+'''
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'METRICS_DIR', tmp_path)
+    return tmp_path
+
+
+def _exporting_registry() -> metrics.Registry:
+    # export() would also flush at interpreter exit; tests only need the file writes.
+    registry = metrics.Registry(flush_interval=5.0)
+    registry._exporting = True
+    return registry
+
+
+def _run_worker(directory) -> None:
+    env = dict(os.environ, METRICS_DIR=str(directory), METRICS_ENABLED='true')
+    subprocess.run([sys.executable, '-c', WORKER], env=env, check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_collect_merges_every_process_file(metrics_dir):
+    _run_worker(metrics_dir)
+    _run_worker(metrics_dir)
+    registry = _exporting_registry()
+    registry.counter('test_requests_total', 'Requests.', ('path',)).inc('/api/summary')
+    registry.gauge('test_version', 'Data version.').set(7)
+
+    merged = registry.collect()
+    assert len(list(metrics_dir.glob('metrics-*.json'))) == 3
+    assert merged['test_requests_total']['samples'] == {('/api/summary',): 7}
+    # Bucket counts (<=0.1, <=1, +Inf) and the sum, added up over both workers.
+    assert merged['test_latency_seconds']['samples'][()] == [2, 2, 0, pytest.approx(1.1)]
+    assert merged['test_version']['samples'][()][0] == 7
+
+
+def test_exposition_renders_cumulative_buckets(metrics_dir):
+    _run_worker(metrics_dir)
+    text = metrics.render(_exporting_registry().collect())
+    assert 'test_requests_total{path="/api/summary"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count 2' in text
+
+
+def test_files_of_exited_processes_are_retired(metrics_dir):
+    _run_worker(metrics_dir)
+    stale = time.time() - metrics.RETIRE_AFTER_FLUSHES * 5.0 - 60
+    for path in metrics_dir.glob('metrics-*.json'):
+        os.utime(path, (stale, stale))
+
+    registry = _exporting_registry()
+    merged = registry.collect()
+    assert merged['test_requests_total']['samples'] == {('/api/summary',): 3}
+    assert sorted(path.name for path in metrics_dir.glob('metrics-*.json')) == sorted(
+        [metrics.RETIRED_FILE, os.path.basename(registry._path())]
+    )
+
+    # Totals keep counting from the retired values once a new process reports.
+    _run_worker(metrics_dir)
+    assert registry.collect()['test_requests_total']['samples'] == {('/api/summary',): 6}
+    with open(metrics_dir / metrics.RETIRED_FILE, encoding='utf8') as f:
+        assert 'test_requests_total' in json.load(f)
+
+
+def test_collect_without_export_reports_this_process_only(metrics_dir):
+    _run_worker(metrics_dir)
+    registry = metrics.Registry()
+    registry.counter('test_local_total', 'Local.').inc()
+    assert set(registry.collect()) == {'test_local_total'}
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from vivendi_stock.utils import rate_limiter
+from vivendi_stock.utils.rate_limiter import DailyQuota, HostRateLimiter, QuotaExhaustedError, TokenBucket
+
+HOST = 'https://www.alphavantage.co/query'
+
+
+def _run_threads(count: int, target) -> None:
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    now = bucket._updated
+    assert [bucket.reserve(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    # Waiting refills the bucket, but never beyond its capacity.
+    assert bucket.reserve(now + 100) == 0.0
+    assert bucket._tokens == pytest.approx(2.0)
+
+
+def test_concurrent_waits_get_distinct_slots(monkeypatch):
+    monkeypatch.setattr(rate_limiter.time, 'sleep', lambda seconds: None)
+    limiter = HostRateLimiter({'www.alphavantage.co': TokenBucket(rate=10.0)})
+    waits = []
+    _run_threads(8, lambda: waits.append(limiter.wait(HOST)))
+
+    # One token is free; the other seven queue up a tenth of a second apart.
+    assert sorted(waits) == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7], abs=0.05)
+    stats = limiter.stats()['www.alphavantage.co']
+    assert (stats.calls, stats.delayed_calls) == (8, 7)
+
+
+def test_unthrottled_hosts_do_not_wait():
+    limiter = HostRateLimiter({'www.alphavantage.co': TokenBucket(rate=0.001)})
+    start = time.monotonic()
+    assert [limiter.wait('https://cdn.jsdelivr.net/x') for _ in range(5)] == [0.0] * 5
+    assert time.monotonic() - start < 0.5
+
+
+def test_daily_quota_is_shared_through_its_file(tmp_path):
+    path = tmp_path / 'quota.json'
+    granted = []
+
+    def worker() -> None:
+        # Each thread stands in for a separate process with its own view of the file.
+        quota = DailyQuota(20, path)
+        while True:
+            try:
+                quota.consume()
+            except QuotaExhaustedError:
+                return
+            granted.append(1)
+
+    _run_threads(6, worker)
+    assert len(granted) == 20
+    assert DailyQuota(20, path).remaining() == 0
+
+
+def test_daily_quota_rolls_over(monkeypatch, tmp_path):
+    quota = DailyQuota(2, tmp_path / 'quota.json')
+    quota.exhaust()
+    with pytest.raises(QuotaExhaustedError):
+        quota.consume()
+    monkeypatch.setattr(DailyQuota, '_today', staticmethod(lambda: '2999-01-01'))
+    assert quota.remaining() == 2
+
+
+def test_host_limiter_reports_remaining_quota(tmp_path):
+    limiter = HostRateLimiter(quotas={'www.alphavantage.co': DailyQuota(3, tmp_path / 'quota.json')})
+    limiter.wait(HOST)
+    assert limiter.remaining(HOST) == 2
+    assert limiter.remaining('cdn.jsdelivr.net') is None
+    limiter.exhaust('www.alphavantage.co')
+    with pytest.raises(QuotaExhaustedError):
+        limiter.wait(HOST)
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from vivendi_stock.core import response_cache
+from vivendi_stock.core.response_cache import ENTRY_SUFFIX, ResponseCache
+
+PAYLOAD = {'Time Series (Daily)': {'2024-06-14': {'4. close': '27.5'}}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(response_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def _cache(directory, max_bytes: int = 1 << 20) -> ResponseCache:
+    return ResponseCache(str(directory), max_bytes, {'daily': 60.0, 'fx': 3600.0})
+
+
+def test_round_trip_within_ttl(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.put('viv-compact', 'daily', PAYLOAD)
+    clock[0] += 59
+    assert cache.get('viv-compact', 'daily') == PAYLOAD
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 0)
+
+
+def test_entries_expire_per_kind(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.put('viv-compact', 'daily', PAYLOAD)
+    cache.put('eur-aud', 'fx', PAYLOAD)
+    clock[0] += 61
+    assert cache.get('viv-compact', 'daily') is None
+    assert cache.get('eur-aud', 'fx') == PAYLOAD
+    assert cache.stats().expired == 1
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = _cache(tmp_path)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, 'fx', {'key': key, 'padding': key * 200})
+    entry_bytes = cache.stats().total_bytes // 3
+    cache.max_bytes = 3 * entry_bytes + entry_bytes // 2
+
+    assert cache.get('a', 'fx') is not None  # 'a' is now the most recently used
+    cache.put('d', 'fx', {'key': 'd', 'padding': 'd' * 200})
+    assert cache.get('b', 'fx') is None
+    assert [cache.get(key, 'fx')['key'] for key in ('a', 'c', 'd')] == ['a', 'c', 'd']
+    assert cache.stats().evictions == 1
+    assert not os.path.exists(tmp_path / f'b{ENTRY_SUFFIX}')
+
+
+def test_recency_survives_a_restart(tmp_path, clock):
+    cache = _cache(tmp_path)
+    for key in ('a', 'b'):
+        cache.put(key, 'fx', {'key': key})
+    os.utime(tmp_path / f'a{ENTRY_SUFFIX}', (clock[0] + 10, clock[0] + 10))
+    os.utime(tmp_path / f'b{ENTRY_SUFFIX}', (clock[0], clock[0]))
+
+    entry_bytes = cache.stats().total_bytes // 2
+    reopened = _cache(tmp_path, max_bytes=2 * entry_bytes + entry_bytes // 2)
+    reopened.put('c', 'fx', {'key': 'c'})
+    assert reopened.get('b', 'fx') is None
+    assert reopened.get('a', 'fx') == {'key': 'a'}
+
+
+def test_unreadable_entry_is_dropped(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.put('a', 'fx', PAYLOAD)
+    (tmp_path / f'a{ENTRY_SUFFIX}').write_bytes(b'not gzip')
+    assert cache.get('a', 'fx') is None
+    assert cache.stats().total_bytes == 0
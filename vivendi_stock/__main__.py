@@ -4,7 +4,8 @@ from __future__ import annotations
 import argparse
 
 from .utils.config import config
-from .dash_app import app
+from .utils.profiler import start_profiler
+from .utils.startup import StartupTimer
 
 
 def main() -> None:
@@ -25,8 +26,32 @@ def main() -> None:
         default=config.DASH_DEBUG,
         help='Enable Dash debug mode.'
     )
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='Report import and data initialization time on stderr before serving.'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help='Sample all threads until the server exits and write collapsed stacks (flamegraph input) to FILE '
+             '(default from PROFILE_FILE).'
+    )
     args = parser.parse_args()
 
+    start_profiler(args.profile)
+
+    timer = StartupTimer(enabled=args.profile_startup)
+    with timer.stage('import dash app'):
+        from .dash_app import app, warm_up
+    if args.profile_startup:
+        # Time the cache load in the foreground so it can be reported.
+        with timer.stage('load cached snapshot'):
+            warm_up().join()
+        timer.report()
+    else:
+        warm_up()
+
     app.run(host=args.host, port=args.port, debug=args.debug)
 
 
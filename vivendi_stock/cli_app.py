@@ -3,16 +3,20 @@ from __future__ import annotations
 
 import argparse
 import logging
+import math
 import re
 import sys
 from datetime import datetime
-
-import pandas
-import requests
+from typing import TYPE_CHECKING
 
 from .utils.config import config
-from .core.vivendi_data import STOCK, VivendiStock
-from .core.web_api import get_api_key
+from .utils.profiler import start_profiler
+from .utils.startup import StartupTimer
+
+if TYPE_CHECKING:
+    from .core.vivendi_data import VivendiStock
+
+STOCK = config.STOCK
 
 
 def _format_change(change: float) -> str:
@@ -20,13 +24,6 @@ def _format_change(change: float) -> str:
     return f'{sign}{change:.2f}%'
 
 
-def _latest_date(series: pandas.Series) -> str:
-    non_null = series.dropna()
-    if non_null.empty:
-        return 'n/a'
-    return non_null.index[-1].strftime('%Y-%m-%d')
-
-
 def _redact_message(msg: str) -> str:
     """Strip 16-char uppercase API key values embedded in Alpha Vantage error messages."""
     return re.sub(r'[A-Z0-9]{16}', '***REDACTED***', msg)
@@ -34,6 +31,9 @@ def _redact_message(msg: str) -> str:
 
 def _test_setup() -> bool:
     """Verify configuration and live API key validity. Returns True if all checks pass."""
+    import requests
+    from .core.web_api import get_api_key, remaining_api_calls
+
     print('Vivendi Stock — Setup Check')
     print('=' * 50)
     passed = True
@@ -51,7 +51,7 @@ def _test_setup() -> bool:
     if api_key:
         test_symbol = next(iter(STOCK))
         url = (
-            f'https://www.alphavantage.co/query'
+            f'{config.ALPHAVANTAGE_BASE_URL}'
             f'?function=GLOBAL_QUOTE&symbol={test_symbol}&apikey={api_key}'
         )
         try:
@@ -79,6 +79,10 @@ def _test_setup() -> bool:
             print(f'  [FAIL] Network error reaching Alpha Vantage: {e}')
             passed = False
 
+    remaining = remaining_api_calls()
+    if remaining is not None:
+        print(f'  [{"OK" if remaining else "WARN"}] Alpha Vantage calls remaining today: {remaining}')
+
     # 3. Data directory
     if config.DATA_DIR.is_dir():
         print(f'  [OK] Data directory: {config.DATA_DIR}')
@@ -108,7 +112,10 @@ def _print_summary(stock_data: VivendiStock, series_ids: list[str]) -> None:
     print('-' * 78)
 
     for series_id in series_ids:
-        series, current_price, change = stock_data.get_data(series_id)
+        summary = stock_data.get_summary(series_id)
+        current_price = summary.latest if summary else 0.0
+        change = summary.change_percent if summary else 0.0
+        last_date = summary.last_date.strftime('%Y-%m-%d') if summary and summary.last_date is not None else 'n/a'
         if series_id in STOCK:
             name = STOCK[series_id]['name']
         elif series_id == 'STOCK.VALUE':
@@ -121,10 +128,109 @@ def _print_summary(stock_data: VivendiStock, series_ids: list[str]) -> None:
             f'{name[:35]:<35} '
             f'{current_price:>10.3f} '
             f'{_format_change(change):>10} '
-            f'{_latest_date(series):>10}'
+            f'{last_date:>10}'
         )
 
     print('-' * 78)
+    _print_analytics(stock_data, series_ids)
+
+
+def _format_indicator(value: float, suffix: str = '', decimals: int = 2) -> str:
+    return 'n/a' if math.isnan(value) else f'{value:.{decimals}f}{suffix}'
+
+
+def _print_analytics(stock_data: VivendiStock, series_ids: list[str]) -> None:
+    averages = config.ANALYTICS_MA_WINDOWS[-2:]
+    print(f'\nAnalytics (daily closes; volatility annualized over {config.ANALYTICS_VOLATILITY_WINDOW} sessions)')
+    print('-' * 78)
+    print(
+        f'{"Series":<14} {"1m":>7} {"1y":>7} '
+        + ' '.join(f'{f"MA{window}":>11}' for window in averages)
+        + f' {"Vol":>7} {"DD":>7} {"MaxDD":>7}'
+    )
+    print('-' * 78)
+    for series_id in series_ids:
+        analytics = stock_data.get_analytics(series_id)
+        if analytics is None:
+            continue
+        print(
+            f'{series_id:<14} '
+            f'{_format_indicator(analytics.returns.get("1m", math.nan), "%"):>7} '
+            f'{_format_indicator(analytics.returns.get("1y", math.nan), "%"):>7} '
+            + ' '.join(
+                f'{_format_indicator(analytics.moving_averages.get(window, math.nan), decimals=3):>11}'
+                for window in averages
+            )
+            + f' {_format_indicator(analytics.volatility, "%"):>7}'
+            f' {_format_indicator(analytics.drawdown, "%"):>7}'
+            f' {_format_indicator(analytics.max_drawdown, "%"):>7}'
+        )
+    print('-' * 78)
+
+    correlation = stock_data.get_correlation()
+    if correlation.empty:
+        return
+    print(f'\nCorrelation of daily returns (last {config.ANALYTICS_CORRELATION_WINDOW} sessions)')
+    print(f'{"":<14}' + ''.join(f'{series_id:>10}' for series_id in correlation.columns))
+    for series_id, row in correlation.iterrows():
+        print(f'{series_id:<14}' + ''.join(f'{_format_indicator(value):>10}' for value in row))
+
+
+def _format_bytes(count: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if count < 1024:
+            return f'{count:.0f} {unit}' if unit == 'B' else f'{count:.1f} {unit}'
+        count /= 1024
+    return f'{count:.1f} GiB'
+
+
+def _print_memory_report(stock_data: VivendiStock) -> None:
+    report = stock_data.memory_report()
+    print(f'\nMemory (data version {report.version}, {report.rows} rows, '
+          f'{"compact" if report.compact else "float64"} storage)')
+    print('-' * 78)
+    print(f'{"Series":<14} {"Dtype":<8} {"Values":>12} {"Charts":>12} {"Total":>12} {"Mapped":>8}')
+    print('-' * 78)
+    for series in sorted(report.series.values(), key=lambda item: item.total_bytes, reverse=True):
+        print(
+            f'{series.series_id:<14} '
+            f'{series.dtype:<8} '
+            f'{_format_bytes(series.value_bytes):>12} '
+            f'{_format_bytes(series.pyramid_bytes):>12} '
+            f'{_format_bytes(series.total_bytes):>12} '
+            f'{"yes" if series.mapped else "no":>8}'
+        )
+    print('-' * 78)
+    print(f'Date index: {_format_bytes(report.index_bytes)}; work window copies: '
+          f'{_format_bytes(report.workdata_bytes)}; mapped from cache file: {_format_bytes(report.mapped_bytes)}')
+    if report.master_bytes:
+        print(f'Full-precision frame behind the compact one: {_format_bytes(report.master_bytes)} '
+              f'({_format_bytes(report.master_mapped_bytes)} mapped from cache file)')
+    print(f'Total: {_format_bytes(report.total_bytes)}')
+
+
+def _backfill(restart: bool, chunk_days: int | None) -> int:
+    """Run or resume the full-history backfill. Returns 0 when complete, 2 when paused, 3 when handed
+    to the process holding the refresh lock, 1 on failure.
+    """
+    import os
+    from .core.backfill import request_backfill, run_backfill
+    from .core.coordination import LeaderLock
+    from .core.vivendi_data import VivendiStock
+
+    # The backfill writes the shared cache, so it must not race the refresher.
+    leader = LeaderLock(os.path.join(str(config.DATA_DIR), config.LEADER_LOCK_FILE))
+    if not leader.try_acquire():
+        path = request_backfill(restart=restart, chunk_days=chunk_days)
+        print(f'Another process holds the refresh lock; its refresh scheduler will run the backfill ({path}). '
+              f'Progress is logged there and recorded in {config.BACKFILL_STATE_FILE}.')
+        return 3
+    stock_data = VivendiStock(auto_update=False)
+    report = run_backfill(stock_data, restart=restart, chunk_days=chunk_days, progress=print)
+    print(report.message)
+    if report.complete:
+        return 0
+    return 2 if report.pending else 1
 
 
 def main() -> None:
@@ -132,6 +238,15 @@ def main() -> None:
         prog='vivendi-stock-cli',
         description='Run stock data update and print portfolio summary in terminal.'
     )
+    parser.add_argument(
+        'command',
+        nargs='?',
+        choices=('summary', 'backfill'),
+        default='summary',
+        help="'summary' (default) updates and prints the snapshot; 'backfill' fetches and merges the full "
+             'history of every series, resuming an interrupted run (exit code 2 when paused on the API quota, '
+             '3 when handed to the running web app or refresher).'
+    )
     parser.add_argument(
         '--test-setup',
         action='store_true',
@@ -140,7 +255,34 @@ def main() -> None:
     parser.add_argument(
         '--force-update',
         action='store_true',
-        help='Force refresh data from APIs, bypassing local source cache and checkpoint age checks (never runs remote queries on weekends).'
+        help='Force refresh data from APIs, bypassing local source cache and checkpoint age checks.'
+    )
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='Report import, cache load and update time on stderr.'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help='Sample all threads while running and write collapsed stacks (flamegraph input) to FILE '
+             '(default from PROFILE_FILE).'
+    )
+    parser.add_argument(
+        '--memory',
+        action='store_true',
+        help='After the summary, print the memory held by the published data per series (see CACHE_COMPACT).'
+    )
+    parser.add_argument(
+        '--restart',
+        action='store_true',
+        help='With backfill, discard earlier progress and staged histories.'
+    )
+    parser.add_argument(
+        '--chunk-days',
+        type=int,
+        metavar='DAYS',
+        help='With backfill, calendar days merged per checkpoint (default from BACKFILL_CHUNK_DAYS).'
     )
     args = parser.parse_args()
 
@@ -148,6 +290,18 @@ def main() -> None:
         ok = _test_setup()
         sys.exit(0 if ok else 1)
 
+    profiler = start_profiler(args.profile)
+    if args.command == 'backfill':
+        code = _backfill(args.restart, args.chunk_days)
+        if profiler is not None:
+            profiler.stop()
+        sys.exit(code)
+    timer = StartupTimer(enabled=args.profile_startup)
+    with timer.stage('import data stack'):
+        import os
+        from .core.coordination import LeaderLock
+        from .core.vivendi_data import VivendiStock
+
     # Suppress library INFO/DEBUG console output so it doesn't mix with tabular print output.
     # Each vivendi_stock sub-module has its own StreamHandler (via setup_logger), so we must
     # raise the level on every instantiated logger in the hierarchy.
@@ -159,13 +313,28 @@ def main() -> None:
                 ):
                     _handler.setLevel(logging.WARNING)
 
-    stock_data = VivendiStock()
-    if args.force_update:
-        stock_data.update(force=True)
+    with timer.stage('load cached snapshot'):
+        stock_data = VivendiStock(auto_update=False)
+    # Only the lock holder writes the shared cache; otherwise show what the holder last published.
+    leader = LeaderLock(os.path.join(str(config.DATA_DIR), config.LEADER_LOCK_FILE))
+    with timer.stage('update'):
+        if leader.try_acquire():
+            try:
+                stock_data.update(force=args.force_update, wait=True)
+            finally:
+                leader.release()
+        else:
+            stock_data.reload_if_changed()
+            print('Another process is refreshing the shared cache; showing the data it last published.')
 
     series_ids = ['STOCK.VALUE', *STOCK.keys()]
 
     _print_summary(stock_data, series_ids)
+    if args.memory:
+        _print_memory_report(stock_data)
+    timer.report()
+    if profiler is not None:
+        profiler.stop()
 
 
 if __name__ == '__main__':
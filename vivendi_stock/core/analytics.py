@@ -0,0 +1,242 @@
+"""Incrementally maintained technical analytics for every published series.
+
+Per series: trailing returns, simple moving averages, annualized realized
+volatility of daily log returns, current and maximum drawdown, plus a rolling
+correlation matrix of daily log returns across series.
+
+``AnalyticsEngine`` keeps running window sums, the drawdown peak and a short tail
+of cleaned prices and returns (the longest window plus one row). When a refresh only
+appends dates, ``update`` folds in the new rows and subtracts the rows leaving each
+window, so its cost depends on the number of new rows, not on history length. Any
+change at or before the last processed date (a backfill, a corrected close, a
+reload from another process) rebuilds the state from the full frame with the same
+vectorized code.
+
+Zero cells are placeholders for missing values in the cache, so zeros and NaNs are
+treated as missing and carry the previous valid price forward.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+import numpy
+import pandas
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass(frozen=True)
+class SeriesAnalytics:
+    """Indicators for one series as of its last processed date. Percentages are in percent;
+    NaN marks an indicator without enough history.
+    """
+
+    series_id: str
+    as_of: pandas.Timestamp | None
+    latest: float
+    returns: Mapping[str, float]
+    moving_averages: Mapping[int, float]
+    volatility: float
+    drawdown: float
+    max_drawdown: float
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    """Indicators for every series at one data version."""
+
+    series: Mapping[str, SeriesAnalytics] = field(default_factory=dict)
+    correlation: pandas.DataFrame = field(default_factory=pandas.DataFrame)
+    # Rows folded in by the update that produced this snapshot, and whether it rebuilt from scratch.
+    rows_processed: int = 0
+    rebuilt: bool = False
+
+
+def _valid(block: numpy.ndarray) -> numpy.ndarray:
+    return (~numpy.isnan(block)).astype(float)
+
+
+def _zeroed(block: numpy.ndarray) -> numpy.ndarray:
+    return numpy.nan_to_num(block, nan=0.0)
+
+
+class AnalyticsEngine:
+    """Running indicator state over the columns of a sorted, append-mostly frame. Not thread-safe;
+    VivendiStock updates it while publishing under its refresh lock.
+    """
+
+    def __init__(
+        self,
+        return_windows: Mapping[str, int],
+        moving_average_windows: tuple[int, ...],
+        volatility_window: int,
+        correlation_window: int
+    ) -> None:
+        self.return_windows = dict(return_windows)
+        self.moving_average_windows = tuple(moving_average_windows)
+        self.volatility_window = volatility_window
+        self.correlation_window = correlation_window
+        # Rows of cleaned prices and returns kept to know what leaves each window.
+        self._tail_rows = max(
+            [*self.return_windows.values(), *self.moving_average_windows, volatility_window, correlation_window]
+        ) + 1
+        self._reset(())
+
+    def _reset(self, columns: tuple[str, ...]) -> None:
+        count = len(columns)
+        self.columns = columns
+        self.rows = 0
+        self.last_date: pandas.Timestamp | None = None
+        self._prices = numpy.empty((0, count))
+        self._returns = numpy.empty((0, count))
+        self._last_valid = numpy.full(count, numpy.nan)
+        self._peak = numpy.full(count, numpy.nan)
+        self._max_drawdown = numpy.zeros(count)
+        # Window sums: moving averages (sum, count), volatility (sum, sum of squares, count) and the
+        # pairwise correlation terms (joint count, sum x, sum x^2, sum xy) over jointly valid returns.
+        self._ma_sums = {window: numpy.zeros((2, count)) for window in self.moving_average_windows}
+        self._volatility_sums = numpy.zeros((3, count))
+        self._correlation_sums = numpy.zeros((4, count, count))
+
+    def update(self, data: pandas.DataFrame, changed_from: pandas.Timestamp | None = None) -> AnalyticsSnapshot:
+        """Bring the state up to date with data and return the indicators.
+        changed_from is the earliest date whose values changed since the previous update; None
+        means unknown and forces a rebuild.
+        """
+        columns = tuple(str(column) for column in data.columns)
+        resumable = (
+            changed_from is not None
+            and self.last_date is not None
+            and sorted(columns) == sorted(self.columns)
+            and len(data.index) >= self.rows
+            and data.index[self.rows - 1] == self.last_date
+            and changed_from > self.last_date
+        )
+        rebuilt = not resumable
+        if rebuilt:
+            self._reset(columns)
+        # Merges may reorder columns; the state keeps the order it was built with.
+        new_rows = data.iloc[self.rows:].set_axis(list(columns), axis=1)[list(self.columns)]
+        if len(new_rows.index):
+            self._append(new_rows.to_numpy(dtype=numpy.float64))
+            self.rows = len(data.index)
+            self.last_date = data.index[-1]
+        return self.snapshot(processed=len(new_rows.index), rebuilt=rebuilt)
+
+    def _append(self, raw: numpy.ndarray) -> None:
+        # Missing cells (zero placeholders or NaN) carry the previous valid price forward.
+        raw = numpy.where(raw == 0, numpy.nan, raw)
+        prices = pandas.DataFrame(numpy.vstack([self._last_valid, raw])).ffill().to_numpy()[1:]
+        self._last_valid = prices[-1]
+
+        previous = self._prices[-1:] if len(self._prices) else numpy.full((1, len(self.columns)), numpy.nan)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            returns = numpy.log(prices / numpy.vstack([previous, prices[:-1]]))
+
+        peaks = numpy.fmax.accumulate(numpy.vstack([self._peak, prices]), axis=0)[1:]
+        self._peak = peaks[-1]
+        with numpy.errstate(invalid='ignore'):
+            drawdowns = prices / peaks - 1
+        self._max_drawdown = numpy.fmin(self._max_drawdown, numpy.nanmin(drawdowns, axis=0, initial=0.0))
+
+        price_tail = numpy.vstack([self._prices, prices])
+        return_tail = numpy.vstack([self._returns, returns])
+        kept = len(self._prices)
+        for window, sums in self._ma_sums.items():
+            self._slide(sums, price_tail, kept, window, self._average_terms)
+        self._slide(self._volatility_sums, return_tail, kept, self.volatility_window, self._volatility_terms)
+        self._slide(self._correlation_sums, return_tail, kept, self.correlation_window, self._correlation_terms)
+        self._prices = price_tail[-self._tail_rows:]
+        self._returns = return_tail[-self._tail_rows:]
+
+    @staticmethod
+    def _slide(
+        sums: numpy.ndarray,
+        tail: numpy.ndarray,
+        kept: int,
+        window: int,
+        terms: Callable[[numpy.ndarray], numpy.ndarray]
+    ) -> None:
+        """Add the terms of rows appended after position kept and subtract those leaving the window."""
+        leaving_from, leaving_to = max(0, kept - window), max(0, len(tail) - window)
+        sums += terms(tail[kept:])
+        if leaving_to > leaving_from:
+            sums -= terms(tail[leaving_from:leaving_to])
+
+    @staticmethod
+    def _average_terms(block: numpy.ndarray) -> numpy.ndarray:
+        return numpy.stack([_zeroed(block).sum(axis=0), _valid(block).sum(axis=0)])
+
+    @staticmethod
+    def _volatility_terms(block: numpy.ndarray) -> numpy.ndarray:
+        values = _zeroed(block)
+        return numpy.stack([values.sum(axis=0), (values ** 2).sum(axis=0), _valid(block).sum(axis=0)])
+
+    @staticmethod
+    def _correlation_terms(block: numpy.ndarray) -> numpy.ndarray:
+        valid, values = _valid(block), _zeroed(block)
+        return numpy.stack([valid.T @ valid, values.T @ valid, (values ** 2).T @ valid, values.T @ values])
+
+    def snapshot(self, processed: int = 0, rebuilt: bool = False) -> AnalyticsSnapshot:
+        """Return the indicators for the current state."""
+        if not self.rows:
+            return AnalyticsSnapshot(rows_processed=processed, rebuilt=rebuilt)
+
+        latest = self._prices[-1]
+        trailing = {}
+        for label, window in self.return_windows.items():
+            if len(self._prices) > window:
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    trailing[label] = (latest / self._prices[-1 - window] - 1) * 100
+            else:
+                trailing[label] = numpy.full(len(self.columns), numpy.nan)
+
+        averages = {}
+        for window, (total, count) in self._ma_sums.items():
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                averages[window] = numpy.where(count >= window - 0.5, total / count, numpy.nan)
+
+        total, squares, count = self._volatility_sums
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            variance = (squares - total ** 2 / count) / (count - 1)
+        volatility = numpy.where(
+            count >= 2, numpy.sqrt(numpy.clip(variance, 0.0, None) * TRADING_DAYS_PER_YEAR) * 100, numpy.nan
+        )
+        with numpy.errstate(invalid='ignore'):
+            drawdown = (latest / self._peak - 1) * 100
+
+        series = {}
+        for position, series_id in enumerate(self.columns):
+            series[series_id] = SeriesAnalytics(
+                series_id=series_id,
+                as_of=self.last_date,
+                latest=round(float(latest[position]), 3) if not math.isnan(latest[position]) else math.nan,
+                returns=MappingProxyType({
+                    label: round(float(values[position]), 2) for label, values in trailing.items()
+                }),
+                moving_averages=MappingProxyType({
+                    window: round(float(values[position]), 3) for window, values in averages.items()
+                }),
+                volatility=round(float(volatility[position]), 2),
+                drawdown=round(float(drawdown[position]), 2),
+                max_drawdown=round(float(self._max_drawdown[position]) * 100, 2)
+            )
+        return AnalyticsSnapshot(
+            series=MappingProxyType(series),
+            correlation=self._correlation(),
+            rows_processed=processed,
+            rebuilt=rebuilt
+        )
+
+    def _correlation(self) -> pandas.DataFrame:
+        count, total, squares, products = self._correlation_sums
+        # total[i, j] sums series i over the rows where j is also valid, so its transpose gives series j.
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            covariance = count * products - total * total.T
+            spread = (count * squares - total ** 2) * (count * squares.T - total.T ** 2)
+            correlation = numpy.where((count >= 2) & (spread > 0), covariance / numpy.sqrt(spread), numpy.nan)
+        correlation = numpy.clip(correlation, -1.0, 1.0).round(4)
+        return pandas.DataFrame(correlation, index=list(self.columns), columns=list(self.columns))
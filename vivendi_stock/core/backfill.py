@@ -0,0 +1,271 @@
+"""Resumable full-history backfill of every configured symbol and currency pair.
+
+Runs in two checkpointed phases, so an interrupted or quota-limited run resumes
+where it stopped:
+
+1. fetch: each series' ``outputsize=full`` history is downloaded through the
+   regular rate limiter and daily quota and staged to ``data/backfill/<series>.bin``.
+   Staged series are never fetched again. The run pauses when the quota is used up.
+2. ingest: once every series is staged, the histories are merged into the
+   computed cache oldest-first in BACKFILL_CHUNK_DAYS date chunks, with the
+   same closed-session and completeness rules as a refresh. Each chunk is
+   journaled and checkpointed before the next one starts.
+
+Progress lives in ``data/backfill_state.json``::
+
+    {"series": {"VIV.PA": {"status": "staged", "rows": 6500}}, "ingested_through": "2012-01-01"}
+
+Only the holder of the refresh lock writes the cache. When another process holds
+it, ``request_backfill`` leaves ``data/backfill_request.json`` for that process's
+refresh scheduler, which runs the backfill through ``run_requested_backfill``.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pandas
+
+from .cache_store import BinaryCacheStore
+from .fetch_planner import FetchTask
+from .ingest import align_series
+from .vivendi_data import CURRENCIES, STOCK, VivendiStock
+from .web_api import DATA_STORAGE, download_stock_data, remaining_api_calls
+from ..utils.config import config
+from ..utils.files import atomic_write
+from ..utils.logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+class BackfillState:
+    """Persisted backfill progress: per-series staging status and the last ingested date."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: dict = {'series': {}, 'ingested_through': None}
+        if os.path.isfile(path):
+            try:
+                with open(path, encoding='utf8') as f:
+                    self._state.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning('Unable to read backfill state from %s: %s', path, e)
+
+    def status(self, series_id: str) -> str | None:
+        with self._lock:
+            return self._state['series'].get(series_id, {}).get('status')
+
+    def mark(self, series_id: str, status: str, rows: int = 0) -> None:
+        with self._lock:
+            self._state['series'][series_id] = {
+                'status': status,
+                'rows': rows,
+                'updated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+            }
+        self.save()
+
+    @property
+    def ingested_through(self) -> datetime.date | None:
+        with self._lock:
+            value = self._state.get('ingested_through')
+        return datetime.date.fromisoformat(value) if value else None
+
+    @ingested_through.setter
+    def ingested_through(self, day: datetime.date | None) -> None:
+        with self._lock:
+            self._state['ingested_through'] = day.isoformat() if day else None
+        self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps(self._state, sort_keys=True, indent=4)
+        try:
+            atomic_write(self.path, payload.encode('utf8'))
+        except OSError as e:
+            logger.error('Failed to save backfill state to %s: %s', self.path, e)
+
+
+@dataclass
+class BackfillReport:
+    """Outcome of one backfill run."""
+
+    fetched: list[str] = field(default_factory=list)
+    already_staged: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    pending: list[str] = field(default_factory=list)
+    chunks: int = 0
+    complete: bool = False
+    message: str = ''
+
+
+def _request_path() -> str:
+    return os.path.join(DATA_STORAGE, config.BACKFILL_REQUEST_FILE)
+
+
+def request_backfill(restart: bool = False, chunk_days: int | None = None) -> str:
+    """Ask the process holding the refresh lock to run the backfill. Returns the request file path."""
+    path = _request_path()
+    payload = {
+        'restart': restart,
+        'chunk_days': chunk_days,
+        'requested_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+    }
+    atomic_write(path, json.dumps(payload, indent=4).encode('utf8'))
+    return path
+
+
+def run_requested_backfill(stock_data: VivendiStock) -> BackfillReport | None:
+    """Run a backfill requested through request_backfill, if any. Returns None without a request.
+
+    Call only while holding the refresh lock. A run paused on the API quota keeps the
+    request (without restart), so the next call resumes it once the quota resets.
+    """
+    path = _request_path()
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, encoding='utf8') as f:
+            request = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning('Discarding unreadable backfill request %s: %s', path, e)
+        os.remove(path)
+        return None
+    if request.get('restart') is False and remaining_api_calls() == 0 and _staging_pending():
+        return None
+
+    logger.info('Running requested backfill (requested at %s)', request.get('requested_at'))
+    try:
+        report = run_backfill(stock_data, restart=bool(request.get('restart')), chunk_days=request.get('chunk_days'))
+    except Exception as e:  # a failed backfill must not take the scheduler down
+        logger.exception('Requested backfill failed: %s', e)
+        os.remove(path)
+        return None
+    logger.info('Requested backfill: %s', report.message)
+    if report.pending:
+        atomic_write(path, json.dumps({**request, 'restart': False}, indent=4).encode('utf8'))
+    else:
+        os.remove(path)
+    return report
+
+
+def _staging_pending() -> bool:
+    """Return True when some series still has to be fetched (not staged yet)."""
+    state = BackfillState(os.path.join(DATA_STORAGE, config.BACKFILL_STATE_FILE))
+    return any(
+        state.status(series_id) != 'staged' or not os.path.isfile(_staging_path(series_id))
+        for series_id in (*CURRENCIES, *STOCK)
+    )
+
+
+def _staging_path(series_id: str) -> str:
+    return os.path.join(DATA_STORAGE, config.BACKFILL_DIR, f'{series_id}.bin')
+
+
+def _fetch_series(series_id: str, is_currency: bool) -> pandas.Series:
+    """Download one full history; the response cache serves a recent full fetch without a request."""
+    stock_symbols, currency_pairs = ([], [series_id]) if is_currency else ([series_id], [])
+    data = download_stock_data(stock_symbols, currency_pairs, outputsize={series_id: 'full'}, join='outer')
+    if series_id not in data.columns:
+        return pandas.Series(dtype=float)
+    return data[series_id].dropna()
+
+
+def run_backfill(
+    stock_data: VivendiStock,
+    restart: bool = False,
+    chunk_days: int | None = None,
+    progress: Callable[[str], None] = logger.info
+) -> BackfillReport:
+    """Stage full histories for every series, then ingest them in date chunks.
+    restart discards earlier progress and staged histories.
+    """
+    chunk_days = chunk_days or config.BACKFILL_CHUNK_DAYS
+    state_path = os.path.join(DATA_STORAGE, config.BACKFILL_STATE_FILE)
+    if restart and os.path.isfile(state_path):
+        os.remove(state_path)
+    state = BackfillState(state_path)
+    store = BinaryCacheStore()
+    report = BackfillReport()
+
+    # Pairs first: fully staged exchange rates leave nothing for the per-day FX lookup to fill.
+    series = [(pair, True) for pair in CURRENCIES] + [(symbol, False) for symbol in STOCK]
+    for position, (series_id, is_currency) in enumerate(series):
+        if state.status(series_id) == 'staged' and os.path.isfile(_staging_path(series_id)):
+            report.already_staged.append(series_id)
+            continue
+        if remaining_api_calls() == 0:
+            report.pending = [pending for pending, _ in series[position:]]
+            break
+        history = _fetch_series(series_id, is_currency)
+        if history.empty and remaining_api_calls() == 0:
+            # The quota ran out during this fetch (the download logs and swallows the
+            # QuotaExhaustedError), so the series is still pending, not failed.
+            report.pending = [pending for pending, _ in series[position:]]
+            break
+        if history.empty:
+            state.mark(series_id, 'failed')
+            report.failed.append(series_id)
+            progress(f'{series_id}: no history returned')
+            continue
+        store.save(history.to_frame(series_id), _staging_path(series_id))
+        state.mark(series_id, 'staged', len(history))
+        report.fetched.append(series_id)
+        progress(f'{series_id}: staged {len(history)} sessions '
+                 f'({history.index.min().date()} to {history.index.max().date()})')
+
+    if report.pending:
+        report.message = (f'Daily API quota used up with {len(report.pending)} series left; '
+                          'run the backfill again to resume.')
+        return report
+    if report.failed:
+        report.message = f'No history for {", ".join(report.failed)}; run the backfill again to retry.'
+        return report
+
+    report.chunks = _ingest(stock_data, state, store, [series_id for series_id, _ in series], chunk_days, progress)
+    report.complete = True
+    report.message = f'Backfill complete: ingested {report.chunks} chunk(s) of up to {chunk_days} days.'
+    for series_id, _ in series:
+        try:
+            os.remove(_staging_path(series_id))
+        except OSError:
+            pass
+    try:
+        os.rmdir(os.path.join(DATA_STORAGE, config.BACKFILL_DIR))
+    except OSError:
+        pass
+    os.remove(state_path)
+    return report
+
+
+def _ingest(
+    stock_data: VivendiStock,
+    state: BackfillState,
+    store: BinaryCacheStore,
+    series_ids: list[str],
+    chunk_days: int,
+    progress: Callable[[str], None]
+) -> int:
+    histories = {series_id: store.load(_staging_path(series_id))[series_id] for series_id in series_ids}
+    staged = align_series(histories, join='outer').sort_index()
+    resume = state.ingested_through
+    if resume is not None:
+        staged = staged.loc[staged.index > pandas.Timestamp(resume)]
+    tasks = [FetchTask(series_id, series_id in CURRENCIES, 'full', 'backfill') for series_id in series_ids]
+
+    chunks = 0
+    while not staged.empty:
+        chunk_end = staged.index[0] + pandas.Timedelta(days=chunk_days)
+        chunk = staged.loc[staged.index < chunk_end]
+        staged = staged.loc[staged.index >= chunk_end]
+        # Checkpoints are recorded once, with the last chunk, so the planner sees the full backfill.
+        stock_data.ingest(chunk, tasks if staged.empty else [], 'Ingested backfilled history.')
+        state.ingested_through = chunk.index.max().date()
+        chunks += 1
+        progress(f'ingested {chunk.index.min().date()} to {chunk.index.max().date()} ({len(chunk.index)} dates)')
+    return chunks
@@ -0,0 +1,264 @@
+"""Pluggable on-disk stores for the computed portfolio cache."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import struct
+from abc import ABC, abstractmethod
+
+import numpy
+import pandas
+
+from ..utils.files import atomic_write
+from ..utils.logger import setup_logger
+
+
+CACHE_SCHEMA_VERSION = 1
+BINARY_MAGIC = b'VSCACHE\x00'
+BINARY_ALIGNMENT = 64
+logger = setup_logger(__name__)
+
+
+def normalize_frame(data: pandas.DataFrame) -> pandas.DataFrame:
+    """Return data with a day-normalized, sorted DatetimeIndex."""
+    normalized_index = pandas.to_datetime(data.index).normalize()
+    if not normalized_index.equals(data.index):
+        data = data.set_axis(normalized_index, axis=0)
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+    return data
+
+
+class CacheStore(ABC):
+    """Serializer for the portfolio DataFrame.
+
+    Loaded frames carry the store header in ``DataFrame.attrs['cache_header']``
+    so callers can skip normalization work the store already guarantees.
+    """
+
+    # Whether load(mmap=True) maps values from the file instead of reading them.
+    supports_mmap = False
+
+    @abstractmethod
+    def load(self, path: str, mmap: bool = False) -> pandas.DataFrame:
+        """Load the cached frame from path. Raises OSError/ValueError on failure.
+        Stores that support it map values straight from the file when mmap is True.
+        """
+
+    @abstractmethod
+    def save(self, data: pandas.DataFrame, path: str) -> None:
+        """Persist data to path. Raises OSError/ValueError on failure."""
+
+
+class JsonCacheStore(CacheStore):
+    """Legacy pretty-printed JSON layout (``{column: {iso_date: value}}``)."""
+
+    def load(self, path: str, mmap: bool = False) -> pandas.DataFrame:
+        with open(path, encoding='utf8') as f:
+            data_frame = pandas.read_json(f)
+        data_frame.index = pandas.to_datetime(data_frame.index).normalize()
+        return data_frame
+
+    def save(self, data: pandas.DataFrame, path: str) -> None:
+        payload = json.loads(data.to_json(date_format='iso'))
+        text = json.dumps(payload, sort_keys=True, indent=4, separators=(',', ' : '))
+        atomic_write(path, text.encode('utf8'))
+
+
+class BinaryCacheStore(CacheStore):
+    """Columnar binary layout.
+
+    File layout: magic, little-endian uint32 header length, JSON header, then
+    (64-byte aligned) an int64 nanosecond index followed by one contiguous
+    float64 block per column. The index is always written normalized and
+    sorted, which the header records so loaders can skip sanitizing it.
+
+    With ``mmap=True`` the value block is mapped copy-on-write instead of read, so
+    processes loading the same file share its pages through the OS page cache.
+    Files are only ever replaced by rename, so an existing mapping stays valid.
+    """
+
+    supports_mmap = True
+
+    def load(self, path: str, mmap: bool = False) -> pandas.DataFrame:
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+            rows = header['rows']
+            columns = header['columns']
+            f.seek(header['index_offset'])
+            index = numpy.fromfile(f, dtype='<i8', count=rows)
+            count = rows * len(columns)
+            if mmap and count:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < header['values_offset'] + count * numpy.dtype(header['dtype']).itemsize:
+                    raise ValueError(f'Truncated cache file {path}')
+                values = numpy.memmap(
+                    f, dtype=header['dtype'], mode='c', offset=header['values_offset'], shape=(count,)
+                )
+            else:
+                f.seek(header['values_offset'])
+                values = numpy.fromfile(f, dtype=header['dtype'], count=count)
+        if len(index) != rows or len(values) != count:
+            raise ValueError(f'Truncated cache file {path}')
+
+        # Column-major on disk, so the transpose hands pandas a single block without copying.
+        values = values.reshape(len(columns), rows)
+        data_frame = pandas.DataFrame(
+            values.T,
+            index=pandas.DatetimeIndex(index.view('datetime64[ns]')),
+            columns=pandas.Index(columns),
+            copy=False
+        )
+        data_frame.attrs['cache_header'] = header
+        return data_frame
+
+    def save(self, data: pandas.DataFrame, path: str) -> None:
+        data = normalize_frame(data)
+        columns = [str(column) for column in data.columns]
+        rows = len(data.index)
+        index = data.index.as_unit('ns').asi8.astype('<i8', copy=False)
+        values = numpy.ascontiguousarray(data.to_numpy(dtype='<f8').T)
+
+        header = {
+            'schema_version': CACHE_SCHEMA_VERSION,
+            'columns': columns,
+            'rows': rows,
+            'dtype': '<f8',
+            'normalized': True,
+            'sorted': True,
+        }
+        # Offsets depend on the header length, so size the header with placeholders first.
+        header['index_offset'] = header['values_offset'] = 0
+        prefix = len(BINARY_MAGIC) + 4 + len(json.dumps(header)) + 64
+        index_offset = self._align(prefix)
+        header['index_offset'] = index_offset
+        header['values_offset'] = self._align(index_offset + index.nbytes)
+        header_bytes = json.dumps(header).encode('utf8')
+
+        buffer = io.BytesIO()
+        buffer.write(BINARY_MAGIC)
+        buffer.write(struct.pack('<I', len(header_bytes)))
+        buffer.write(header_bytes)
+        buffer.write(b'\x00' * (index_offset - buffer.tell()))
+        buffer.write(index.tobytes())
+        buffer.write(b'\x00' * (header['values_offset'] - buffer.tell()))
+        buffer.write(values.tobytes())
+        atomic_write(path, buffer.getvalue())
+
+    @staticmethod
+    def _align(offset: int) -> int:
+        return -(-offset // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
+
+    @staticmethod
+    def _read_header(f: io.BufferedReader) -> dict:
+        magic = f.read(len(BINARY_MAGIC))
+        if magic != BINARY_MAGIC:
+            raise ValueError('Not a binary cache file')
+        (header_length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length).decode('utf8'))
+        if header.get('schema_version') != CACHE_SCHEMA_VERSION:
+            raise ValueError(f'Unsupported cache schema version: {header.get("schema_version")}')
+        return header
+
+
+def get_cache_store(file_name: str) -> CacheStore:
+    """Pick the store implementation from the cache file extension."""
+    if file_name.lower().endswith('.json'):
+        return JsonCacheStore()
+    return BinaryCacheStore()
+
+
+def migrate_legacy_cache(legacy_path: str, target_path: str) -> bool:
+    """Convert a legacy JSON cache into the store used for target_path.
+    Returns True when a migrated cache was written.
+    """
+    if os.path.isfile(target_path) or not os.path.isfile(legacy_path):
+        return False
+    if os.path.abspath(legacy_path) == os.path.abspath(target_path):
+        return False
+    try:
+        data_frame = JsonCacheStore().load(legacy_path)
+        get_cache_store(target_path).save(data_frame, target_path)
+    except (OSError, ValueError) as e:
+        logger.error('Failed to migrate legacy cache %s to %s: %s', legacy_path, target_path, e)
+        return False
+    logger.info('Migrated legacy cache %s to %s', legacy_path, target_path)
+    return True
+
+
+class CacheJournal:
+    """Append-only JSON-lines log of changed cache rows kept next to a base snapshot.
+
+    Each line holds one full row (``{"date": ..., "values": {...}}``); replaying
+    the journal over the base replaces matching rows and appends new ones.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    @property
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, rows: pandas.DataFrame) -> int:
+        """Append rows to the journal. Returns the number of bytes written."""
+        if rows.empty:
+            return 0
+        rows = normalize_frame(rows)
+        lines = []
+        for day, values in zip(rows.index, rows.to_dict(orient='records')):
+            record = {'date': day.strftime('%Y-%m-%d'), 'values': values}
+            lines.append(json.dumps(record, allow_nan=True))
+        payload = ('\n'.join(lines) + '\n').encode('utf8')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(payload)
+
+    def read(self) -> pandas.DataFrame:
+        """Return journal rows as a frame; later entries for a date win."""
+        if not os.path.isfile(self.path):
+            return pandas.DataFrame()
+        records: dict[str, dict] = {}
+        with open(self.path, encoding='utf8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    records[record['date']] = record['values']
+                except (KeyError, TypeError, ValueError) as e:
+                    # A torn final line from an interrupted append is expected; skip it.
+                    logger.warning('Skipping invalid journal line %d in %s: %s', line_number, self.path, e)
+        if not records:
+            return pandas.DataFrame()
+        data_frame = pandas.DataFrame.from_dict(records, orient='index')
+        data_frame.index = pandas.to_datetime(data_frame.index).normalize()
+        return data_frame.sort_index()
+
+    def replay(self, base: pandas.DataFrame) -> pandas.DataFrame:
+        """Apply journal rows on top of base and return the merged frame."""
+        journal = self.read()
+        if journal.empty:
+            return base
+        header = base.attrs.get('cache_header')
+        if base.empty:
+            merged = journal
+        else:
+            merged = pandas.concat([base.drop(index=journal.index, errors='ignore'), journal])
+        merged = normalize_frame(merged)
+        if header is not None:
+            merged.attrs['cache_header'] = {**header, 'rows': len(merged.index), 'columns': list(merged.columns)}
+        return merged
+
+    def truncate(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
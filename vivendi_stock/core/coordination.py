@@ -0,0 +1,113 @@
+"""Cross-process coordination for multi-worker deployments (one refresher, shared cache)."""
+from __future__ import annotations
+
+import os
+import threading
+from typing import IO
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from ..utils.files import atomic_write
+from ..utils.logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+CacheStamp = tuple[tuple[int, int, int], ...]
+
+
+class LeaderLock:
+    """Non-blocking exclusive lock on a file, held for the lifetime of the process.
+
+    The operating system releases the lock when the holder exits or crashes, so
+    another process can take over by calling ``try_acquire`` again.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: IO[bytes] | None = None
+        self._owner_pid = 0
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        # A forked child inherits the descriptor but not the leadership.
+        return self._file is not None and self._owner_pid == os.getpid()
+
+    def try_acquire(self) -> bool:
+        """Take the lock if no other process holds it. Returns True when this process holds it."""
+        with self._lock:
+            if self._file is not None:
+                if self._owner_pid == os.getpid():
+                    return True
+                self._file = None
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            f = open(self.path, 'a+b')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                f.close()
+                return False
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()).encode('ascii'))
+            f.flush()
+            self._file = f
+            self._owner_pid = os.getpid()
+            logger.info('Process %d acquired refresh leadership (%s)', os.getpid(), self.path)
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            if self._file is None or self._owner_pid != os.getpid():
+                return
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self._file.close()
+                self._file = None
+
+
+def cache_stamp(*paths: str) -> CacheStamp:
+    """Return a cheap change stamp (inode, mtime, size per file) for the given files.
+
+    Atomic replaces change the inode and journal appends change the size, so any
+    committed write shows up as a different stamp. Missing files stamp as zeros.
+    """
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((0, 0, 0))
+    return tuple(stamp)
+
+
+def read_version(path: str) -> int:
+    """Return the data version announced in path (0 when absent or unreadable)."""
+    try:
+        with open(path, encoding='ascii') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def write_version(path: str, version: int) -> None:
+    """Announce a new data version to other processes; written only after the data itself."""
+    try:
+        atomic_write(path, str(version).encode('ascii'))
+    except OSError as e:
+        logger.error('Failed to write data version to %s: %s', path, e)
@@ -0,0 +1,112 @@
+"""Largest-Triangle-Three-Buckets downsampling and multi-resolution series pyramids."""
+from __future__ import annotations
+
+import numpy
+import pandas
+
+
+def lttb_indices(x: numpy.ndarray, y: numpy.ndarray, threshold: int) -> numpy.ndarray:
+    """Return the positions of the points LTTB keeps out of (x, y).
+
+    The first and last points are always kept. The remaining points are split into
+    threshold - 2 equal buckets and, per bucket, the point forming the largest
+    triangle with the previously kept point and the next bucket's average is kept.
+    Bucket averages are computed for all buckets at once; only the (inherently
+    sequential) choice of point walks the buckets. NaN values are never selected
+    unless a bucket has nothing else.
+    """
+    count = len(x)
+    if threshold <= 0 or threshold >= count or count <= 2:
+        return numpy.arange(count)
+    if threshold < 3:
+        return numpy.array([0, count - 1])
+
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    buckets = threshold - 2
+    edges = numpy.linspace(1, count - 1, buckets + 1).astype(numpy.int64)
+    edges[-1] = count - 1
+
+    # Per-bucket averages (the "third point" of each triangle) via cumulative sums.
+    valid = ~numpy.isnan(y)
+    y_filled = numpy.where(valid, y, 0.0)
+    cum_x = numpy.concatenate(([0.0], numpy.cumsum(x)))
+    cum_y = numpy.concatenate(([0.0], numpy.cumsum(y_filled)))
+    cum_n = numpy.concatenate(([0], numpy.cumsum(valid)))
+    starts, ends = edges[:-1], edges[1:]
+    sizes = numpy.maximum(ends - starts, 1)
+    avg_x = (cum_x[ends] - cum_x[starts]) / sizes
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        avg_y = (cum_y[ends] - cum_y[starts]) / (cum_n[ends] - cum_n[starts])
+    # The bucket after the last one is the final point.
+    next_x = numpy.append(avg_x[1:], x[-1])
+    next_y = numpy.append(avg_y[1:], y[-1])
+
+    selected = numpy.empty(threshold, dtype=numpy.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(buckets):
+        start, end = starts[bucket], max(ends[bucket], starts[bucket] + 1)
+        ax, ay = x[previous], y[previous]
+        area = numpy.abs((ax - next_x[bucket]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[bucket] - ay))
+        if numpy.isnan(area).all():
+            choice = start
+        else:
+            choice = start + int(numpy.nanargmax(area))
+        selected[bucket + 1] = previous = choice
+    return selected
+
+
+def lttb(series: pandas.Series, threshold: int) -> pandas.Series:
+    """Downsample a date-indexed Series to at most threshold points."""
+    if threshold <= 0 or len(series) <= threshold:
+        return series
+    x = series.index.asi8.astype(float) if isinstance(series.index, pandas.DatetimeIndex) \
+        else numpy.arange(len(series), dtype=float)
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=float), threshold)]
+
+
+class SeriesPyramid:
+    """Precomputed LTTB levels of one series, finest first.
+
+    Level 0 is the full series; each further level halves the point count down to
+    the point budget. ``select`` returns the finest level that shows a date range
+    within the budget, so a zoomed-in range gets full detail while the whole
+    history is served at the coarsest level.
+    """
+
+    def __init__(self, series: pandas.Series, budget: int) -> None:
+        self.budget = budget
+        self.levels: list[pandas.Series] = [series]
+        if budget > 0:
+            size = len(series)
+            thresholds = []
+            while size > budget:
+                size = max(budget, size // 2)
+                thresholds.append(size)
+            x = series.index.asi8.astype(float) if isinstance(series.index, pandas.DatetimeIndex) \
+                else numpy.arange(len(series), dtype=float)
+            y = series.to_numpy(dtype=float)
+            for threshold in thresholds:
+                self.levels.append(series.iloc[lttb_indices(x, y, threshold)])
+
+    def select(
+        self,
+        start: pandas.Timestamp | str | None = None,
+        end: pandas.Timestamp | str | None = None
+    ) -> pandas.Series:
+        """Return the finest level whose points in [start, end] fit the budget, sliced to that range."""
+        for level in self.levels:
+            window = _window(level, start, end)
+            if self.budget <= 0 or len(window) <= self.budget:
+                return window
+        return _window(self.levels[-1], start, end)
+
+
+def _window(series: pandas.Series, start, end) -> pandas.Series:
+    if start is None and end is None:
+        return series
+    index = series.index
+    left = index.searchsorted(pandas.Timestamp(start), side='left') if start is not None else 0
+    right = index.searchsorted(pandas.Timestamp(end), side='right') if end is not None else len(index)
+    return series.iloc[left:right]
@@ -0,0 +1,192 @@
+"""Per-series fetch planning: which queries to send and with which output size."""
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy
+import pandas
+
+from .market_calendar import Exchange, exchange_for, is_trading_day, last_closed_session, sessions_between
+from ..utils.config import config
+from ..utils.files import atomic_write
+from ..utils.logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+@dataclass(frozen=True)
+class FetchTask:
+    """One planned Alpha Vantage query."""
+
+    series_id: str
+    is_currency: bool
+    outputsize: str
+    reason: str
+
+
+class FetchState:
+    """Persisted per-series fetch bookkeeping (``{series_id: {'backfilled_through': date}}``).
+
+    ``backfilled_through`` records the checkpoint of the last full-history fetch; gaps
+    before it are treated as permanent (the provider has no bar for that day).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: dict[str, dict[str, str]] = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, encoding='utf8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning('Unable to read fetch state from %s: %s', path, e)
+
+    def backfilled_through(self, series_id: str) -> datetime.date | None:
+        with self._lock:
+            value = self._state.get(series_id, {}).get('backfilled_through')
+        return datetime.date.fromisoformat(value) if value else None
+
+    def record(self, task: FetchTask, checkpoint: datetime.date | None) -> None:
+        with self._lock:
+            entry = self._state.setdefault(task.series_id, {})
+            if checkpoint is not None:
+                entry['checkpoint'] = checkpoint.isoformat()
+                if task.outputsize == 'full':
+                    entry['backfilled_through'] = checkpoint.isoformat()
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps(self._state, sort_keys=True, indent=4)
+        try:
+            atomic_write(self.path, payload.encode('utf8'))
+        except OSError as e:
+            logger.error('Failed to save fetch state to %s: %s', self.path, e)
+
+
+def series_checkpoint(data: pandas.DataFrame, series_id: str) -> datetime.date | None:
+    """Return the last date with a usable (non-zero) value for series_id."""
+    if data.empty or series_id not in data.columns:
+        return None
+    values = data[series_id]
+    valid = values.index[(values.notna() & values.ne(0)).to_numpy()]
+    return valid.max().date() if len(valid) else None
+
+
+def plan_fetches(
+    data: pandas.DataFrame,
+    symbols: Iterable[str],
+    currency_pairs: Iterable[str],
+    state: FetchState,
+    now: datetime.datetime | None = None,
+    force: bool = False
+) -> list[FetchTask]:
+    """Return the minimal list of queries needed to bring every series up to its last closed session.
+
+    Series whose exchange has not completed a session since their checkpoint are
+    skipped (unless forced). ``full`` output is requested only when the series has
+    never been fetched, its checkpoint is older than the compact window, or it has
+    gaps (zero/missing values on its trading days) older than the compact window
+    that no earlier full fetch already covered.
+    """
+    pairs = tuple(currency_pairs)
+    tasks = []
+    for series_id in (*symbols, *pairs):
+        exchange = exchange_for(series_id, pairs)
+        last_session = last_closed_session(exchange, now)
+        window = sessions_between(
+            exchange,
+            last_session - datetime.timedelta(days=config.COMPACT_WINDOW_SESSIONS * 2),
+            last_session
+        )
+        window_start = window[-config.COMPACT_WINDOW_SESSIONS] if len(window) >= config.COMPACT_WINDOW_SESSIONS \
+            else window[0]
+        checkpoint = series_checkpoint(data, series_id)
+        is_currency = series_id in pairs
+
+        if checkpoint is None:
+            tasks.append(FetchTask(series_id, is_currency, 'full', 'no history'))
+            continue
+        if checkpoint < window_start:
+            tasks.append(FetchTask(series_id, is_currency, 'full', f'checkpoint {checkpoint} before compact window'))
+            continue
+
+        gaps = _missing_cells(data, series_id, exchange, end=window_start - datetime.timedelta(days=1))
+        backfilled = state.backfilled_through(series_id)
+        if backfilled is not None:
+            gaps = [day for day in gaps if day > backfilled]
+        if gaps:
+            tasks.append(FetchTask(series_id, is_currency, 'full', f'{len(gaps)} gap(s) since {gaps[0]}'))
+            continue
+
+        if checkpoint < last_session or force:
+            tasks.append(FetchTask(series_id, is_currency, 'compact', f'checkpoint {checkpoint}'))
+        else:
+            logger.debug('Skipping %s: no %s session closed since %s', series_id, exchange.code, checkpoint)
+    return tasks
+
+
+def _missing_cells(
+    data: pandas.DataFrame,
+    series_id: str,
+    exchange: Exchange,
+    end: datetime.date
+) -> list[datetime.date]:
+    """Return trading days up to end where the series has a row but no usable value."""
+    if data.empty or series_id not in data.columns:
+        return []
+    values = data.loc[data.index <= pandas.Timestamp(end), series_id]
+    missing = values.index[(values.isna() | values.eq(0)).to_numpy()]
+    return [day.date() for day in missing if is_trading_day(exchange, day.date())]
+
+
+def fill_closed_sessions(
+    current: pandas.DataFrame,
+    fresh: pandas.DataFrame,
+    series_ids: Iterable[str],
+    currency_pairs: Iterable[str]
+) -> pandas.DataFrame:
+    """Merge freshly fetched (outer-joined) series with current data into complete rows.
+
+    A series has no bar on days its exchange was closed, so those cells carry the
+    previous close forward. New dates that are still incomplete afterwards (a
+    trading day some provider did not report) are dropped, matching the rule that
+    a date is only kept when every series has a value. Zero cells in current data
+    count as missing and may be filled by fresh values.
+    """
+    if fresh.empty:
+        return fresh
+    pairs = tuple(currency_pairs)
+    columns = [series_id for series_id in series_ids if series_id in fresh.columns or series_id in current.columns]
+    # A month of earlier history is enough to find the close to carry into the fresh range.
+    if not current.empty:
+        current = current.loc[current.index >= fresh.index.min() - pandas.Timedelta(days=31)]
+    base = current.reindex(columns=columns)
+    base = base.mask(base.eq(0))
+    merged = base.combine_first(fresh.reindex(columns=columns)).sort_index()
+
+    days = merged.index.date
+    closed_by_exchange: dict[str, numpy.ndarray] = {}
+    for column in columns:
+        exchange = exchange_for(column, pairs)
+        if exchange.code not in closed_by_exchange:
+            closed_by_exchange[exchange.code] = numpy.array(
+                [not is_trading_day(exchange, day) for day in days], dtype=bool
+            )
+        closed = closed_by_exchange[exchange.code]
+        if closed.any():
+            carried = merged[column].ffill()
+            merged.loc[closed, column] = carried[closed]
+
+    new_dates = merged.index.difference(current.index)
+    incomplete = merged.loc[new_dates].isna().any(axis=1)
+    if incomplete.any():
+        logger.info('Dropping %d incomplete new date(s)', int(incomplete.sum()))
+        merged = merged.drop(index=incomplete.index[incomplete.to_numpy()])
+    return merged.loc[merged.index.isin(fresh.index)]
@@ -0,0 +1,137 @@
+"""Disk-backed historical exchange-rate store with batched backfill."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Iterable
+
+import numpy
+import pandas
+
+from .web_api import DATA_STORAGE, download_exchange_rates_batch
+from ..utils.config import config
+from ..utils.files import atomic_write
+from ..utils.logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+class FxRateStore:
+    """Exchange rates keyed by (pair, date), persisted as ``{pair: {date: rate}}`` JSON.
+
+    Only successfully fetched rates are stored, so each (pair, date) is downloaded
+    at most once; failed lookups are retried on the next backfill.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._rates: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf8') as f:
+                self._rates = {pair: dict(days) for pair, days in json.load(f).items()}
+        except (OSError, AttributeError, TypeError, ValueError) as e:
+            logger.error('Failed to load exchange-rate store from %s: %s', self.path, e)
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps(self._rates, sort_keys=True, separators=(',', ':'))
+        try:
+            atomic_write(self.path, payload.encode('utf8'))
+        except OSError as e:
+            logger.error('Failed to save exchange-rate store to %s: %s', self.path, e)
+
+    def get(self, pair: str, day: str) -> float | None:
+        with self._lock:
+            return self._rates.get(pair, {}).get(day)
+
+    def put(self, pair: str, day: str, rate: float) -> None:
+        with self._lock:
+            self._rates.setdefault(pair, {})[day] = rate
+
+    def pending_queries(self, cells: Iterable[tuple[str, str]]) -> list[tuple[str, str, tuple[str, ...]]]:
+        """Group (pair, date) cells without a stored rate into one (base, date, targets) query per file."""
+        grouped: dict[tuple[str, str], set[str]] = {}
+        with self._lock:
+            for pair, day in cells:
+                if day in self._rates.get(pair, {}):
+                    continue
+                base, target = pair.split('.')
+                grouped.setdefault((base, day), set()).add(target)
+        return [(base, day, tuple(sorted(targets))) for (base, day), targets in sorted(grouped.items())]
+
+    def backfill(self, cells: Iterable[tuple[str, str]]) -> int:
+        """Download every missing cell concurrently and persist the results. Returns the number of new rates."""
+        queries = self.pending_queries(cells)
+        if not queries:
+            return 0
+        logger.info('Backfilling exchange rates for %d currency file(s)', len(queries))
+        added = 0
+        for (base, day), rates in download_exchange_rates_batch(queries).items():
+            for target, rate in rates.items():
+                self.put(f'{base}.{target}'.upper(), day, rate)
+                added += 1
+        if added:
+            self.save()
+        return added
+
+
+_NO_CELLS = pandas.MultiIndex.from_tuples([], names=['date', 'pair'])
+
+
+def missing_rate_cells(data: pandas.DataFrame, currencies: Iterable[str]) -> pandas.MultiIndex:
+    """Return (date, pair) positions whose rate is zero or missing."""
+    columns = [currency for currency in currencies if currency in data.columns]
+    if not columns or data.empty:
+        return _NO_CELLS
+    rates = data[columns]
+    values = rates.to_numpy(dtype=float)
+    if not ((values == 0) | numpy.isnan(values)).any():
+        return _NO_CELLS
+    missing = (rates.eq(0) | rates.isna()).stack()
+    cells = missing.index[missing.to_numpy()]
+    return cells.set_names(['date', 'pair'])
+
+
+def fill_missing_rates(data: pandas.DataFrame, currencies: Iterable[str], store: FxRateStore) -> pandas.DataFrame:
+    """Fill zero/missing exchange-rate cells from the store, backfilling unknown ones first."""
+    cells = missing_rate_cells(data, currencies)
+    if cells.empty:
+        return data
+
+    keys = [(pair, day.strftime('%Y-%m-%d')) for day, pair in cells]
+    store.backfill(keys)
+    rates = [store.get(pair, day) for pair, day in keys]
+    found = pandas.Series(rates, index=cells, dtype=float).dropna()
+    if found.empty:
+        return data
+
+    patch = found.unstack('pair')
+    data = data.copy()
+    for pair in patch.columns:
+        column = patch[pair].dropna()
+        data.loc[column.index, pair] = column.to_numpy()
+    unresolved = len(keys) - len(found)
+    if unresolved:
+        logger.warning('%d exchange-rate cell(s) could not be resolved', unresolved)
+    return data
+
+
+_store: FxRateStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_fx_store() -> FxRateStore:
+    """Return the process-wide exchange-rate store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FxRateStore(os.path.join(DATA_STORAGE, config.FX_STORE_FILE))
+        return _store
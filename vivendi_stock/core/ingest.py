@@ -0,0 +1,46 @@
+"""Columnar ingest of Alpha Vantage time-series responses."""
+from __future__ import annotations
+
+import numpy
+import pandas
+
+
+def parse_close_series(data: dict, series_key: str, name: str | None = None) -> pandas.Series:
+    """Convert a ``{date: {field: value}}`` time series into a float Series of closing prices.
+
+    The close field is resolved once from the first day, then dates and prices are
+    converted to NumPy arrays in a single pass. Returns an empty Series when the
+    payload has no usable time series.
+    """
+    try:
+        time_series = data[series_key]
+        first_day = next(iter(time_series.values()))
+    except (KeyError, TypeError, AttributeError, StopIteration):
+        return pandas.Series(dtype=float, name=name)
+
+    close_key = next((key for key in first_day if 'close' in key.lower()), None)
+    if close_key is None:
+        return pandas.Series(dtype=float, name=name)
+
+    count = len(time_series)
+    try:
+        dates = numpy.fromiter(time_series.keys(), dtype='datetime64[D]', count=count)
+        prices = numpy.fromiter(
+            (day.get(close_key, 0.0) for day in time_series.values()), dtype=float, count=count
+        )
+    except (TypeError, ValueError, AttributeError):
+        return pandas.Series(dtype=float, name=name)
+
+    # Alpha Vantage lists newest first; sort once on the typed array instead of re-sorting the frame.
+    order = numpy.argsort(dates, kind='stable')
+    index = pandas.DatetimeIndex(dates[order].astype('datetime64[ns]'))
+    return pandas.Series(prices[order], index=index, name=name)
+
+
+def align_series(series: dict[str, pandas.Series], join: str = 'inner') -> pandas.DataFrame:
+    """Join non-empty series on their date index; empty series become all-NaN columns."""
+    valid = [values.rename(name) for name, values in series.items() if not values.empty]
+    if not valid:
+        return pandas.DataFrame()
+    data_frame = pandas.concat(valid, axis=1, join=join, copy=False)
+    return data_frame.reindex(columns=list(series))
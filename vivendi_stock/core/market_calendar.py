@@ -0,0 +1,132 @@
+"""Trading calendars for the exchanges holding portfolio symbols."""
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+
+@dataclass(frozen=True)
+class Exchange:
+    """Exchange trading hours and holiday rule set."""
+
+    code: str
+    timezone: str
+    close: datetime.time
+    holidays: str
+
+    def close_at(self, day: datetime.date) -> datetime.datetime:
+        """Return the session close for day as an aware datetime."""
+        return datetime.datetime.combine(day, self.close, tzinfo=ZoneInfo(self.timezone))
+
+
+EXCHANGES: dict[str, Exchange] = {
+    'XPAR': Exchange('XPAR', 'Europe/Paris', datetime.time(17, 30), 'euronext'),
+    'XAMS': Exchange('XAMS', 'Europe/Amsterdam', datetime.time(17, 30), 'euronext'),
+    'XLON': Exchange('XLON', 'Europe/London', datetime.time(16, 30), 'lse'),
+    # Alpha Vantage FX daily bars close at the New York 17:00 rollover, Monday to Friday.
+    'FX': Exchange('FX', 'America/New_York', datetime.time(17, 0), 'none'),
+}
+SYMBOL_SUFFIX_EXCHANGES = {'PA': 'XPAR', 'AS': 'XAMS', 'L': 'XLON', 'LON': 'XLON'}
+
+
+def exchange_for(series_id: str, currency_pairs: tuple[str, ...] | list[str] = ()) -> Exchange:
+    """Map a symbol (by Alpha Vantage suffix) or currency pair to its exchange; unknown symbols trade weekdays."""
+    if series_id in currency_pairs:
+        return EXCHANGES['FX']
+    suffix = series_id.rsplit('.', 1)[-1].upper() if '.' in series_id else ''
+    return EXCHANGES.get(SYMBOL_SUFFIX_EXCHANGES.get(suffix, 'FX'), EXCHANGES['FX'])
+
+
+def _easter(year: int) -> datetime.date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _weekday_on_or_after(day: datetime.date, weekday: int) -> datetime.date:
+    return day + datetime.timedelta(days=(weekday - day.weekday()) % 7)
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> datetime.date:
+    next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+    last_day = next_month - datetime.timedelta(days=1)
+    return last_day - datetime.timedelta(days=(last_day.weekday() - weekday) % 7)
+
+
+@lru_cache(maxsize=None)
+def holidays(rule_set: str, year: int) -> frozenset[datetime.date]:
+    """Full-day closures for a holiday rule set in year."""
+    if rule_set == 'none':
+        return frozenset()
+
+    easter = _easter(year)
+    days = {easter - datetime.timedelta(days=2), easter + datetime.timedelta(days=1)}
+    if rule_set == 'euronext':
+        days |= {
+            datetime.date(year, 1, 1),
+            datetime.date(year, 5, 1),
+            datetime.date(year, 12, 25),
+            datetime.date(year, 12, 26),
+        }
+    elif rule_set == 'lse':
+        new_year = datetime.date(year, 1, 1)
+        days.add(_weekday_on_or_after(new_year, 0) if new_year.weekday() >= 5 else new_year)
+        days.add(_weekday_on_or_after(datetime.date(year, 5, 1), 0))
+        days.add(_last_weekday(year, 5, 0))
+        days.add(_last_weekday(year, 8, 0))
+        # Christmas and Boxing Day move to the following weekdays when they fall on a weekend.
+        christmas = datetime.date(year, 12, 25)
+        boxing_day = datetime.date(year, 12, 26)
+        if christmas.weekday() >= 5:
+            christmas = _weekday_on_or_after(christmas, 0)
+        boxing_day = max(boxing_day, christmas + datetime.timedelta(days=1))
+        while boxing_day.weekday() >= 5:
+            boxing_day += datetime.timedelta(days=1)
+        days |= {christmas, boxing_day}
+    return frozenset(days)
+
+
+def is_trading_day(exchange: Exchange, day: datetime.date) -> bool:
+    return day.weekday() < 5 and day not in holidays(exchange.holidays, day.year)
+
+
+def last_closed_session(exchange: Exchange, now: datetime.datetime | None = None) -> datetime.date:
+    """Return the most recent session of exchange whose close has passed at now."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    day = now.astimezone(ZoneInfo(exchange.timezone)).date()
+    if not (is_trading_day(exchange, day) and now >= exchange.close_at(day)):
+        day -= datetime.timedelta(days=1)
+        while not is_trading_day(exchange, day):
+            day -= datetime.timedelta(days=1)
+    return day
+
+
+def sessions_between(exchange: Exchange, start: datetime.date, end: datetime.date) -> list[datetime.date]:
+    """Trading sessions in the inclusive range [start, end]."""
+    days = []
+    day = start
+    while day <= end:
+        if is_trading_day(exchange, day):
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def next_close(exchange: Exchange, now: datetime.datetime | None = None) -> datetime.datetime:
+    """Return the next session close strictly after now."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    day = now.astimezone(ZoneInfo(exchange.timezone)).date()
+    while not is_trading_day(exchange, day) or exchange.close_at(day) <= now:
+        day += datetime.timedelta(days=1)
+    return exchange.close_at(day)
@@ -0,0 +1,173 @@
+"""Compact in-memory storage for published frames, and memory accounting.
+
+With CACHE_COMPACT the published frame keeps each column as float32 when every
+value survives the round trip within half a unit of CACHE_COMPACT_DECIMALS, and as
+float64 otherwise (large portfolio values). Columns are grouped into one
+contiguous 2-D block per dtype, so prices take half the memory while the work
+window stays a row slice (a view) of those blocks. The float64 frame it was built
+from stays the one refreshes merge into and persist, so the cache keeps full
+precision; with CACHE_MMAP its values are mapped from the cache file.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Mapping
+
+import numpy
+import pandas
+
+from ..utils.config import config
+
+
+@dataclass(frozen=True)
+class SeriesMemory:
+    """Bytes held for one series: stored values and derived chart pyramid levels."""
+
+    series_id: str
+    dtype: str
+    rows: int
+    value_bytes: int
+    pyramid_bytes: int = 0
+    mapped: bool = False
+
+    @property
+    def total_bytes(self) -> int:
+        return self.value_bytes + self.pyramid_bytes
+
+
+@dataclass(frozen=True)
+class MemoryReport:
+    """Memory held by one published snapshot."""
+
+    version: int
+    rows: int
+    index_bytes: int
+    series: Mapping[str, SeriesMemory] = field(default_factory=dict)
+    # Bytes the work window holds beyond the full frame (0 when it is a view).
+    workdata_bytes: int = 0
+    # Bytes of the float64 frame refreshes merge into, beyond the published frame (0 when it is the same
+    # frame), and how many of them are mapped from the cache file.
+    master_bytes: int = 0
+    master_mapped_bytes: int = 0
+    # True when any series is stored as float32.
+    compact: bool = False
+
+    @property
+    def value_bytes(self) -> int:
+        return sum(series.value_bytes for series in self.series.values())
+
+    @property
+    def mapped_bytes(self) -> int:
+        """Value bytes mapped from the cache file, shared with other processes mapping it."""
+        return sum(series.value_bytes for series in self.series.values() if series.mapped)
+
+    @property
+    def pyramid_bytes(self) -> int:
+        return sum(series.pyramid_bytes for series in self.series.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return self.index_bytes + self.value_bytes + self.pyramid_bytes + self.workdata_bytes + self.master_bytes
+
+
+def fits_float32(values: numpy.ndarray, decimals: int) -> bool:
+    """Return True when float32 keeps every value within half a unit of the given decimal place."""
+    finite = values[numpy.isfinite(values)]
+    if not len(finite):
+        return True
+    if numpy.abs(finite).max() > numpy.finfo(numpy.float32).max:
+        return False
+    error = numpy.abs(finite.astype(numpy.float32).astype(numpy.float64) - finite).max()
+    return bool(error <= 0.5 * 10.0 ** -decimals)
+
+
+def compact_frame(data: pandas.DataFrame, decimals: int | None = None) -> pandas.DataFrame:
+    """Return a copy of data with float32 columns where precision allows, one contiguous block per dtype."""
+    decimals = config.CACHE_COMPACT_DECIMALS if decimals is None else decimals
+    if data.empty:
+        return data
+
+    dtypes = {}
+    for column in data.columns:
+        values = data[column].to_numpy(dtype=numpy.float64)
+        dtypes[column] = numpy.float32 if fits_float32(values, decimals) else numpy.float64
+
+    # One (columns x rows) array per dtype, transposed so each block is a single contiguous allocation.
+    blocks = {}
+    for dtype in (numpy.float32, numpy.float64):
+        columns = [column for column in data.columns if dtypes[column] is dtype]
+        if columns:
+            values = numpy.ascontiguousarray(data[columns].to_numpy(dtype=numpy.float64).T, dtype=dtype)
+            blocks[dtype] = pandas.DataFrame(values.T, index=data.index, columns=columns, copy=False)
+    compact = pandas.concat(list(blocks.values()), axis=1, copy=False)[list(data.columns)]
+    compact.attrs = dict(data.attrs)
+    return compact
+
+
+def float_values(series: pandas.Series) -> numpy.ndarray:
+    """Return series values as float64, rounded back to CACHE_COMPACT_DECIMALS when stored as float32."""
+    values = series.to_numpy(dtype=numpy.float64)
+    if series.dtype == numpy.float32:
+        values = values.round(config.CACHE_COMPACT_DECIMALS)
+    return values
+
+
+def _is_mapped(values: numpy.ndarray) -> bool:
+    base = values
+    while base is not None:
+        if isinstance(base, numpy.memmap):
+            return True
+        base = getattr(base, 'base', None)
+    return False
+
+
+def memory_report(
+    version: int,
+    data: pandas.DataFrame,
+    workdata: pandas.DataFrame,
+    pyramid_levels: Mapping[str, list[pandas.Series]] | None = None,
+    master: pandas.DataFrame | None = None
+) -> MemoryReport:
+    """Account the bytes of a published frame, its work window and downsampled chart levels, per series,
+    plus master, the frame the published one was compacted from, when it holds separate values.
+    """
+    pyramid_levels = pyramid_levels or {}
+    series = {}
+    for column in data.columns:
+        values = data[column].to_numpy()
+        pyramid_bytes = sum(
+            level.to_numpy().nbytes + level.index.nbytes for level in pyramid_levels.get(str(column), [])
+        )
+        series[str(column)] = SeriesMemory(
+            str(column), str(values.dtype), len(values), values.nbytes, pyramid_bytes, _is_mapped(values)
+        )
+
+    workdata_bytes = 0
+    if not workdata.empty:
+        for column in workdata.columns:
+            values = workdata[column].to_numpy()
+            if column not in data.columns or not numpy.shares_memory(values, data[column].to_numpy()):
+                workdata_bytes += values.nbytes
+        if not numpy.shares_memory(workdata.index.asi8, data.index.asi8):
+            workdata_bytes += workdata.index.nbytes
+
+    master_bytes = master_mapped_bytes = 0
+    if master is not None and master is not data:
+        for column in master.columns:
+            values = master[column].to_numpy()
+            if column not in data.columns or not numpy.shares_memory(values, data[column].to_numpy()):
+                master_bytes += values.nbytes
+                master_mapped_bytes += values.nbytes if _is_mapped(values) else 0
+        if not numpy.shares_memory(master.index.asi8, data.index.asi8):
+            master_bytes += master.index.nbytes
+
+    return MemoryReport(
+        version=version,
+        rows=len(data.index),
+        index_bytes=data.index.nbytes,
+        series=series,
+        workdata_bytes=workdata_bytes,
+        master_bytes=master_bytes,
+        master_mapped_bytes=master_mapped_bytes,
+        compact=bool((data.dtypes == numpy.float32).any())
+    )
@@ -0,0 +1,205 @@
+"""Portfolio registry: many holdings definitions valued over one shared price store.
+
+Instruments (symbol, currency, price multiplier) are defined once; a portfolio is
+only a share count per symbol. The refresh fetches the instrument universe once,
+however many portfolios hold each symbol, and every portfolio is valued with a
+single holdings-matrix product (see ``BatchValuation``).
+
+``PORTFOLIOS_FILE`` adds instruments and portfolios to the configured one::
+
+    {
+        "instruments": {"SAP.DE": {"currency": "EUR", "multiplier": 1, "name": "SAP SE"}},
+        "portfolios": {
+            "desk-a": {"name": "Desk A", "holdings": {"VIV.PA": 1200, "SAP.DE": 40}}
+        }
+    }
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterator, Mapping
+
+import numpy
+import pandas
+
+from .valuation import BatchValuation
+from ..utils.config import config
+from ..utils.logger import setup_logger
+
+
+logger = setup_logger(__name__)
+DEFAULT_PORTFOLIO = 'default'
+
+
+@dataclass(frozen=True)
+class Portfolio:
+    """A named set of share counts over registry instruments."""
+
+    portfolio_id: str
+    name: str
+    shares: Mapping[str, float]
+
+
+class PortfolioRegistry:
+    """Thread-safe set of portfolios over a fixed instrument universe.
+
+    The holdings matrix is rebuilt lazily after portfolios change; ``revision``
+    increases with every change so callers can cache derived values.
+    """
+
+    def __init__(
+        self,
+        instruments: Mapping[str, Mapping],
+        currency_pairs: tuple[str, ...] = (),
+        base_currency: str = 'AUD'
+    ) -> None:
+        # config.STOCK layout without share counts: {symbol: {'currency', 'multiplier', 'name'}}.
+        self.instruments: Mapping[str, Mapping] = MappingProxyType({
+            symbol: MappingProxyType({key: value for key, value in instrument.items() if key != 'stock'})
+            for symbol, instrument in instruments.items()
+        })
+        self.base_currency = base_currency
+        self.currency_pairs = tuple(dict.fromkeys([
+            *currency_pairs,
+            *sorted({f'{instrument["currency"]}.{base_currency}' for instrument in self.instruments.values()})
+        ]))
+        self.revision = 0
+        self._portfolios: dict[str, Portfolio] = {}
+        self._valuation: BatchValuation | None = None
+        self._fingerprint: str | None = None
+        self._lock = threading.Lock()
+
+    def register(self, portfolio_id: str, shares: Mapping[str, float], name: str | None = None) -> Portfolio:
+        """Add or replace a portfolio. Raises ValueError for symbols outside the instrument universe."""
+        unknown = sorted(set(shares) - set(self.instruments))
+        if unknown:
+            raise ValueError(f'Portfolio {portfolio_id!r} holds unknown instrument(s): {", ".join(unknown)}')
+        portfolio = Portfolio(
+            portfolio_id,
+            name or portfolio_id,
+            MappingProxyType({symbol: float(count) for symbol, count in shares.items()})
+        )
+        with self._lock:
+            self._portfolios[portfolio_id] = portfolio
+            self._valuation = self._fingerprint = None
+            self.revision += 1
+        return portfolio
+
+    def remove(self, portfolio_id: str) -> None:
+        with self._lock:
+            if self._portfolios.pop(portfolio_id, None) is not None:
+                self._valuation = self._fingerprint = None
+                self.revision += 1
+
+    def get(self, portfolio_id: str) -> Portfolio | None:
+        return self._portfolios.get(portfolio_id)
+
+    def __contains__(self, portfolio_id: object) -> bool:
+        return portfolio_id in self._portfolios
+
+    def __iter__(self) -> Iterator[Portfolio]:
+        return iter(list(self._portfolios.values()))
+
+    def __len__(self) -> int:
+        return len(self._portfolios)
+
+    def stock(self, portfolio_id: str) -> dict[str, dict]:
+        """Return one portfolio in the ``config.STOCK`` layout."""
+        portfolio = self._portfolios[portfolio_id]
+        return {symbol: {**self.instruments[symbol], 'stock': count} for symbol, count in portfolio.shares.items()}
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the instruments and portfolios; registries loaded from the same definition match."""
+        with self._lock:
+            if self._fingerprint is None:
+                payload = json.dumps([
+                    {symbol: dict(instrument) for symbol, instrument in self.instruments.items()},
+                    [[portfolio.portfolio_id, portfolio.name, dict(portfolio.shares)]
+                     for portfolio in self._portfolios.values()],
+                    self.currency_pairs,
+                    self.base_currency
+                ], sort_keys=True)
+                self._fingerprint = hashlib.sha1(payload.encode('utf8')).hexdigest()[:16]
+            return self._fingerprint
+
+    def valuation(self) -> BatchValuation:
+        """Return the batched valuation engine for the current portfolios."""
+        with self._lock:
+            if self._valuation is None:
+                self._valuation = self._build_valuation()
+            return self._valuation
+
+    def _build_valuation(self) -> BatchValuation:
+        symbols = list(self.instruments)
+        position = {symbol: index for index, symbol in enumerate(symbols)}
+        multipliers = numpy.array([float(self.instruments[symbol]['multiplier']) for symbol in symbols])
+        rows, columns, counts = [], [], []
+        for column, portfolio in enumerate(self._portfolios.values()):
+            for symbol, count in portfolio.shares.items():
+                rows.append(position[symbol])
+                columns.append(column)
+                counts.append(count)
+        holdings = numpy.zeros((len(symbols), len(self._portfolios)))
+        rows_array = numpy.asarray(rows, dtype=numpy.intp)
+        holdings[rows_array, numpy.asarray(columns, dtype=numpy.intp)] = (
+            numpy.asarray(counts, dtype=float) * multipliers[rows_array]
+        )
+        return BatchValuation(
+            {symbol: self.instruments[symbol]['currency'] for symbol in symbols},
+            holdings,
+            list(self._portfolios),
+            self.base_currency
+        )
+
+    def value(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """Return the base-currency value of every portfolio (columns) on every row of data."""
+        return self.valuation().value(data)
+
+
+def load_registry(path: str | None = None) -> PortfolioRegistry:
+    """Build the registry from ``config.STOCK`` (as the default portfolio) plus PORTFOLIOS_FILE.
+    An unreadable file or invalid portfolio is logged and skipped.
+    """
+    path = config.PORTFOLIOS_FILE if path is None else path
+    definition: dict = {}
+    if path:
+        try:
+            with open(path, encoding='utf8') as f:
+                definition = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error('Unable to read portfolios from %s: %s', path, e)
+
+    instruments = dict(config.STOCK)
+    for symbol, instrument in definition.get('instruments', {}).items():
+        if not isinstance(instrument, dict) or 'currency' not in instrument:
+            logger.error('Skipping instrument %s from %s: a currency is required', symbol, path)
+            continue
+        instruments[symbol] = {'multiplier': 1, 'name': symbol, **instrument}
+    registry = PortfolioRegistry(instruments, config.CURRENCIES)
+    registry.register(
+        DEFAULT_PORTFOLIO, {symbol: holding['stock'] for symbol, holding in config.STOCK.items()}, 'Default portfolio'
+    )
+    for portfolio_id, portfolio in definition.get('portfolios', {}).items():
+        try:
+            registry.register(portfolio_id, portfolio.get('holdings', {}), portfolio.get('name'))
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.error('Skipping portfolio %s from %s: %s', portfolio_id, path, e)
+    return registry
+
+
+_registry: PortfolioRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PortfolioRegistry:
+    """Return the process-wide portfolio registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = load_registry()
+        return _registry
@@ -0,0 +1,136 @@
+"""Size-bounded, compressed cache for raw API responses."""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..utils.files import atomic_write
+from ..utils.logger import setup_logger
+
+
+ENTRY_SUFFIX = '.json.gz'
+logger = setup_logger(__name__)
+
+
+@dataclass
+class ResponseCacheStats:
+    """Response cache counters."""
+
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    total_bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Gzip-compressed JSON entries with a TTL per kind and LRU eviction under a disk budget.
+
+    Recency is tracked by file mtime, which is bumped on every hit, so the LRU
+    order survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: dict[str, float]) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = ResponseCacheStats()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{ENTRY_SUFFIX}')
+
+    def _scan(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((info.st_mtime, name[:-len(ENTRY_SUFFIX)], info.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+        self._stats.total_bytes = sum(self._entries.values())
+
+    def get(self, key: str, kind: str) -> dict | None:
+        """Return the cached payload for key, or None when it is missing or older than the kind's TTL."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries:
+                self._stats.misses += 1
+                return None
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                entry = json.loads(gzip.decompress(raw).decode('utf8'))
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning('Dropping unreadable response cache entry %s: %s', key, e)
+                self._remove(key)
+                self._stats.misses += 1
+                return None
+
+            ttl = self.ttl_seconds.get(kind)
+            if ttl is not None and time.time() - entry.get('stored_at', 0) > ttl:
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self._stats.hits += 1
+            self._stats.bytes_read += len(raw)
+            return entry.get('data')
+
+    def put(self, key: str, kind: str, data: dict) -> None:
+        entry = {'stored_at': time.time(), 'kind': kind, 'data': data}
+        raw = gzip.compress(json.dumps(entry, separators=(',', ':')).encode('utf8'))
+        with self._lock:
+            try:
+                atomic_write(self._path(key), raw)
+            except OSError as e:
+                logger.error('Failed to write response cache entry %s: %s', key, e)
+                return
+            self._stats.total_bytes += len(raw) - self._entries.pop(key, 0)
+            self._entries[key] = len(raw)
+            self._stats.bytes_written += len(raw)
+            self._evict()
+
+    def _remove(self, key: str) -> None:
+        self._stats.total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        # Never evict the most recent entry, even if it alone exceeds the budget.
+        while self._stats.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            logger.info('Evicting response cache entry %s', key)
+            self._remove(key)
+            self._stats.evictions += 1
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            return ResponseCacheStats(**vars(self._stats))
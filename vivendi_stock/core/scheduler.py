@@ -0,0 +1,114 @@
+"""Background refresh scheduler driven by exchange session closes."""
+from __future__ import annotations
+
+import datetime
+import random
+import threading
+import time
+from typing import Iterable
+
+from .market_calendar import Exchange, exchange_for, next_close
+from .vivendi_data import CURRENCIES, STOCK, VivendiStock
+from ..utils.config import config
+from ..utils.logger import setup_logger
+
+
+logger = setup_logger(__name__)
+# How often a waiting scheduler looks for a backfill handed over by vivendi-stock-cli backfill.
+BACKFILL_REQUEST_POLL_SECONDS = 30.0
+
+
+def held_exchanges(symbols: Iterable[str] = STOCK, currency_pairs: Iterable[str] = CURRENCIES) -> list[Exchange]:
+    """Return the distinct exchanges whose closes produce new data for the portfolio."""
+    pairs = tuple(currency_pairs)
+    exchanges: dict[str, Exchange] = {}
+    for series_id in (*symbols, *pairs):
+        exchange = exchange_for(series_id, pairs)
+        exchanges.setdefault(exchange.code, exchange)
+    return list(exchanges.values())
+
+
+class RefreshScheduler:
+    """Runs ``VivendiStock.update()`` on a daemon thread shortly after each exchange close.
+
+    Runs are delayed by REFRESH_DELAY_MINUTES plus random jitter so several
+    processes don't hit the API at the same instant; failed runs are retried with
+    exponential backoff capped at REFRESH_BACKOFF_MAX_SECONDS. While waiting, it runs
+    backfills requested through the request file (the scheduler's process holds the
+    refresh lock, so the backfill command hands its work over instead of waiting).
+    """
+
+    def __init__(self, stock: VivendiStock, exchanges: list[Exchange] | None = None) -> None:
+        self.stock = stock
+        self.exchanges = exchanges or held_exchanges()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._failures = 0
+
+    def next_run(self, now: datetime.datetime | None = None) -> datetime.datetime:
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        close = min(next_close(exchange, now) for exchange in self.exchanges)
+        delay = config.REFRESH_DELAY_MINUTES * 60 + random.uniform(0, config.REFRESH_JITTER_SECONDS)
+        return close.astimezone(datetime.timezone.utc) + datetime.timedelta(seconds=delay)
+
+    def _backoff(self) -> float:
+        base = config.REFRESH_BACKOFF_SECONDS * (2 ** (self._failures - 1))
+        return min(base, config.REFRESH_BACKOFF_MAX_SECONDS) * random.uniform(0.8, 1.2)
+
+    def run_once(self) -> bool:
+        """Refresh now. Returns True on success."""
+        try:
+            ok = self.stock.update(wait=True)
+        except Exception as e:  # keep the scheduler alive whatever the refresh raised
+            logger.exception('Scheduled refresh failed: %s', e)
+            ok = False
+        self._failures = 0 if ok else self._failures + 1
+        logger.info('Scheduled refresh finished: %s', self.stock.update_status_message)
+        return ok
+
+    def run_forever(self, run_immediately: bool = True) -> None:
+        """Blocking scheduler loop; returns after stop()."""
+        if run_immediately:
+            self.run_once()
+        while not self._stop.is_set():
+            if self._failures:
+                wait_seconds = self._backoff()
+                logger.warning('Retrying refresh in %.0fs after %d failure(s)', wait_seconds, self._failures)
+            else:
+                run_at = self.next_run()
+                wait_seconds = max(0.0, (run_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+                logger.info('Next scheduled refresh at %s', run_at.isoformat(timespec='seconds'))
+            if self._wait(wait_seconds):
+                break
+            self.run_once()
+
+    def _wait(self, seconds: float) -> bool:
+        """Sleep until the next run, serving backfill requests meanwhile. Returns True once stopped."""
+        from .backfill import run_requested_backfill
+
+        deadline = time.monotonic() + seconds
+        while not self._stop.wait(max(0.0, min(BACKFILL_REQUEST_POLL_SECONDS, deadline - time.monotonic()))):
+            try:
+                run_requested_backfill(self.stock)
+            except OSError as e:
+                logger.error('Unable to process backfill request: %s', e)
+            if time.monotonic() >= deadline:
+                return False
+        return True
+
+    def start(self, run_immediately: bool = True) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever,
+            kwargs={'run_immediately': run_immediately},
+            name='refresh-scheduler',
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,118 @@
+"""Immutable, versioned views of published portfolio data."""
+from __future__ import annotations
+
+import datetime
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping
+
+import numpy
+import pandas
+
+from .analytics import AnalyticsSnapshot
+from .downsample import SeriesPyramid
+
+
+@dataclass(frozen=True)
+class SeriesSummary:
+    """Precomputed headline figures for one series over the work window."""
+
+    series_id: str
+    latest: float
+    previous: float
+    change_percent: float
+    last_date: pandas.Timestamp | None
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """Published data for one data version.
+
+    Snapshots are never mutated after construction: a refresh builds a new one
+    and swaps the reference, so readers need no lock. Downsampled pyramids are
+    derived lazily and cached on the snapshot, so they share its lifetime.
+    """
+
+    version: int
+    data: pandas.DataFrame
+    workdata: pandas.DataFrame
+    summaries: Mapping[str, SeriesSummary]
+    analytics: AnalyticsSnapshot = field(default_factory=AnalyticsSnapshot)
+    created_at: datetime.datetime = field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc))
+    # When the shared cache last changed for this version, identical in every process (None when unknown).
+    modified_at: datetime.datetime | None = None
+    _pyramids: dict[tuple[str, int], SeriesPyramid] = field(default_factory=dict, repr=False, compare=False)
+    _pyramid_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def build(
+        cls,
+        data: pandas.DataFrame,
+        version: int,
+        start_date: str,
+        analytics: AnalyticsSnapshot | None = None,
+        modified_at: datetime.datetime | None = None
+    ) -> DataSnapshot:
+        # The index is sorted, so the work window is a positional row slice (a view, not a masked copy).
+        start = data.index.searchsorted(pandas.Timestamp(start_date), side='left') if not data.empty else 0
+        workdata = data.iloc[start:]
+        return cls(
+            version=version,
+            data=data,
+            workdata=workdata,
+            summaries=MappingProxyType(_summarize(workdata)),
+            analytics=analytics if analytics is not None else AnalyticsSnapshot(),
+            modified_at=modified_at
+        )
+
+    def pyramid(self, series_id: str, budget: int) -> SeriesPyramid:
+        """Return the work-window LTTB pyramid for a series, building it once per snapshot."""
+        key = (series_id, budget)
+        with self._pyramid_lock:
+            pyramid = self._pyramids.get(key)
+            if pyramid is None:
+                pyramid = self._pyramids[key] = SeriesPyramid(self.workdata[series_id], budget)
+        return pyramid
+
+    def pyramid_levels(self) -> dict[str, list[pandas.Series]]:
+        """Return the downsampled levels of every pyramid built so far, per series (level 0 is
+        the work window itself and holds no extra memory).
+        """
+        with self._pyramid_lock:
+            pyramids = list(self._pyramids.items())
+        levels: dict[str, list[pandas.Series]] = {}
+        for (series_id, _), pyramid in pyramids:
+            levels.setdefault(series_id, []).extend(pyramid.levels[1:])
+        return levels
+
+
+def _summarize(workdata: pandas.DataFrame) -> dict[str, SeriesSummary]:
+    """Compute latest/previous/change and last valid date for every column in one pass."""
+    if workdata.empty:
+        return {
+            str(column): SeriesSummary(str(column), 0.0, 0.0, 0.0, None) for column in workdata.columns
+        }
+
+    values = workdata.to_numpy(dtype=float)
+    rows = len(values)
+    latest = values[-1] if rows >= 1 else numpy.zeros(values.shape[1])
+    previous = values[-2] if rows >= 2 else numpy.zeros(values.shape[1])
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        change = numpy.where(previous != 0, (latest - previous) / previous * 100, 0.0)
+
+    # Last row index with a non-NaN value per column (-1 when the column is all NaN).
+    valid = ~numpy.isnan(values)
+    last_valid = numpy.where(valid.any(axis=0), rows - 1 - numpy.argmax(valid[::-1], axis=0), -1)
+
+    summaries = {}
+    for position, column in enumerate(workdata.columns):
+        if rows < 2:
+            curr, prev, pct = 0.0, 0.0, 0.0
+        else:
+            curr = round(float(latest[position]), 3)
+            prev = round(float(previous[position]), 3)
+            pct = round(float(change[position]), 2)
+        last_date = workdata.index[last_valid[position]] if last_valid[position] >= 0 else None
+        summaries[str(column)] = SeriesSummary(str(column), curr, prev, pct, last_date)
+    return summaries
@@ -0,0 +1,97 @@
+"""Vectorized portfolio valuation."""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Mapping, Sequence
+
+import numpy
+import pandas
+
+
+class _CurrencyConversion:
+    """Converts symbol prices to the base currency through a symbol x currency mapping matrix."""
+
+    def __init__(self, currencies: Mapping[str, str], base_currency: str = 'AUD') -> None:
+        self.symbols = tuple(currencies)
+        distinct = sorted(set(currencies.values()))
+        self.fx_columns = tuple(f'{currency}.{base_currency}' for currency in distinct)
+
+        self.currency_matrix = numpy.zeros((len(self.symbols), len(self.fx_columns)))
+        for row, symbol in enumerate(self.symbols):
+            self.currency_matrix[row, distinct.index(currencies[symbol])] = 1.0
+
+    def converted_prices(self, data: pandas.DataFrame) -> numpy.ndarray:
+        """Return a dates x symbols matrix of prices in the base currency. Missing columns and NaN cells
+        count as zero, like the cache's zero placeholders: a NaN would otherwise spread through the
+        matrix products to every symbol sharing its currency and to every portfolio.
+        """
+        prices = data.reindex(columns=list(self.symbols), fill_value=0.0).to_numpy(dtype=float)
+        fx = data.reindex(columns=list(self.fx_columns), fill_value=0.0).to_numpy(dtype=float)
+        return numpy.nan_to_num(prices, nan=0.0) * (numpy.nan_to_num(fx, nan=0.0) @ self.currency_matrix.T)
+
+
+class PortfolioValuation(_CurrencyConversion):
+    """Valuation engine built once from a holdings definition (``config.STOCK`` layout).
+
+    Prices are converted to the base currency through a symbol x currency mapping
+    matrix, then reduced with a single matrix product against the weight matrix
+    whose columns are ``STOCK.VALUE`` (shares held) and ``AUD.VALUE`` (one share each).
+    """
+
+    VALUE_COLUMNS = ('STOCK.VALUE', 'AUD.VALUE')
+
+    def __init__(self, stock: dict[str, dict], base_currency: str = 'AUD') -> None:
+        super().__init__({symbol: stock[symbol]['currency'] for symbol in stock}, base_currency)
+        multipliers = numpy.array([float(stock[symbol]['multiplier']) for symbol in self.symbols])
+        holdings = numpy.array([float(stock[symbol]['stock']) for symbol in self.symbols])
+        self.weights = numpy.column_stack([holdings * multipliers, multipliers])
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the symbols, currencies and weights the value columns are computed from."""
+        payload = json.dumps([self.symbols, self.fx_columns, self.currency_matrix.tolist(), self.weights.tolist()])
+        return hashlib.sha1(payload.encode('utf8')).hexdigest()[:16]
+
+    def value(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """Return the value columns for every row of data."""
+        values = numpy.round(self.converted_prices(data) @ self.weights, 3)
+        return pandas.DataFrame(values, index=data.index, columns=list(self.VALUE_COLUMNS))
+
+    def apply(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """Return a copy of data with the value columns recomputed."""
+        data = data.copy()
+        data[list(self.VALUE_COLUMNS)] = self.value(data)
+        return data
+
+
+class BatchValuation(_CurrencyConversion):
+    """Values many portfolios at once over a shared price frame.
+
+    ``holdings`` is a symbols x portfolios matrix of shares already scaled by each
+    symbol's price multiplier, so every portfolio's value on every date comes from
+    one product of the converted price matrix with it.
+    """
+
+    def __init__(
+        self,
+        currencies: Mapping[str, str],
+        holdings: numpy.ndarray,
+        portfolio_ids: Sequence[str],
+        base_currency: str = 'AUD'
+    ) -> None:
+        super().__init__(currencies, base_currency)
+        if holdings.shape != (len(self.symbols), len(portfolio_ids)):
+            raise ValueError(
+                f'holdings matrix has shape {holdings.shape}, expected {(len(self.symbols), len(portfolio_ids))}'
+            )
+        self.holdings = holdings
+        self.portfolio_ids = tuple(portfolio_ids)
+
+    def value_matrix(self, data: pandas.DataFrame) -> numpy.ndarray:
+        """Return a dates x portfolios value matrix for every row of data."""
+        return numpy.round(self.converted_prices(data) @ self.holdings, 3)
+
+    def value(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """Return portfolio values with one column per portfolio id."""
+        return pandas.DataFrame(self.value_matrix(data), index=data.index, columns=list(self.portfolio_ids))
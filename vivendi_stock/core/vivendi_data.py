@@ -1,79 +1,243 @@
 from __future__ import annotations
 
 import datetime
+import json
+import os
+import threading
+import time
+import numpy
 import pandas
 
-from .web_api import download_stock_data, download_exchange_rate, load_cached_data, save_cached_data
+from .analytics import AnalyticsEngine, SeriesAnalytics
+from .cache_store import get_cache_store
+from .coordination import cache_stamp, read_version, write_version
+from .fetch_planner import FetchState, FetchTask, fill_closed_sessions, plan_fetches, series_checkpoint
+from .fx_store import fill_missing_rates, get_fx_store
+from .memory import MemoryReport, compact_frame, memory_report
+from .portfolios import PortfolioRegistry, get_registry
+from .snapshot import DataSnapshot, SeriesSummary
+from .valuation import PortfolioValuation
+from .web_api import (
+    append_cached_rows,
+    download_stock_data,
+    DATA_STORAGE,
+    load_cached_data,
+    save_cached_data
+)
+from ..utils import metrics
 from ..utils.config import config
+from ..utils.files import atomic_write
 from ..utils.logger import setup_logger
+from ..utils.tracing import span
 
 
-CURRENCIES = config.CURRENCIES
-STOCK = config.STOCK
+REGISTRY = get_registry()
+# The shared store fetches every instrument any portfolio holds, once.
+STOCK = dict(REGISTRY.instruments)
+CURRENCIES = REGISTRY.currency_pairs
+# STOCK.VALUE / AUD.VALUE in the cache value the configured (default) portfolio.
+VALUATION = PortfolioValuation(config.STOCK)
 logger = setup_logger(__name__)
+REFRESH_SECONDS = metrics.histogram(
+    'vivendi_refresh_seconds',
+    'VivendiStock.update duration by outcome (refreshed, unchanged, no_data, in_flight, error).',
+    ('outcome',)
+)
+
+
+def _maps_cache() -> bool:
+    """Return True when the cache file is mapped rather than read (CACHE_MMAP with the binary store)."""
+    return config.CACHE_MMAP and get_cache_store(config.CACHE_FILE).supports_mmap
 
 
 def update_stock_data(current_data: pandas.DataFrame | None, new_data: pandas.DataFrame) -> pandas.DataFrame:
-    """Merge cached and new stock data and recompute portfolio values."""
-
-    def update_exchange_rate(data: pandas.DataFrame) -> pandas.DataFrame:
-        for curr in CURRENCIES:
-            for day in data.index:
-                rate = data[curr][day]
-                try:
-                    if rate == 0.0:
-                        data.loc[day, curr] = download_exchange_rate(curr, day)
-                except (KeyError, TypeError, ValueError) as e:
-                    logger.warning(
-                        f'Failed to update exchange rate for {curr} on {day}: {e}')
-        return data
-
-    def calc_day_value(row: pandas.Series, stock: bool) -> float:
-        value = 0
-        for symbol in STOCK.keys():
-            currency = STOCK[symbol]['currency']
-            stock_value = row[symbol] * \
-                STOCK[symbol]['multiplier'] * row[f'{currency}.AUD']
-            if stock:
-                stock_value *= STOCK[symbol]['stock']
-            value += stock_value
-        return round(value, 3)
-
-    if current_data is None:
-        current_data = new_data.combine(
-            pandas.DataFrame(0, index=new_data.index, columns=CURRENCIES),
-            pandas.Series.combine_first
+    """Merge cached and new stock data and recompute portfolio values.
+
+    Only the rows touched_rows() reports can change, so those are merged and valued on their
+    own and copied back between the untouched rows; an append-day refresh merges one row
+    instead of the whole history.
+    """
+    with span('vivendi_data.update_stock_data', rows=len(new_data.index)):
+        rows = touched_rows(current_data, new_data)
+        # Splicing pays for itself while most rows are untouched.
+        if rows is None or len(rows) * 4 > len(current_data.index):
+            return _merge_rows(current_data, new_data)
+        if rows.empty:
+            return current_data.copy()
+        values = current_data.to_numpy(dtype=float)
+        touched = current_data.index.isin(rows)
+        merged = _merge_rows(
+            pandas.DataFrame(values[touched], index=current_data.index[touched], columns=current_data.columns),
+            new_data.loc[new_data.index.isin(rows)]
         )
-    else:
-        current_data = current_data.combine(
-            new_data, pandas.Series.combine_first)
+        kept_rows = numpy.flatnonzero(~touched)
+        if not len(kept_rows):
+            return merged
+        # Untouched rows, in the merged (full merge) column order, followed by the merged ones.
+        positions = current_data.columns.get_indexer(merged.columns)
+        # Keep the column-major layout pandas and the binary cache store use, so copies stay contiguous.
+        spliced = numpy.empty((len(kept_rows) + len(merged.index), len(positions)), order='F')
+        count = len(kept_rows)
+        if not numpy.array_equal(positions, numpy.arange(len(positions))):
+            spliced[:count] = values[numpy.ix_(kept_rows, positions)]
+        elif kept_rows[-1] == count - 1:
+            spliced[:count] = values[:count]
+        else:
+            spliced[:count] = values[kept_rows]
+        spliced[count:] = merged.to_numpy(dtype=float)
+        kept = current_data.index[kept_rows]
+        index = kept.append(merged.index)
+        if not kept[-1] < merged.index[0]:
+            order = index.argsort()
+            spliced, index = spliced[order], index[order]
+        return pandas.DataFrame(spliced, index=index, columns=merged.columns)
+
+
+def _merge_rows(current_data: pandas.DataFrame | None, new_data: pandas.DataFrame) -> pandas.DataFrame:
+    """Merge new_data into current_data, fill missing exchange rates and value every row."""
+    with span('vivendi_data.merge'):
+        if current_data is None:
+            zeros = pandas.DataFrame(0, index=new_data.index, columns=CURRENCIES)
+            data = _combine_first(new_data, zeros)
+        else:
+            # Zero cells are placeholders for missing values, so fresh data may fill them.
+            data = _combine_first(current_data, new_data, zero_is_missing=True)
+
+    with span('vivendi_data.fx_backfill'):
+        data = fill_missing_rates(data.fillna(0), CURRENCIES, get_fx_store())
+    with span('vivendi_data.valuation', rows=len(data.index)):
+        return VALUATION.apply(data)
+
+
+def _combine_first(
+    preferred: pandas.DataFrame,
+    other: pandas.DataFrame,
+    zero_is_missing: bool = False
+) -> pandas.DataFrame:
+    """Return preferred's values over the union of both frames, taking other's where preferred is
+    missing (NaN, and zero when zero_is_missing). Equivalent to a per-column Series.combine_first,
+    in a few array operations.
+    """
+    # An empty cache loads with a plain Index, which a union would turn into an object index.
+    index = preferred.index.union(other.index) if len(preferred.index) else other.index.unique().sort_values()
+    columns = preferred.columns.union(other.columns)
+
+    def spread(frame: pandas.DataFrame) -> numpy.ndarray:
+        values = numpy.full((len(index), len(columns)), numpy.nan)
+        rows, positions = index.get_indexer(frame.index), columns.get_indexer(frame.columns)
+        values[numpy.ix_(rows, positions)] = frame.to_numpy(dtype=float)
+        return values
+
+    merged = spread(preferred)
+    missing = numpy.isnan(merged)
+    if zero_is_missing:
+        missing |= merged == 0
+    merged[missing] = spread(other)[missing]
+    return pandas.DataFrame(merged, index=index, columns=columns)
+
+
+def touched_rows(previous: pandas.DataFrame | None, new_data: pandas.DataFrame) -> pandas.Index | None:
+    """Return the rows update_stock_data(previous, new_data) can change, or None when any row may.
+
+    The merge keeps existing values, so only dates new to previous and rows still holding a
+    missing cell (zero or NaN, which the merge or the FX backfill may fill, or a portfolio
+    value not computed yet) can differ from previous. A new column changes every row.
+    """
+    if previous is None or previous.empty:
+        return None
+    if not {*new_data.columns, *VALUATION.VALUE_COLUMNS}.issubset(previous.columns):
+        return None
+    values = previous.to_numpy(dtype=float)
+    missing = ((values == 0) | numpy.isnan(values)).any(axis=1)
+    return new_data.index.difference(previous.index).union(previous.index[missing])
+
+
+def _valuation_state_path() -> str:
+    return os.path.join(DATA_STORAGE, config.VALUATION_STATE_FILE)
+
+
+def _read_holdings_fingerprint() -> str | None:
+    """Return the holdings fingerprint the cached portfolio values were computed from."""
+    try:
+        with open(_valuation_state_path(), encoding='utf8') as f:
+            return json.load(f).get('holdings')
+    except FileNotFoundError:
+        return None
+    except (OSError, AttributeError, ValueError) as e:
+        logger.warning('Unable to read valuation state from %s: %s', _valuation_state_path(), e)
+        return None
 
-    current_data = update_exchange_rate(current_data.fillna(0))
 
-    kwargs = {
-        'STOCK.VALUE': lambda row: calc_day_value(row, True)
-    }
-    current_data = current_data.assign(**kwargs)
-    return current_data
+def _save_holdings_fingerprint(fingerprint: str) -> None:
+    """Record the holdings the cache is valued with; written after the revalued cache itself."""
+    try:
+        atomic_write(_valuation_state_path(), json.dumps({'holdings': fingerprint}).encode('utf8'))
+    except OSError as e:
+        logger.error('Failed to save valuation state to %s: %s', _valuation_state_path(), e)
+
+
+def changed_rows(previous: pandas.DataFrame, current: pandas.DataFrame) -> pandas.DataFrame:
+    """Return rows of current that are new or differ from previous."""
+    if previous.empty:
+        return current
+    aligned = previous.reindex(index=current.index, columns=current.columns)
+    differs = current.ne(aligned) & ~(current.isna() & aligned.isna())
+    return current.loc[differs.any(axis=1)]
 
 
 class VivendiStock:
     """Vivendi portfolio service for loading, updating, and serving stock time-series."""
 
-    def __init__(self) -> None:
-        self.data = load_cached_data(config.CACHE_FILE)
+    def __init__(self, auto_update: bool = True) -> None:
+        """Load cached data; refresh synchronously unless auto_update is False (a background
+        scheduler or external refresher keeps it current instead).
+        """
+        self._version_file = os.path.join(DATA_STORAGE, config.CACHE_VERSION_FILE)
+        self._version_stamp = cache_stamp(self._version_file)
+        self._next_reload_check = 0.0
+        self.data = load_cached_data(config.CACHE_FILE, mmap=config.CACHE_MMAP)
         cache_sanitized = self._sanitize_cached_data()
+        holdings_changed = _read_holdings_fingerprint() != VALUATION.fingerprint
+        if holdings_changed and not self.data.empty:
+            logger.info('Holdings changed since the cache was valued; recomputing portfolio values for %d rows',
+                        len(self.data.index))
+            self.data = VALUATION.apply(self.data)
+            cache_sanitized = True
         self.last_checkpoint = self._latest_checkpoint()
         self._last_update_message = ''
-        if cache_sanitized:
-            save_cached_data(self.data, config.CACHE_FILE)
+        # Every process sanitizes and revalues in memory; only the refresher, holding the leader
+        # lock, writes the result back to the shared cache (see _write_startup_rewrite).
+        self._rewrite_pending = cache_sanitized
+        self._fingerprint_pending = holdings_changed
         self._series_warning_logged: set[str] = set()
-        self.update()
+        self._fetch_state = FetchState(os.path.join(DATA_STORAGE, config.FETCH_STATE_FILE))
+        self._refresh_lock = threading.Lock()
+        self._snapshot: DataSnapshot | None = None
+        self._portfolio_values: tuple[tuple, pandas.DataFrame] | None = None
+        self._portfolio_values_lock = threading.Lock()
+        self._analytics = AnalyticsEngine(
+            config.ANALYTICS_RETURN_WINDOWS,
+            config.ANALYTICS_MA_WINDOWS,
+            config.ANALYTICS_VOLATILITY_WINDOW,
+            config.ANALYTICS_CORRELATION_WINDOW
+        )
+        self._publish(self.data, 'Using cached data', version=max(1, read_version(self._version_file)))
+        if auto_update:
+            self.update()
 
     @property
     def update_status_message(self) -> str:
         return self._last_update_message
 
+    @property
+    def snapshot(self) -> DataSnapshot:
+        """The latest published data; replaced, never mutated, on refresh."""
+        return self._snapshot
+
+    @property
+    def workdata(self) -> pandas.DataFrame:
+        return self._snapshot.workdata
+
     def _sanitize_cached_data(self) -> bool:
         """Normalize index and drop future-dated rows from cache.
         Returns True when data was modified.
@@ -81,11 +245,16 @@ class VivendiStock:
         if self.data.empty:
             return False
 
+        # Binary cache stores guarantee a normalized, sorted index; only the future-date check applies.
+        header = self.data.attrs.get('cache_header', {})
+        presorted = bool(header.get('normalized') and header.get('sorted'))
+
         modified = False
-        normalized_index = pandas.to_datetime(self.data.index).normalize()
-        if not normalized_index.equals(self.data.index):
-            self.data.index = normalized_index
-            modified = True
+        if not presorted:
+            normalized_index = pandas.to_datetime(self.data.index).normalize()
+            if not normalized_index.equals(self.data.index):
+                self.data.index = normalized_index
+                modified = True
 
         today = pandas.Timestamp(datetime.date.today())
         future_rows = self.data.index > today
@@ -96,7 +265,7 @@ class VivendiStock:
             self.data = self.data.loc[~future_rows]
             modified = True
 
-        if not self.data.empty:
+        if not presorted and not self.data.empty:
             sorted_data = self.data.sort_index()
             if not sorted_data.index.equals(self.data.index):
                 self.data = sorted_data
@@ -104,73 +273,310 @@ class VivendiStock:
 
         return modified
 
-    def _latest_checkpoint(self) -> pandas.Timestamp | None:
-        if self.data.empty or self.data.index.empty:
+    def _persist(
+        self,
+        previous_data: pandas.DataFrame,
+        data: pandas.DataFrame,
+        changed: pandas.DataFrame
+    ) -> pandas.DataFrame:
+        """Write refreshed data, journaling only the changed rows when enabled, and return the frame to publish.
+
+        Replaying a journal copies the mapped values into private memory, so with CACHE_MMAP the
+        journal is folded into the base instead: every process reloading the announced version
+        shares the file's pages.
+        """
+        if config.CACHE_JOURNAL and not _maps_cache() and not previous_data.empty:
+            append_cached_rows(changed, config.CACHE_FILE)
+            return data
+        return self._save(data)
+
+    def _write_startup_rewrite(self) -> None:
+        """Persist the data sanitized and revalued at start-up and announce it as a new version.
+
+        Runs at the start of every refresh or ingest, which only the leader lock holder performs, so
+        the shared cache and journal are never rewritten by several processes at once.
+        """
+        if self._rewrite_pending:
+            data = self._save(self.data)
+            self._publish(data, self._last_update_message, self._announce_version())
+        if self._fingerprint_pending:
+            _save_holdings_fingerprint(VALUATION.fingerprint)
+        self._rewrite_pending = self._fingerprint_pending = False
+
+    @staticmethod
+    def _save(data: pandas.DataFrame) -> pandas.DataFrame:
+        """Write a full cache snapshot and return the frame to keep: with CACHE_MMAP, the written
+        file mapped back, so this process shares its pages too.
+        """
+        save_cached_data(data, config.CACHE_FILE)
+        if not _maps_cache():
+            return data
+        reloaded = load_cached_data(config.CACHE_FILE, mmap=True)
+        return reloaded if reloaded.index.equals(data.index) and reloaded.columns.equals(data.columns) else data
+
+    @staticmethod
+    def _checkpoint_of(data: pandas.DataFrame) -> pandas.Timestamp | None:
+        if data.empty or data.index.empty:
             return None
-        checkpoint = pandas.to_datetime(self.data.index.max())
+        checkpoint = pandas.to_datetime(data.index.max())
         if pandas.isna(checkpoint):
             return None
         return checkpoint.normalize()
 
-    def _refresh_workdata(self) -> None:
-        self.workdata = self.data.loc[self.data.index >=
-                                      config.WORKDATA_START_DATE]
+    def _latest_checkpoint(self) -> pandas.Timestamp | None:
+        return self._checkpoint_of(self.data)
+
+    def _publish(
+        self,
+        data: pandas.DataFrame,
+        message: str,
+        version: int | None = None,
+        changed_from: pandas.Timestamp | None = None
+    ) -> None:
+        """Swap in a refreshed frame. Readers only ever see complete snapshots, never one being built.
+        A new snapshot is only built when the frame or its version changed. changed_from is the
+        earliest date that differs from the previous frame (None when unknown); analytics resume from
+        their saved state when only later dates changed.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self.data is not data or version not in (None, snapshot.version):
+            if version is None:
+                version = 1 if snapshot is None else snapshot.version + 1
+            with span('vivendi_data.analytics') as analytics_span:
+                analytics = self._analytics.update(data, changed_from)
+                analytics_span.set(rows=analytics.rows_processed, rebuilt=analytics.rebuilt)
+            # Only the published copy is compacted: self.data stays float64, so merges and the cache
+            # file never see values truncated to float32.
+            published = compact_frame(data) if config.CACHE_COMPACT else data
+            snapshot = DataSnapshot.build(
+                published, version, config.WORKDATA_START_DATE, analytics, self._data_modified_at()
+            )
+        self.data = data
+        self.last_checkpoint = self._checkpoint_of(data)
+        self._snapshot = snapshot
+        self._last_update_message = message
 
-    def update(self, force: bool = False) -> None:
-        """Update cached stock data when the last checkpoint is older than one day.
-        Remote market/API queries are never executed on Saturday/Sunday.
+    def _data_modified_at(self) -> datetime.datetime | None:
+        """When the shared data last changed: the version file's mtime, which every process sees
+        alike, or the cache file's before any version was announced.
         """
-        today = datetime.date.today()
-        is_weekend = today.weekday() >= 5
+        for path in (self._version_file, os.path.join(DATA_STORAGE, config.CACHE_FILE)):
+            try:
+                return datetime.datetime.fromtimestamp(os.stat(path).st_mtime, datetime.timezone.utc)
+            except OSError:
+                continue
+        return None
 
-        self._last_update_message = 'Using cached data'
-        if is_weekend and not force:
-            self._last_update_message += ' (weekend)'
-            self._refresh_workdata()
-            return
+    def update(self, force: bool = False, wait: bool | None = None) -> bool:
+        """Refresh data with single-flight semantics: at most one refresh runs per instance.
+        A caller arriving while a refresh is in flight either waits for it to publish
+        (wait=True) or returns immediately with the current snapshot. The default comes
+        from REFRESH_WAIT.
+        Returns False when planned fetches returned no data, True otherwise.
+        """
+        wait = config.REFRESH_WAIT if wait is None else wait
+        start = time.perf_counter()
+        if not self._refresh_lock.acquire(blocking=False):
+            logger.info('Refresh already in flight; %s', 'waiting for it' if wait else 'serving current snapshot')
+            if wait:
+                with self._refresh_lock:
+                    pass
+            REFRESH_SECONDS.observe(time.perf_counter() - start, 'in_flight')
+            return True
+        outcome = 'error'
+        snapshot = self._snapshot
+        try:
+            with span('vivendi_data.refresh', force=force) as refresh_span:
+                ok = self._refresh(force)
+                outcome = 'no_data' if not ok else 'unchanged' if self._snapshot is snapshot else 'refreshed'
+                refresh_span.set(outcome=outcome)
+            return ok
+        finally:
+            self._refresh_lock.release()
+            REFRESH_SECONDS.observe(time.perf_counter() - start, outcome)
+
+    def _refresh(self, force: bool) -> bool:
+        """Fetch series whose exchange closed a session since their own checkpoint. Weekends and
+        holidays need no special case: no exchange closes a session, so nothing is planned.
+        """
+        self._write_startup_rewrite()
+        current_data = self.data
+        message = 'Using cached data'
+        tasks = plan_fetches(current_data, STOCK.keys(), CURRENCIES, self._fetch_state, force=force)
+        if not tasks:
+            self._publish(current_data, message + ' (no new market sessions)')
+            return True
 
-        if self.last_checkpoint is None:
-            should_update = True
+        logger.info('Planned %d fetch(es): %s', len(tasks), ', '.join(
+            f'{task.series_id} [{task.outputsize}: {task.reason}]' for task in tasks))
+        # Fresh-enough raw responses are served from the TTL cache unless the refresh is forced.
+        fresh_data = download_stock_data(
+            [task.series_id for task in tasks if not task.is_currency],
+            [task.series_id for task in tasks if task.is_currency],
+            use_cache=not force,
+            outputsize={task.series_id: task.outputsize for task in tasks},
+            join='outer'
+        )
+        fetched = [task for task in tasks if task.series_id in fresh_data and fresh_data[task.series_id].notna().any()]
+        data, version, changed_from = self._merge(fresh_data, fetched)
+        if version is not None:
+            message = 'Data refreshed from web APIs.'
         else:
-            age_days = (today - self.last_checkpoint.date()).days
-            should_update = age_days > 1
-
-        if force:
-            should_update = True
-
-        if should_update:
-            fresh_data = download_stock_data(
-                STOCK.keys(), CURRENCIES, use_cache=False)
-            if not fresh_data.empty:
-                self.data = update_stock_data(self.data, fresh_data)
-                save_cached_data(self.data, config.CACHE_FILE)
-                self.last_checkpoint = self._latest_checkpoint()
-                self._last_update_message = 'Data refreshed from web APIs.'
-            else:
-                logger.warning(
-                    'Update skipped: no fresh market data was returned.')
-                self._last_update_message += ' (no fresh data from web APIs)'
+            logger.warning(
+                'Update skipped: no fresh market data was returned.')
+            message += ' (no fresh data from web APIs)'
+
+        self._publish(data, message, version, changed_from)
+        return version is not None
+
+    def _merge(
+        self,
+        fresh_data: pandas.DataFrame,
+        fetched: list[FetchTask]
+    ) -> tuple[pandas.DataFrame, int | None, pandas.Timestamp | None]:
+        """Merge fetched series into the current data, persist it and record checkpoints for fetched.
+        Returns the merged data, its announced version (None when nothing was merged) and the
+        earliest changed date.
+        """
+        current_data = self.data
+        fresh_data = fill_closed_sessions(current_data, fresh_data, [*STOCK, *CURRENCIES], CURRENCIES)
+        data = current_data
+        version = None
+        changed_from = None
+        if not fresh_data.empty:
+            data = update_stock_data(current_data, fresh_data)
+            rows = touched_rows(current_data, fresh_data)
+            changed = changed_rows(current_data, data if rows is None else data.loc[rows.intersection(data.index)])
+            changed_from = changed.index.min() if not changed.empty else None
+            data = self._persist(current_data, data, changed)
+            version = self._announce_version()
+
+        for task in fetched:
+            self._fetch_state.record(task, series_checkpoint(data, task.series_id))
+        if fetched:
+            self._fetch_state.save()
+        return data, version, changed_from
+
+    def ingest(self, fresh_data: pandas.DataFrame, fetched: list[FetchTask], message: str) -> bool:
+        """Merge externally fetched series (e.g. a backfill chunk) the same way a refresh does.
+        Waits for any refresh in flight. Returns False when no complete rows were merged.
+        """
+        with self._refresh_lock:
+            self._write_startup_rewrite()
+            data, version, changed_from = self._merge(fresh_data, fetched)
+            self._publish(data, message, version, changed_from)
+        return version is not None
 
-        self._refresh_workdata()
+    def _announce_version(self) -> int:
+        """Claim the next shared data version and tell other processes about it."""
+        version = max(self._snapshot.version, read_version(self._version_file)) + 1
+        write_version(self._version_file, version)
+        self._version_stamp = cache_stamp(self._version_file)
+        return version
+
+    def reload_if_changed(self) -> bool:
+        """Reload the on-disk cache when another process announced a newer data version.
+
+        Checks cost one stat() and run at most every CACHE_RELOAD_INTERVAL_SECONDS.
+        Skipped while this instance is refreshing. Returns True when a new snapshot was published.
+        """
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return False
+        self._next_reload_check = now + config.CACHE_RELOAD_INTERVAL_SECONDS
+        stamp = cache_stamp(self._version_file)
+        if stamp == self._version_stamp or not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            self._version_stamp = stamp
+            version = read_version(self._version_file)
+            if version <= self._snapshot.version:
+                return False
+            data = load_cached_data(config.CACHE_FILE, mmap=config.CACHE_MMAP)
+            self._fetch_state = FetchState(os.path.join(DATA_STORAGE, config.FETCH_STATE_FILE))
+            # The leader writes its start-up rewrite before announcing, so the reloaded cache has it.
+            self._rewrite_pending = self._fingerprint_pending = False
+            self._publish(data, f'Reloaded shared cache (version {version})', version)
+            logger.info('Reloaded shared cache at data version %d', version)
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def memory_report(self) -> MemoryReport:
+        """Return the bytes held by the published snapshot, broken down per series, and by the
+        float64 frame behind it when that is a separate copy (CACHE_COMPACT).
+        """
+        snapshot = self._snapshot
+        return memory_report(
+            snapshot.version, snapshot.data, snapshot.workdata, snapshot.pyramid_levels(), master=self.data
+        )
+
+    def get_analytics(self, series_id: str) -> SeriesAnalytics | None:
+        """Return trailing returns, moving averages, volatility and drawdowns for a series."""
+        return self._snapshot.analytics.series.get(series_id)
+
+    def get_correlation(self, series_ids: list[str] | None = None) -> pandas.DataFrame:
+        """Return the rolling correlation of daily log returns between series (the holdings by default)."""
+        correlation = self._snapshot.analytics.correlation
+        series_ids = [series_id for series_id in (series_ids or list(STOCK)) if series_id in correlation.index]
+        return correlation.loc[series_ids, series_ids]
+
+    def get_summary(self, series_id: str) -> SeriesSummary | None:
+        """Return precomputed latest price, change and last date for a series."""
+        return self._snapshot.summaries.get(series_id)
+
+    def get_chart_data(
+        self,
+        series_id: str,
+        start: pandas.Timestamp | str | None = None,
+        end: pandas.Timestamp | str | None = None,
+        budget: int | None = None
+    ) -> pandas.Series:
+        """Return the series downsampled to at most budget points (CHART_POINT_BUDGET by default)
+        over [start, end], using the finest precomputed resolution that fits.
+        """
+        snapshot = self._snapshot
+        if series_id not in snapshot.workdata.columns:
+            return self.get_data(series_id)[0]
+        budget = config.CHART_POINT_BUDGET if budget is None else budget
+        return snapshot.pyramid(series_id, budget).select(start, end)
+
+    def portfolio_values(
+        self,
+        start: pandas.Timestamp | str | None = None,
+        end: pandas.Timestamp | str | None = None,
+        registry: PortfolioRegistry | None = None
+    ) -> pandas.DataFrame:
+        """Return the base-currency value of every registered portfolio (one column each) over
+        the work window, limited to [start, end]. All portfolios are valued in one matrix product,
+        computed once per data version and registry revision.
+        """
+        registry = REGISTRY if registry is None else registry
+        snapshot = self._snapshot
+        key = (snapshot.version, id(registry), registry.revision)
+        with self._portfolio_values_lock:
+            if self._portfolio_values is None or self._portfolio_values[0] != key:
+                self._portfolio_values = (key, registry.value(snapshot.workdata))
+            values = self._portfolio_values[1]
+        if start is None and end is None:
+            return values
+        return values.loc[start:end]
+
+    def latest_portfolio_values(self, registry: PortfolioRegistry | None = None) -> pandas.Series:
+        """Return each portfolio's value on the latest date (empty when there is no data)."""
+        values = self.portfolio_values(registry=registry)
+        if values.empty:
+            return pandas.Series(dtype=float)
+        return values.iloc[-1]
 
     def get_data(self, series_id: str) -> tuple[pandas.Series, float, float]:
         """Return series, latest price, and day-over-day percentage change for a symbol."""
-        workdata = self.workdata
-        try:
-            series = workdata[series_id]
-            prices = series.values
-            if len(prices) < 2:
-                return series, 0, 0
-            curr_price = prices[-1]
-            prev_price = prices[-2]
-            if prev_price == 0:
-                return series, round(curr_price, 3), 0
-            price_change = round(
-                ((curr_price - prev_price) / prev_price) * 100, 2)
-            return series, round(curr_price, 3), price_change
-        except (KeyError, IndexError, TypeError, ValueError) as e:
+        snapshot = self._snapshot
+        summary = snapshot.summaries.get(series_id)
+        if summary is None:
             if series_id not in self._series_warning_logged:
                 logger.warning(
-                    f'Unable to build output series for {series_id}: {e}')
+                    f'Unable to build output series for {series_id}: no such series')
                 self._series_warning_logged.add(series_id)
-            return pandas.Series(index=workdata.index, dtype=float), 0, 0
+            return pandas.Series(index=snapshot.workdata.index, dtype=float), 0, 0
+        return snapshot.workdata[series_id], summary.latest, summary.change_percent
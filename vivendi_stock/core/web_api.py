@@ -1,23 +1,60 @@
 from __future__ import annotations
 
 import os
-import json
-import requests
+import asyncio
+import contextvars
+import threading
+import time
 import pandas
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+from ..utils import metrics
 from ..utils.config import config
+from ..utils.tracing import span
 from ..utils.logger import setup_logger
-from .models import ExchangeRate
-from ..utils.rate_limiter import RateLimiter
+from .cache_store import CacheJournal, get_cache_store, migrate_legacy_cache
+from .ingest import align_series, parse_close_series
+from .response_cache import ResponseCache
+from ..utils.rate_limiter import DailyQuota, HostRateLimiter, QuotaExhaustedError, TokenBucket
+
+if TYPE_CHECKING:
+    import requests
 
 
 APP_ROOT = str(config.APP_ROOT)
 DATA_STORAGE = str(config.DATA_DIR)
 logger = setup_logger(__name__)
-rate_limiter = RateLimiter(min_interval=config.API_RATE_LIMIT_SECONDS)
+ALPHAVANTAGE_HOST = (urlsplit(config.ALPHAVANTAGE_BASE_URL).hostname or '').lower()
+# Only Alpha Vantage is throttled; the currency API mirrors are CDN-hosted and unrated.
+rate_limiter = HostRateLimiter(
+    buckets={
+        ALPHAVANTAGE_HOST: TokenBucket(
+            rate=1.0 / config.API_RATE_LIMIT_SECONDS,
+            capacity=config.API_RATE_LIMIT_BURST
+        )
+    },
+    quotas={
+        ALPHAVANTAGE_HOST: DailyQuota(limit=config.ALPHAVANTAGE_DAILY_QUOTA, path=config.DATA_DIR / 'quota.json')
+    }
+)
+response_cache = ResponseCache(
+    str(config.RESPONSE_CACHE_DIR),
+    max_bytes=config.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS
+)
+API_REQUEST_SECONDS = metrics.histogram(
+    'vivendi_api_request_seconds', 'External API request latency by endpoint and HTTP status.', ('endpoint', 'status'))
+RESPONSE_CACHE_LOOKUPS = metrics.counter(
+    'vivendi_response_cache_lookups_total', 'Alpha Vantage raw-response cache lookups by result.', ('kind', 'result'))
+CACHE_IO_SECONDS = metrics.histogram(
+    'vivendi_cache_io_seconds', 'Computed cache load, save and journal append duration.', ('operation', 'format'))
+CACHE_FILE_BYTES = metrics.gauge('vivendi_cache_file_bytes', 'Size of the computed cache files on disk.', ('file',))
+# Serializes journal appends against full snapshot writes and compaction.
+_journal_lock = threading.RLock()
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
 
 
 def _redact_url(url: str) -> str:
@@ -36,6 +73,22 @@ def _redact_url(url: str) -> str:
         return '[unparseable-url]'
 
 
+def _endpoint(url: str) -> str:
+    """Metric label for a request: the Alpha Vantage function, otherwise the host."""
+    parsed = urlsplit(url)
+    for key, value in parse_qsl(parsed.query):
+        if key == 'function':
+            return value
+    return parsed.hostname or 'unknown'
+
+
+def _record_file_size(path: str) -> None:
+    try:
+        CACHE_FILE_BYTES.set(os.path.getsize(path), os.path.basename(path))
+    except OSError:
+        pass
+
+
 def get_api_key() -> str | None:
     api_key = os.getenv('ALPHAVANTAGE_API_KEY')
     if api_key:
@@ -49,204 +102,380 @@ def get_api_key() -> str | None:
     return None
 
 
-def load_json_data(file_name: str) -> dict:
-    data_file = os.path.join(DATA_STORAGE, file_name)
-    try:
-        if os.path.isfile(data_file):
-            with open(data_file, encoding='utf8') as f:
-                return json.load(f)
-    except (OSError, json.JSONDecodeError) as e:
-        logger.error('Failed to load JSON data from %s: %s', data_file, e)
-    return {}
-
-
-def load_cached_data(file_name: str) -> pandas.DataFrame:
+def load_cached_data(file_name: str, mmap: bool = False) -> pandas.DataFrame:
+    """Load the computed cache with its journal applied; mmap maps binary values from the file."""
     data_file = os.path.join(DATA_STORAGE, file_name)
+    migrate_legacy_cache(os.path.join(DATA_STORAGE, config.LEGACY_CACHE_FILE), data_file)
+    start = time.perf_counter()
     try:
-        if os.path.isfile(data_file):
-            with open(data_file, encoding='utf8') as f:
-                data_frame = pandas.read_json(f)
-                data_frame.index = pandas.to_datetime(data_frame.index).normalize()
-                return data_frame
+        with _journal_lock:
+            data_frame = pandas.DataFrame()
+            if os.path.isfile(data_file):
+                data_frame = get_cache_store(file_name).load(data_file, mmap=mmap)
+                _record_file_size(data_file)
+            data_frame = _cache_journal(file_name).replay(data_frame)
+        CACHE_IO_SECONDS.observe(time.perf_counter() - start, 'load', _cache_format(file_name))
+        return data_frame
     except (OSError, ValueError) as e:
         logger.error('Failed to load cached data from %s: %s', data_file, e)
     return pandas.DataFrame()
 
 
-def save_json_data(data: dict, file_name: str) -> None:
+def save_cached_data(data: pandas.DataFrame, file_name: str) -> None:
+    """Write a full cache snapshot; the journal is folded in and reset."""
     data_file = os.path.join(DATA_STORAGE, file_name)
+    start = time.perf_counter()
     try:
-        if not os.path.isdir(os.path.dirname(data_file)):
-            os.makedirs(os.path.dirname(data_file), exist_ok=True)
-        with open(data_file, mode='wt', encoding='utf8') as f:
-            json.dump(data, f, sort_keys=True, indent=4, separators=(',', ' : '))
+        with span('web_api.save_cached_data', file=file_name, rows=len(data.index)), _journal_lock:
+            get_cache_store(file_name).save(data, data_file)
+            _cache_journal(file_name).truncate()
+        CACHE_IO_SECONDS.observe(time.perf_counter() - start, 'save', _cache_format(file_name))
+        _record_file_size(data_file)
     except OSError as e:
-        logger.error('Failed to save JSON data to %s: %s', data_file, e)
+        logger.error('Failed to save cached data to %s: %s', data_file, e)
+    except (TypeError, ValueError) as e:
+        logger.error('Failed to serialize cached dataframe to %s: %s', file_name, e)
 
 
-def save_cached_data(data: pandas.DataFrame, file_name: str) -> None:
+def _cache_journal(file_name: str) -> CacheJournal:
+    return CacheJournal(os.path.join(DATA_STORAGE, f'{file_name}.journal'))
+
+
+def _cache_format(file_name: str) -> str:
+    return file_name.rsplit('.', 1)[-1]
+
+
+def append_cached_rows(rows: pandas.DataFrame, file_name: str) -> None:
+    """Append changed rows to the cache journal and compact in the background when it grows too large."""
+    if rows.empty:
+        return
+    journal = _cache_journal(file_name)
+    start = time.perf_counter()
     try:
-        jsons = data.to_json(date_format='iso')
-        save_json_data(json.loads(jsons), file_name)
-    except (TypeError, ValueError) as e:
-        logger.error('Failed to serialize cached dataframe to %s: %s', file_name, e)
+        with span('web_api.append_cached_rows', file=file_name, rows=len(rows.index)), _journal_lock:
+            written = journal.append(rows)
+    except (OSError, TypeError, ValueError) as e:
+        logger.error('Failed to append %d row(s) to cache journal %s: %s', len(rows.index), journal.path, e)
+        return
+    CACHE_IO_SECONDS.observe(time.perf_counter() - start, 'append', _cache_format(file_name))
+    _record_file_size(journal.path)
+    logger.info('Appended %d row(s) (%d bytes) to cache journal', len(rows.index), written)
+    if journal.size > config.CACHE_JOURNAL_MAX_BYTES:
+        threading.Thread(
+            target=compact_cached_data, args=(file_name,), name='cache-compaction', daemon=True
+        ).start()
+
+
+def compact_cached_data(file_name: str) -> None:
+    """Fold the journal into the base snapshot."""
+    with _journal_lock:
+        if _cache_journal(file_name).size == 0:
+            return
+        data_frame = load_cached_data(file_name)
+        if data_frame.empty:
+            return
+        save_cached_data(data_frame, file_name)
+    logger.info('Compacted cache journal into %s', file_name)
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session so connections are pooled and kept alive across requests."""
+    global _session
+    # requests is only imported once a download actually happens, keeping cache-only starts light.
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, config.API_MAX_WORKERS))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def remaining_api_calls() -> int | None:
+    """Return Alpha Vantage calls left in today's quota."""
+    return rate_limiter.remaining(ALPHAVANTAGE_HOST)
 
 
 def __execute_api_request(url: str) -> dict:
-    rate_limiter.wait()
+    endpoint = _endpoint(url)
+    with span('web_api.rate_limit_wait', endpoint=endpoint) as wait_span:
+        wait_span.set(slept_s=rate_limiter.wait(url))
     logger.info('Requesting URL: %s', _redact_url(url))
-    response = requests.get(url, timeout=config.API_TIMEOUT_SECONDS)
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        with span('web_api.http', endpoint=endpoint) as http_span:
+            response = get_session().get(url, timeout=config.API_TIMEOUT_SECONDS)
+            status = str(response.status_code)
+            http_span.set(status=status, bytes=len(response.content))
+    finally:
+        API_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, status)
     response.raise_for_status()
     try:
-        return response.json()
+        with span('web_api.json', endpoint=endpoint):
+            return response.json()
     except ValueError as e:
         logger.error('Invalid JSON response from %s: %s', _redact_url(url), e)
         return {}
 
 
-def __download_query(api_key: str | None, function: str, query_id: str, use_cache: bool = True) -> dict:
+def __download_query(
+    api_key: str | None,
+    function: str,
+    query_id: str,
+    use_cache: bool = True,
+    kind: str = 'daily',
+    outputsize: str = 'compact'
+) -> dict:
     if not api_key:
         logger.error('Missing AlphaVantage API key, cannot download %s', query_id)
         return {}
-    url = f'https://www.alphavantage.co/query?function={function}&outputsize=compact&datatype=json&apikey={api_key}'
+    url = f'{config.ALPHAVANTAGE_BASE_URL}?function={function}&outputsize={outputsize}&datatype=json&apikey={api_key}'
+    if outputsize != 'compact':
+        query_id = f'{query_id}.{outputsize}'
 
-    data = load_json_data(f'{query_id}.json') if (config.ALPHAVANTAGE_CACHE and use_cache) else {}
-    cache_hit = bool(data)
+    cached = config.ALPHAVANTAGE_CACHE and use_cache
+    data = response_cache.get(query_id, kind) if cached else None
 
     # Discard cached entries that are Alpha Vantage error/rate-limit responses,
     # identified by the presence of 'Information' or 'Note' top-level keys.
     if data and ('Information' in data or 'Note' in data):
         logger.warning('Cached data for %s contains an API error response — discarding and re-fetching', query_id)
-        data = {}
-        cache_hit = False
+        data = None
 
     if data:
+        RESPONSE_CACHE_LOOKUPS.inc(kind, 'hit')
         logger.info('Using cached data for %s', query_id)
-    else:
-        try:
-            data = __execute_api_request(url)
-        except requests.RequestException as e:
-            logger.error('Request failed for %s: %s', query_id, e)
-            return {}
-        # Only persist valid time series responses — never cache error payloads.
-        if 'Information' in data or 'Note' in data:
-            logger.warning('API returned an error/rate-limit response for %s — not caching', query_id)
-            return {}
-
-    if data and not cache_hit:
-        save_json_data(data, f'{query_id}.json')
+        return data
+    RESPONSE_CACHE_LOOKUPS.inc(kind, 'miss' if cached else 'bypass')
+
+    import requests
+
+    try:
+        data = __execute_api_request(url)
+    except QuotaExhaustedError as e:
+        logger.error('Skipping %s: %s', query_id, e)
+        return {}
+    except requests.RequestException as e:
+        logger.error('Request failed for %s: %s', query_id, e)
+        return {}
+    # Only persist valid time series responses — never cache error payloads.
+    if 'Information' in data or 'Note' in data:
+        logger.warning('API returned an error/rate-limit response for %s — not caching', query_id)
+        message = str(data.get('Information', data.get('Note', ''))).lower()
+        if 'rate limit' in message and 'per day' in message:
+            rate_limiter.exhaust(ALPHAVANTAGE_HOST)
+        return {}
+
+    if data:
+        response_cache.put(query_id, kind, data)
     return data
 
 
-def __download_stock_symbol(api_key: str | None, symbol: str, use_cache: bool = True) -> dict:
-    return __download_query(api_key, f'TIME_SERIES_DAILY&symbol={symbol}', symbol, use_cache=use_cache)
+def __download_stock_symbol(
+    api_key: str | None,
+    symbol: str,
+    use_cache: bool = True,
+    outputsize: str = 'compact'
+) -> dict:
+    return __download_query(
+        api_key,
+        f'TIME_SERIES_DAILY&symbol={symbol}',
+        symbol,
+        use_cache=use_cache,
+        outputsize=outputsize
+    )
 
 
-def __download_exchange_pair(api_key: str | None, exchange_pair: str, use_cache: bool = True) -> dict:
+def __download_exchange_pair(
+    api_key: str | None,
+    exchange_pair: str,
+    use_cache: bool = True,
+    outputsize: str = 'compact'
+) -> dict:
     from_symbol, to_symbol = exchange_pair.split('.')
     return __download_query(
         api_key,
         f'FX_DAILY&from_symbol={from_symbol}&to_symbol={to_symbol}',
         exchange_pair,
-        use_cache=use_cache
+        use_cache=use_cache,
+        kind='fx',
+        outputsize=outputsize
     )
 
 
-def download_stock_data(
+def _build_stock_frame(stock_data: dict[str, pandas.Series], use_cache: bool, join: str) -> pandas.DataFrame:
+    source = 'cache' if use_cache else 'API'
+    if all(series.empty for series in stock_data.values()):
+        logger.warning('No stock or exchange data returned from %s', source)
+        return pandas.DataFrame()
+
+    data_frame = align_series(stock_data, join=join)
+    if data_frame.empty:
+        logger.warning('No overlapping dates found across symbols returned from %s', source)
+        return pandas.DataFrame()
+    return data_frame
+
+
+async def download_stock_data_async(
     stock_symbols: Iterable[str],
     currency_pairs: Iterable[str],
-    use_cache: bool = True
+    use_cache: bool = True,
+    outputsize: dict[str, str] | None = None,
+    join: str = 'inner'
 ) -> pandas.DataFrame:
-    def get_daily_close_price(series: str, data: dict) -> dict:
-        def get_day_close_price(day_data: dict) -> float:
-            for key in day_data:
-                if 'close' in key.lower():
-                    return float(day_data[key])
-            return 0.0
-
-        try:
-            time_series = data[series]
-            return {day: get_day_close_price(time_series[day]) for day in time_series}
-        except (KeyError, TypeError, ValueError):
-            return {}
-
+    """Fetch all symbols and pairs concurrently over the pooled session.
+    At most API_MAX_WORKERS requests are in flight; blocking I/O runs in worker threads.
+    outputsize maps series ids to 'compact' (default) or 'full'; join controls date alignment.
+    """
+    outputsize = outputsize or {}
     api_key = get_api_key()
     if not api_key:
         logger.error('Missing AlphaVantage API key — skipping download. Set ALPHAVANTAGE_API_KEY or provide api.key.')
         return pandas.DataFrame()
 
-    symbols = list(stock_symbols)
-    pairs = list(currency_pairs)
-
-    def fetch_symbol(sym: str) -> tuple[str, dict]:
-        return sym, get_daily_close_price(
-            'Time Series (Daily)',
-            __download_stock_symbol(api_key, sym, use_cache=use_cache)
-        )
-
-    def fetch_pair(pair: str) -> tuple[str, dict]:
-        return pair, get_daily_close_price(
-            'Time Series FX (Daily)',
-            __download_exchange_pair(api_key, pair, use_cache=use_cache)
-        )
-
-    stock_data: dict[str, dict] = {}
-    max_workers = max(1, len(symbols) + len(pairs))
-    with ThreadPoolExecutor(max_workers=min(max_workers, config.API_MAX_WORKERS)) as executor:
-        futures = (
-            {executor.submit(fetch_symbol, s): s for s in symbols}
-            | {executor.submit(fetch_pair, p): p for p in pairs}
-        )
-        for future in as_completed(futures):
-            query_id = futures[future]
+    def fetch_symbol(sym: str) -> pandas.Series:
+        with span('web_api.download_series', series=sym, outputsize=outputsize.get(sym, 'compact')) as series_span:
+            payload = __download_stock_symbol(
+                api_key, sym, use_cache=use_cache, outputsize=outputsize.get(sym, 'compact')
+            )
+            with span('ingest.parse_close_series', series=sym):
+                series = parse_close_series(payload, 'Time Series (Daily)')
+            series_span.set(rows=len(series))
+            return series
+
+    def fetch_pair(pair: str) -> pandas.Series:
+        with span('web_api.download_series', series=pair, outputsize=outputsize.get(pair, 'compact')) as series_span:
+            payload = __download_exchange_pair(
+                api_key, pair, use_cache=use_cache, outputsize=outputsize.get(pair, 'compact')
+            )
+            with span('ingest.parse_close_series', series=pair):
+                series = parse_close_series(payload, 'Time Series FX (Daily)')
+            series_span.set(rows=len(series))
+            return series
+
+    semaphore = asyncio.Semaphore(max(1, config.API_MAX_WORKERS))
+
+    async def run(query_id: str, fetch: Callable[[str], pandas.Series]) -> tuple[str, pandas.Series]:
+        async with semaphore:
             try:
-                key, data = future.result()
-                stock_data[key] = data
+                return query_id, await asyncio.to_thread(fetch, query_id)
             except Exception as e:
                 logger.error('Download task failed for %s: %s', query_id, e)
-                stock_data[query_id] = {}
+                return query_id, pandas.Series(dtype=float)
 
-    valid_series = [set(series.keys()) for series in stock_data.values() if series]
-    source = 'cache' if use_cache else 'API'
-    if not valid_series:
-        logger.warning('No stock or exchange data returned from %s', source)
-        return pandas.DataFrame()
+    results = await asyncio.gather(
+        *(run(symbol, fetch_symbol) for symbol in stock_symbols),
+        *(run(pair, fetch_pair) for pair in currency_pairs)
+    )
+    return _build_stock_frame(dict(results), use_cache, join)
 
-    dates = set.intersection(*valid_series)
-    if not dates:
-        logger.warning('No overlapping dates found across symbols returned from %s', source)
-        return pandas.DataFrame()
 
-    stock_data = {
-        symbol: {date: stock_data[symbol][date] for date in dates if date in stock_data[symbol]}
-        for symbol in stock_data
-    }
-    data_frame = pandas.DataFrame().from_dict(stock_data, orient='columns')
-    data_frame.index = pandas.to_datetime(data_frame.index).normalize()
-    return data_frame
+def _run_sync(awaitable: Awaitable[Any]) -> Any:
+    """Run a coroutine to completion, also from threads that already own an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(awaitable)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Carry the caller's context (e.g. the current trace span) into the loop thread.
+        return executor.submit(contextvars.copy_context().run, asyncio.run, awaitable).result()
 
 
-def download_exchange_rate(currency: str, date: pandas.Timestamp | None = None) -> float:
-    try:
-        base, target = currency.lower().split('.')
-    except ValueError:
-        logger.error('Invalid currency format: %s', currency)
-        return 0.0
+def download_stock_data(
+    stock_symbols: Iterable[str],
+    currency_pairs: Iterable[str],
+    use_cache: bool = True,
+    outputsize: dict[str, str] | None = None,
+    join: str = 'inner'
+) -> pandas.DataFrame:
+    with span('web_api.download_stock_data', use_cache=use_cache) as download_span:
+        data_frame = _run_sync(download_stock_data_async(
+            stock_symbols, currency_pairs, use_cache=use_cache, outputsize=outputsize, join=join
+        ))
+        download_span.set(rows=len(data_frame.index), columns=len(data_frame.columns))
+        return data_frame
+
 
+def _currency_date(date: pandas.Timestamp | str | None) -> str:
     if date is None:
-        date_str = 'latest'
-    elif isinstance(date, pandas.Timestamp):
-        date_str = date.strftime('%Y-%m-%d')
-    else:
-        date_str = str(date)
+        return 'latest'
+    if isinstance(date, pandas.Timestamp):
+        return date.strftime('%Y-%m-%d')
+    return str(date)
+
+
+def download_exchange_rates(
+    base: str,
+    targets: Iterable[str],
+    date: pandas.Timestamp | str | None = None
+) -> dict[str, float]:
+    """Fetch one currency file for base and date, returning validated rates keyed by upper-case target.
+    Mirrors are tried in order until every target has a rate.
+    """
+    import requests
+    from .models import ExchangeRate
+
+    base = base.lower()
+    date_str = _currency_date(date)
+    pending = {target.lower() for target in targets}
+    rates: dict[str, float] = {}
 
     urls = [url.format(date=date_str, base=base) for url in config.CURRENCY_API_URLS]
     for url in urls:
+        if not pending:
+            break
         try:
             parsed_response = __execute_api_request(url)
-            rate = float(parsed_response[base][target])
-            validated = ExchangeRate(date=date_str, currency_pair=currency, rate=rate)
-            return validated.rate
+            day_rates = parsed_response[base]
         except (requests.RequestException, KeyError, TypeError, ValueError) as e:
             logger.warning('Failed fetching exchange rate from %s: %s', url, e)
-    return 0.0
+            continue
+        for target in sorted(pending):
+            currency = f'{base}.{target}'.upper()
+            try:
+                rate = float(day_rates[target])
+                validated = ExchangeRate(date=date_str, currency_pair=currency, rate=rate)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning('Failed fetching exchange rate for %s from %s: %s', currency, url, e)
+                continue
+            rates[target.upper()] = validated.rate
+            pending.discard(target)
+    return rates
+
+
+async def download_exchange_rates_async(
+    queries: Iterable[tuple[str, str, tuple[str, ...]]]
+) -> dict[tuple[str, str], dict[str, float]]:
+    """Fetch many (base, date, targets) currency files concurrently, one request per base and date."""
+    semaphore = asyncio.Semaphore(max(1, config.API_MAX_WORKERS))
+
+    async def run(base: str, date: str, targets: tuple[str, ...]) -> tuple[tuple[str, str], dict[str, float]]:
+        async with semaphore:
+            try:
+                return (base, date), await asyncio.to_thread(download_exchange_rates, base, targets, date)
+            except Exception as e:
+                logger.error('Exchange rate task failed for %s on %s: %s', base, date, e)
+                return (base, date), {}
+
+    results = await asyncio.gather(*(run(base, date, targets) for base, date, targets in queries))
+    return dict(results)
+
+
+def download_exchange_rates_batch(
+    queries: Iterable[tuple[str, str, tuple[str, ...]]]
+) -> dict[tuple[str, str], dict[str, float]]:
+    return _run_sync(download_exchange_rates_async(queries))
+
+
+def download_exchange_rate(currency: str, date: pandas.Timestamp | None = None) -> float:
+    try:
+        base, target = currency.lower().split('.')
+    except ValueError:
+        logger.error('Invalid currency format: %s', currency)
+        return 0.0
+    return download_exchange_rates(base, (target,), date).get(target.upper(), 0.0)
@@ -1,35 +1,180 @@
 from __future__ import annotations
 
 import datetime
-from dash import Dash, dcc, html, Input, Output, callback
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from dash import ALL, Dash, Input, Output, Patch, State, callback, ctx, dcc, html, no_update
+from dash.exceptions import PreventUpdate
+from flask import Response
 
-from .core.vivendi_data import VivendiStock, STOCK
+from . import data_api
+from .utils import metrics
 from .utils.config import config
+from .utils.tracing import span
 
-# Module-level singleton initialized lazily to avoid disk/API work during import time.
+if TYPE_CHECKING:
+    from .core.coordination import LeaderLock
+    from .core.scheduler import RefreshScheduler
+    from .core.vivendi_data import VivendiStock
+
+# The data stack (pandas, cache, scheduler) is imported and loaded on first use, not at import
+# time, so the server can start answering with the layout immediately.
+STOCK = config.STOCK
 _stock_data: VivendiStock | None = None
+_scheduler: RefreshScheduler | None = None
+_stock_data_lock = threading.Lock()
+_scheduler_lock = threading.Lock()
+# Across server worker processes only the lock holder refreshes; the others reload its writes.
+_leader: LeaderLock | None = None
+# Rendered figures keyed by (series_id, snapshot version); a few versions are kept so a
+# browser that is one or two refreshes behind can still be sent a Patch.
+FIGURE_CACHE_VERSIONS = 3
+_figure_cache: OrderedDict[tuple[str, int], dict] = OrderedDict()
+_figure_cache_lock = threading.Lock()
+RENDER_SECONDS = metrics.histogram(
+    'vivendi_render_seconds', 'Graph rendering time: full page (stock_graphs) or incremental patch.', ('mode',))
 
 
 def _get_stock_data() -> VivendiStock:
-    global _stock_data
-    if _stock_data is None:
-        _stock_data = VivendiStock()
+    """Return the process-wide VivendiStock, built from the on-disk cache only. The worker
+    holding the leader lock keeps it current; the others follow the shared cache.
+    """
+    global _stock_data, _leader
+    with _stock_data_lock:
+        if _stock_data is None:
+            from .core.coordination import LeaderLock
+            from .core.vivendi_data import VivendiStock
+
+            _leader = LeaderLock(os.path.join(str(config.DATA_DIR), config.LEADER_LOCK_FILE))
+            _stock_data = VivendiStock(auto_update=False)
+            _claim_refresh()
     return _stock_data
 
 
+def warm_up() -> threading.Thread:
+    """Load the on-disk snapshot and claim the refresher role on a background thread, so a
+    fresh process serves (possibly stale) cached data on its first page view without blocking
+    on imports, cache loading or a refresh. Also starts exporting this process's metrics, so
+    importing the app (benchmarks, the CLI) writes no metrics files.
+    """
+    metrics.registry.export()
+    thread = threading.Thread(target=_get_stock_data, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def _claim_refresh() -> bool:
+    """Become this deployment's refresher if no other process is. Returns True for the leader."""
+    global _scheduler
+    if config.REFRESH_MODE == 'external' or not _leader.try_acquire():
+        return False
+    with _scheduler_lock:
+        if config.REFRESH_MODE == 'background' and _scheduler is None:
+            from .core.scheduler import RefreshScheduler
+
+            _scheduler = RefreshScheduler(_stock_data)
+            _scheduler.start()
+    return True
+
+
+def _sync(app_data: VivendiStock) -> None:
+    """Bring app_data current: the leader refreshes in 'request' mode, followers reload the
+    shared cache once the leader announces a new version (and take over if it has exited).
+    """
+    if not _leader.held:
+        if app_data.reload_if_changed() or not _claim_refresh():
+            return
+    if config.REFRESH_MODE == 'request':
+        app_data.update()
+
+
+def _series_ids() -> list[str]:
+    return ['STOCK.VALUE', *STOCK]
+
+
+def _series_name(key: str) -> str:
+    return 'Estimated stock value in AUD' if key == 'STOCK.VALUE' else STOCK[key]['name']
+
+
+def _format_change(change_percent: float) -> tuple[str, str]:
+    """Return the change label and its CSS class."""
+    if change_percent > 0:
+        return f'+{change_percent}%', 'text-left text-success'
+    return f'{change_percent}%', 'text-left text-danger'
+
+
+def _figure(app_data: VivendiStock, key: str, version: int) -> dict:
+    """Return the figure for a series at a snapshot version, rendering it at most once per version."""
+    cache_key = (key, version)
+    with _figure_cache_lock:
+        figure = _figure_cache.get(cache_key)
+        if figure is not None:
+            _figure_cache.move_to_end(cache_key)
+            return figure
+
+    from .core.memory import float_values
+
+    history = app_data.get_chart_data(key)
+    figure = {
+        'data': [{
+            # An empty cache has no date index to format.
+            'x': history.index.strftime('%Y-%m-%d').tolist() if len(history) else [],
+            'y': float_values(history).tolist(),
+            'type': 'line',
+            'name': key
+        }],
+        'layout': {'height': 400}
+    }
+    with _figure_cache_lock:
+        _figure_cache[cache_key] = figure
+        while len(_figure_cache) > FIGURE_CACHE_VERSIONS * len(_series_ids()):
+            _figure_cache.popitem(last=False)
+    return figure
+
+
+def _cached_figure(key: str, version: int) -> dict | None:
+    with _figure_cache_lock:
+        return _figure_cache.get((key, version))
+
+
+def _figure_update(app_data: VivendiStock, key: str, old_version: int, new_version: int) -> Patch | dict:
+    """Return a Patch appending new points when the old figure is a prefix of the new one,
+    otherwise the full new figure.
+    """
+    new_figure = _figure(app_data, key, new_version)
+    old_figure = _cached_figure(key, old_version)
+    if old_figure is None:
+        return new_figure
+
+    old_trace, new_trace = old_figure['data'][0], new_figure['data'][0]
+    count = len(old_trace['x'])
+    if new_trace['x'][:count] != old_trace['x'] or new_trace['y'][:count] != old_trace['y']:
+        return new_figure
+
+    patch = Patch()
+    if len(new_trace['x']) > count:
+        patch['data'][0]['x'].extend(new_trace['x'][count:])
+        patch['data'][0]['y'].extend(new_trace['y'][count:])
+    return patch
+
+
 def stock_graphs() -> html.Div:
-    app_data = _get_stock_data()
-    app_data.update()
+    with span('dash_app.stock_graphs'):
+        app_data = _get_stock_data()
+        _sync(app_data)
+        return _render_graphs(app_data)
 
-    def get_graph(key: str, name: str) -> html.Div:
-        history, current_price, change_percent = app_data.get_data(key)
 
-        if change_percent > 0:
-            change_percent = f'+{change_percent}%'
-            change_color = 'success'
-        else:
-            change_percent = f'{change_percent}%'
-            change_color = 'danger'
+def _render_graphs(app_data: VivendiStock) -> html.Div:
+    start = time.perf_counter()
+    snapshot = app_data.snapshot
+
+    def get_graph(key: str, name: str) -> html.Div:
+        _, current_price, change_percent = app_data.get_data(key)
+        change_text, change_class = _format_change(change_percent)
 
         return html.Div(className='row', children=[
             html.Div(className='container', children=[
@@ -40,25 +185,18 @@ def stock_graphs() -> html.Div:
                                 children=f'{name} ({key})')
                     ]),
                     html.Div(className='col-sm-2', children=[
-                        html.H2(className='text-right', children=current_price)
+                        html.H2(id={'type': 'stock-price', 'index': key},
+                                className='text-right', children=current_price)
                     ]),
                     html.Div(className='col-sm-1', children=[
-                        html.H4(
-                            className=f'text-left text-{change_color}', children=change_percent)
+                        html.H4(id={'type': 'stock-change', 'index': key},
+                                className=change_class, children=change_text)
                     ])
                 ]),
                 html.Div(className='row', children=[
                     dcc.Graph(
-                        id=f'stocks_graph_{key}',
-                        figure={
-                            'data': [{
-                                'x': history.index,
-                                'y': history,
-                                'type': 'line',
-                                'name': key
-                            }],
-                            'layout': {'height': 400}
-                        },
+                        id={'type': 'stock-figure', 'index': key},
+                        figure=_figure(app_data, key, snapshot.version),
                         config={
                             'displayModeBar': False,
                             'displaylogo': False,
@@ -70,12 +208,16 @@ def stock_graphs() -> html.Div:
             ])
         ])
 
-    timestamp = datetime.datetime.now().strftime('%d-%m-%Y %H:%M:%S')
-    graphs = [html.Div(className='center-align',
-                       children=f'Generated {timestamp}')]
-    graphs += [get_graph('STOCK.VALUE', 'Estimated stock value in AUD')]
-    graphs += [get_graph(stock, STOCK[stock]['name']) for stock in STOCK]
-    return html.Div(className='container', children=graphs)
+    series_ids = _series_ids()
+    with span('dash_app.render_graphs', series=len(series_ids), version=snapshot.version):
+        graphs = [get_graph(key, _series_name(key)) for key in series_ids]
+    page = html.Div(className='container', children=graphs)
+    RENDER_SECONDS.observe(time.perf_counter() - start, 'full')
+    return page
+
+
+def _generated_label() -> str:
+    return f'Generated {datetime.datetime.now().strftime("%d-%m-%Y %H:%M:%S")}'
 
 
 app = Dash(
@@ -84,6 +226,25 @@ app = Dash(
 )
 
 app.config['suppress_callback_exceptions'] = True
+
+
+@app.server.route('/metrics')
+def metrics_endpoint() -> Response:
+    """Prometheus scrape target covering every server worker and the refresher."""
+    if not config.METRICS_ENABLED:
+        return Response('Metrics are disabled (METRICS_ENABLED=false).\n', status=404, mimetype='text/plain')
+    return Response(metrics.exposition(), content_type=metrics.CONTENT_TYPE)
+
+
+def _current_stock_data() -> VivendiStock:
+    """The process's VivendiStock, synced like a page view, for the data API."""
+    app_data = _get_stock_data()
+    _sync(app_data)
+    return app_data
+
+
+app.server.register_blueprint(data_api.create_blueprint(_current_stock_data))
+
 app.layout = html.Div(children=[
     html.H3(className='center-align big-Close',
             children='Vivendi Group Stock Value Tracker'),
@@ -105,13 +266,59 @@ app.layout = html.Div(children=[
         ])
     ]),
     html.Br(),
+    dcc.Store(id='snapshot-store'),
+    html.Div(id='generated-at', className='center-align'),
     html.Div(id='output-graphs')
 ])
 
 
-@callback(Output('output-graphs', 'children'), Input('refresh-button', 'n_clicks'))
-def update_graphs(_: int) -> html.Div:
-    return stock_graphs()
+@callback(
+    Output('output-graphs', 'children'),
+    Output({'type': 'stock-figure', 'index': ALL}, 'figure'),
+    Output({'type': 'stock-price', 'index': ALL}, 'children'),
+    Output({'type': 'stock-change', 'index': ALL}, 'children'),
+    Output({'type': 'stock-change', 'index': ALL}, 'className'),
+    Output('generated-at', 'children'),
+    Output('snapshot-store', 'data'),
+    Input('refresh-button', 'n_clicks'),
+    State('snapshot-store', 'data')
+)
+def update_graphs(_: int, rendered: dict | None) -> tuple:
+    """Render the page once per browser session, then send only what changed.
+
+    The store remembers which snapshot version the browser shows. An unchanged
+    version short-circuits with PreventUpdate; a new version patches each figure with
+    the appended points (or replaces it when history was rewritten) and refreshes
+    the price/change labels, without rebuilding the component tree.
+    """
+    app_data = _get_stock_data()
+    _sync(app_data)
+    snapshot = app_data.snapshot
+    series_ids = _series_ids()
+    state = {'version': snapshot.version, 'series': series_ids}
+
+    if rendered and rendered.get('series') == series_ids and rendered.get('version') == snapshot.version:
+        raise PreventUpdate
+
+    if not rendered or rendered.get('series') != series_ids:
+        # Wildcard outputs take one value per matched component, even when none change.
+        unchanged = [[no_update] * len(outputs) for outputs in ctx.outputs_list[1:5]]
+        return _render_graphs(app_data), *unchanged, _generated_label(), state
+
+    start = time.perf_counter()
+    figures, prices, changes, classes = [], [], [], []
+    with span('dash_app.patch_graphs', series=len(series_ids), version=snapshot.version):
+        for output in ctx.outputs_list[1]:
+            key = output['id']['index']
+            figures.append(_figure_update(app_data, key, rendered['version'], snapshot.version))
+        for output in ctx.outputs_list[2]:
+            _, current_price, change_percent = app_data.get_data(output['id']['index'])
+            change_text, change_class = _format_change(change_percent)
+            prices.append(current_price)
+            changes.append(change_text)
+            classes.append(change_class)
+    RENDER_SECONDS.observe(time.perf_counter() - start, 'patch')
+    return no_update, figures, prices, changes, classes, _generated_label(), state
 
 
 if __name__ == '__main__':
@@ -0,0 +1,303 @@
+"""Read-only HTTP data API served next to the Dash app.
+
+Services that need prices, not a page, read the in-memory snapshot here instead
+of rendering the Dash layout or opening the cache file:
+
+- ``GET /api/summary``: latest price, change and last date for every series, plus
+  the latest value of every registered portfolio.
+- ``GET /api/series/<series_id>?start=YYYY-MM-DD&end=YYYY-MM-DD``: one series over
+  its full history, limited to [start, end].
+
+Series are columnar JSON (``{"dates": [...], "values": [...]}``), or an Arrow IPC
+stream with ``?format=arrow`` / ``Accept: application/vnd.apache.arrow.stream``
+when pyarrow is installed. Bodies are gzip- (or brotli-, when installed) compressed
+per ``Accept-Encoding``. Each response carries a strong ETag, derived from the
+data version and the holdings and portfolio registry the values come from, and a
+Last-Modified taken from the shared cache, so conditional requests get ``304 Not
+Modified`` from every worker until the data changes. Encoded bodies are cached
+per ETag.
+"""
+from __future__ import annotations
+
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from email.utils import format_datetime, parsedate_to_datetime
+from types import ModuleType
+from typing import TYPE_CHECKING, Callable
+
+from flask import Blueprint, Response, request
+
+from .utils import metrics
+from .utils.tracing import span
+
+if TYPE_CHECKING:
+    import numpy
+    import pandas
+
+    from .core.snapshot import DataSnapshot
+    from .core.vivendi_data import VivendiStock
+
+JSON_TYPE = 'application/json'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+# Encoded bodies kept across requests; old versions fall out as new ones are served.
+BODY_CACHE_ENTRIES = 128
+API_REQUEST_SECONDS = metrics.histogram(
+    'vivendi_data_api_seconds', 'Data API response time by endpoint and status.', ('endpoint', 'status'))
+API_BYTES = metrics.counter(
+    'vivendi_data_api_bytes_total', 'Data API body bytes sent, by format and content encoding.', ('format', 'encoding'))
+
+_body_cache: OrderedDict[tuple, bytes] = OrderedDict()
+_body_cache_lock = threading.Lock()
+
+
+class _BadRequest(Exception):
+    """Invalid query parameters; answered with 400 and the message."""
+
+
+def _brotli() -> ModuleType | None:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _pyarrow() -> ModuleType | None:
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _content_encoding() -> str:
+    """Pick the best coding the client accepts: br when available, then gzip, else identity."""
+    accepted = {
+        part.split(';')[0].strip().lower(): part for part in request.headers.get('Accept-Encoding', '').split(',')
+    }
+    for coding in ('br', 'gzip'):
+        if coding in accepted and not accepted[coding].replace(' ', '').endswith(';q=0'):
+            if coding == 'br' and _brotli() is None:
+                continue
+            return coding
+    return 'identity'
+
+
+def _response_format() -> str:
+    requested = request.args.get('format')
+    if requested is None:
+        best = request.accept_mimetypes.best_match([JSON_TYPE, ARROW_TYPE], default=JSON_TYPE)
+        requested = 'arrow' if best == ARROW_TYPE and request.accept_mimetypes[ARROW_TYPE] else 'json'
+    if requested not in ('json', 'arrow'):
+        raise _BadRequest(f"Unsupported format {requested!r}; use 'json' or 'arrow'.")
+    if requested == 'arrow' and _pyarrow() is None:
+        raise _BadRequest('Arrow output needs pyarrow installed on the server; use format=json.')
+    return requested
+
+
+def _timestamp(name: str) -> pandas.Timestamp | None:
+    value = request.args.get(name)
+    if not value:
+        return None
+    import pandas
+
+    try:
+        timestamp = pandas.Timestamp(value)
+    except ValueError:
+        raise _BadRequest(f'Invalid {name} date {value!r}; use YYYY-MM-DD.') from None
+    if timestamp is pandas.NaT:
+        raise _BadRequest(f'Invalid {name} date {value!r}; use YYYY-MM-DD.')
+    # The series index is naive; compare offsets given with the date in UTC.
+    return timestamp.tz_convert(None) if timestamp.tzinfo is not None else timestamp
+
+
+def _compress(body: bytes, coding: str) -> bytes:
+    if coding == 'gzip':
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    if coding == 'br':
+        return _brotli().compress(body, quality=5)
+    return body
+
+
+def _last_modified(snapshot: DataSnapshot) -> datetime.datetime:
+    # modified_at comes from the shared cache files, so every worker agrees; created_at is only a
+    # fallback for a process with nothing on disk yet.
+    return (snapshot.modified_at or snapshot.created_at).replace(microsecond=0)
+
+
+def _definition_fingerprint() -> str:
+    """Fingerprint of the holdings (STOCK.VALUE) and portfolio registry bodies are valued with;
+    either can change, on a restart, without a new data version.
+    """
+    from .core.vivendi_data import REGISTRY, VALUATION
+
+    return f'{VALUATION.fingerprint}{REGISTRY.fingerprint}'
+
+
+def _not_modified(etag: str, last_modified: datetime.datetime) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since as RFC 9110 prescribes."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in candidates or etag in candidates
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _json_body(payload: dict) -> bytes:
+    return json.dumps(payload, separators=(',', ':'), allow_nan=False).encode('utf8')
+
+
+def _number(value: float) -> float | None:
+    """JSON has no NaN or infinity: missing values are sent as null."""
+    return value if math.isfinite(value) else None
+
+
+def _float_list(values: numpy.ndarray) -> list[float | None]:
+    return [_number(value) for value in values.tolist()]
+
+
+def _series_body(
+    snapshot: DataSnapshot,
+    series_id: str,
+    start: pandas.Timestamp | None,
+    end: pandas.Timestamp | None,
+    response_format: str
+) -> bytes:
+    from .core.memory import float_values
+
+    series = snapshot.data[series_id].loc[start:end]
+    values = float_values(series)
+    if response_format == 'arrow':
+        pyarrow = _pyarrow()
+        table = pyarrow.table({
+            'date': pyarrow.array(series.index.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')),
+            series_id: pyarrow.array(values, from_pandas=True)
+        }).replace_schema_metadata({'version': str(snapshot.version)})
+        sink = io.BytesIO()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return _json_body({
+        'series': series_id,
+        'version': snapshot.version,
+        'dates': series.index.strftime('%Y-%m-%d').tolist(),
+        'values': _float_list(values)
+    })
+
+
+def _summary_body(stock_data: VivendiStock, snapshot: DataSnapshot) -> bytes:
+    portfolios = stock_data.latest_portfolio_values()
+    return _json_body({
+        'version': snapshot.version,
+        'series': {
+            series_id: {
+                'latest': _number(summary.latest),
+                'previous': _number(summary.previous),
+                'change_percent': _number(summary.change_percent),
+                'last_date': summary.last_date.strftime('%Y-%m-%d') if summary.last_date is not None else None
+            }
+            for series_id, summary in snapshot.summaries.items()
+        },
+        'portfolios': {str(portfolio_id): _number(round(float(value), 3)) for portfolio_id, value in portfolios.items()}
+    })
+
+
+def _respond(
+    endpoint: str,
+    snapshot: DataSnapshot,
+    response_format: str,
+    build: Callable[[], bytes]
+) -> Response:
+    """Serve build()'s body for this snapshot with validators, compression and conditional handling."""
+    coding = _content_encoding()
+    variant = (f'{request.path}?{request.query_string.decode("latin-1")}|{response_format}|{coding}'
+               f'|{_definition_fingerprint()}')
+    etag = f'"{snapshot.version}-{hashlib.sha1(variant.encode("utf8")).hexdigest()[:16]}"'
+    last_modified = _last_modified(snapshot)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': format_datetime(last_modified, usegmt=True),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept, Accept-Encoding',
+        'X-Data-Version': str(snapshot.version)
+    }
+    if _not_modified(etag, last_modified):
+        return Response(status=304, headers=headers)
+
+    key = (snapshot.version, variant)
+    with _body_cache_lock:
+        body = _body_cache.get(key)
+        if body is not None:
+            _body_cache.move_to_end(key)
+    if body is None:
+        with span(f'data_api.{endpoint}', format=response_format, encoding=coding) as encode_span:
+            body = _compress(build(), coding)
+            encode_span.set(bytes=len(body))
+        with _body_cache_lock:
+            _body_cache[key] = body
+            while len(_body_cache) > BODY_CACHE_ENTRIES:
+                _body_cache.popitem(last=False)
+
+    if coding != 'identity':
+        headers['Content-Encoding'] = coding
+    API_BYTES.inc(response_format, coding, amount=len(body))
+    content_type = ARROW_TYPE if response_format == 'arrow' else JSON_TYPE
+    return Response(body, status=200, headers=headers, content_type=content_type)
+
+
+def _error(status: int, message: str) -> Response:
+    return Response(_json_body({'error': message}), status=status, content_type=JSON_TYPE)
+
+
+def create_blueprint(get_stock_data: Callable[[], VivendiStock]) -> Blueprint:
+    """Build the ``/api`` blueprint; get_stock_data returns the process's current VivendiStock."""
+    blueprint = Blueprint('data_api', __name__, url_prefix='/api')
+
+    def timed(endpoint: str, handler: Callable[[], Response]) -> Response:
+        start = time.perf_counter()
+        try:
+            response = handler()
+        except _BadRequest as e:
+            response = _error(400, str(e))
+        API_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, str(response.status_code))
+        return response
+
+    @blueprint.route('/summary')
+    def summary() -> Response:
+        def handle() -> Response:
+            stock_data = get_stock_data()
+            snapshot = stock_data.snapshot
+            return _respond('summary', snapshot, 'json', lambda: _summary_body(stock_data, snapshot))
+
+        return timed('summary', handle)
+
+    @blueprint.route('/series/<series_id>')
+    def series(series_id: str) -> Response:
+        def handle() -> Response:
+            snapshot = get_stock_data().snapshot
+            if series_id not in snapshot.data.columns:
+                return _error(404, f'Unknown series {series_id!r}.')
+            response_format = _response_format()
+            start, end = _timestamp('start'), _timestamp('end')
+            return _respond(
+                'series', snapshot, response_format,
+                lambda: _series_body(snapshot, series_id, start, end, response_format)
+            )
+
+        return timed('series', handle)
+
+    return blueprint
@@ -0,0 +1,64 @@
+"""Standalone refresh process: keeps the shared cache current after each exchange close."""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from .core.coordination import LeaderLock
+from .core.scheduler import RefreshScheduler
+from .core.vivendi_data import VivendiStock
+from .utils import metrics
+from .utils.config import config
+from .utils.profiler import start_profiler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='vivendi-stock-refresher',
+        description='Refresh market data in the background after each exchange close.'
+    )
+    parser.add_argument(
+        '--once',
+        action='store_true',
+        help='Run a single refresh and exit (for cron).'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='With --once, refetch every series regardless of checkpoints.'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help='Sample all threads while running and write collapsed stacks (flamegraph input) to FILE '
+             '(default from PROFILE_FILE).'
+    )
+    args = parser.parse_args()
+    start_profiler(args.profile)
+    # Refresh metrics appear in the web workers' /metrics.
+    metrics.registry.export()
+
+    # Only one process refreshes the shared cache at a time.
+    leader = LeaderLock(os.path.join(str(config.DATA_DIR), config.LEADER_LOCK_FILE))
+    if args.once:
+        if not leader.try_acquire():
+            print('Another process is refreshing the shared cache; nothing to do.')
+            sys.exit(0)
+        stock_data = VivendiStock(auto_update=False)
+        ok = stock_data.update(force=args.force, wait=True)
+        print(stock_data.update_status_message)
+        sys.exit(0 if ok else 1)
+
+    try:
+        while not leader.try_acquire():
+            time.sleep(config.REFRESH_BACKOFF_SECONDS)
+        scheduler = RefreshScheduler(VivendiStock(auto_update=False))
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
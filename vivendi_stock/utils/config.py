@@ -25,6 +25,11 @@ def _env_bool(name: str, default: bool) -> bool:
     return default
 
 
+def _data_dir() -> Path:
+    """Data directory: DATA_DIR when set, else data/ in the project root."""
+    return Path(os.getenv('DATA_DIR') or Path(__file__).resolve().parent.parent.parent / 'data')
+
+
 @dataclass
 class Config:
     """Application configuration settings."""
@@ -34,26 +39,94 @@ class Config:
         repr=False  # Prevent API key from appearing in repr/logs
     )
     ALPHAVANTAGE_CACHE: bool = _env_bool('ALPHAVANTAGE_CACHE', True)
-    API_RATE_LIMIT_SECONDS: float = 3.0
-    API_TIMEOUT_SECONDS: int = 30
+    ALPHAVANTAGE_BASE_URL: str = os.getenv('ALPHAVANTAGE_BASE_URL', 'https://www.alphavantage.co/query')
+    API_RATE_LIMIT_SECONDS: float = float(os.getenv('API_RATE_LIMIT_SECONDS', '3.0'))
+    API_RATE_LIMIT_BURST: int = int(os.getenv('API_RATE_LIMIT_BURST', '1'))
+    ALPHAVANTAGE_DAILY_QUOTA: int = int(os.getenv('ALPHAVANTAGE_DAILY_QUOTA', '25'))
+    API_TIMEOUT_SECONDS: float = float(os.getenv('API_TIMEOUT_SECONDS', '30'))
     API_MAX_WORKERS: int = int(os.getenv('API_MAX_WORKERS', '6'))
 
     APP_ROOT: Path = field(default_factory=lambda: Path(__file__).resolve().parent.parent.parent)
-    DATA_DIR: Path = field(default_factory=lambda: Path(__file__).resolve().parent.parent.parent / 'data')
+    DATA_DIR: Path = field(default_factory=_data_dir)
     LOG_DIR: Path = field(default_factory=lambda: Path(__file__).resolve().parent.parent.parent / 'logs')
+    RESPONSE_CACHE_DIR: Path = field(default_factory=lambda: _data_dir() / 'responses')
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+    # Raw responses older than this are refetched: daily series refresh once per session, FX trades around the clock.
+    RESPONSE_CACHE_TTL_SECONDS: dict[str, float] = field(default_factory=lambda: {
+        'daily': float(os.getenv('RESPONSE_CACHE_TTL_DAILY', str(12 * 3600))),
+        'fx': float(os.getenv('RESPONSE_CACHE_TTL_FX', str(4 * 3600)))
+    })
     WORKDATA_START_DATE: str = '2025-12-01'
-    CACHE_FILE: str = 'cache.json'
+    # Binary columnar cache; a '.json' name selects the legacy text format instead.
+    CACHE_FILE: str = os.getenv('CACHE_FILE', 'cache.bin')
+    LEGACY_CACHE_FILE: str = 'cache.json'
+    FX_STORE_FILE: str = 'fx_rates.json'
+    FETCH_STATE_FILE: str = 'fetch_state.json'
+    # Fingerprint of the holdings STOCK.VALUE/AUD.VALUE were computed from; a change revalues every row.
+    VALUATION_STATE_FILE: str = 'valuation.json'
+    # Full-history backfill (vivendi-stock-cli backfill): progress file, staging directory under
+    # DATA_DIR and the number of calendar days merged into the cache per checkpointed chunk. The
+    # request file hands a backfill to the refresh scheduler of the process holding the refresh lock.
+    BACKFILL_STATE_FILE: str = 'backfill_state.json'
+    BACKFILL_REQUEST_FILE: str = 'backfill_request.json'
+    BACKFILL_DIR: str = 'backfill'
+    BACKFILL_CHUNK_DAYS: int = int(os.getenv('BACKFILL_CHUNK_DAYS', '365'))
+    # Trading sessions covered by an Alpha Vantage outputsize=compact response.
+    COMPACT_WINDOW_SESSIONS: int = 100
+    # Append changed rows to a journal instead of rewriting the whole cache on every refresh.
+    CACHE_JOURNAL: bool = _env_bool('CACHE_JOURNAL', True)
+    CACHE_JOURNAL_MAX_BYTES: int = int(os.getenv('CACHE_JOURNAL_MAX_BYTES', '262144'))
+    # Map binary cache values copy-on-write from the file so worker processes share its pages.
+    CACHE_MMAP: bool = _env_bool('CACHE_MMAP', True)
+    # Keep published prices as float32 where they round-trip to CACHE_COMPACT_DECIMALS (see core/memory.py).
+    # Only the published copy is compacted; refreshes and the cache file keep the float64 frame.
+    CACHE_COMPACT: bool = _env_bool('CACHE_COMPACT', False)
+    CACHE_COMPACT_DECIMALS: int = int(os.getenv('CACHE_COMPACT_DECIMALS', '4'))
+    # Multi-worker coordination: the process holding LEADER_LOCK_FILE refreshes and announces each
+    # new data version in CACHE_VERSION_FILE; the others reload when it changes.
+    LEADER_LOCK_FILE: str = 'refresh.lock'
+    CACHE_VERSION_FILE: str = 'cache.version'
+    CACHE_RELOAD_INTERVAL_SECONDS: float = float(os.getenv('CACHE_RELOAD_INTERVAL_SECONDS', '5'))
+
+    # Callers of VivendiStock.update() during an in-flight refresh wait for it (true) or get the current data (false).
+    REFRESH_WAIT: bool = _env_bool('REFRESH_WAIT', False)
+    # Where the web app refreshes data: 'background' (scheduler thread in each server process),
+    # 'external' (a separate vivendi-stock-refresher process) or 'request' (inside every page callback).
+    REFRESH_MODE: str = os.getenv('REFRESH_MODE', 'background').strip().lower()
+    REFRESH_DELAY_MINUTES: float = float(os.getenv('REFRESH_DELAY_MINUTES', '30'))
+    REFRESH_JITTER_SECONDS: float = float(os.getenv('REFRESH_JITTER_SECONDS', '300'))
+    REFRESH_BACKOFF_SECONDS: float = 60.0
+    REFRESH_BACKOFF_MAX_SECONDS: float = 3600.0
+
+    # Technical analytics windows, in trading sessions (see core/analytics.py).
+    ANALYTICS_RETURN_WINDOWS: dict[str, int] = field(default_factory=lambda: {'1w': 5, '1m': 21, '3m': 63, '1y': 252})
+    ANALYTICS_MA_WINDOWS: tuple[int, ...] = (20, 50, 200)
+    ANALYTICS_VOLATILITY_WINDOW: int = 21
+    ANALYTICS_CORRELATION_WINDOW: int = 63
+
+    # Maximum points sent per chart; longer histories are LTTB-downsampled (0 plots every point).
+    CHART_POINT_BUDGET: int = int(os.getenv('CHART_POINT_BUDGET', '1000'))
+
+    # Prometheus metrics served at /metrics; worker processes export their values to METRICS_DIR for aggregation.
+    METRICS_ENABLED: bool = _env_bool('METRICS_ENABLED', True)
+    METRICS_DIR: Path = field(default_factory=lambda: Path(os.getenv('METRICS_DIR') or _data_dir() / 'metrics'))
+    METRICS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv('METRICS_FLUSH_INTERVAL_SECONDS', '5'))
 
     DASH_HOST: str = os.getenv('DASH_HOST', '0.0.0.0')
     DASH_PORT: int = int(os.getenv('DASH_PORT', '8051'))
     DASH_DEBUG: bool = _env_bool('DASH_DEBUG', False)
 
+    # Currency file mirrors tried in order; CURRENCY_API_URLS overrides them with a comma-separated list.
     CURRENCY_API_URLS: list[str] = field(default_factory=lambda: [
+        url.strip() for url in os.getenv('CURRENCY_API_URLS', '').split(',') if url.strip()
+    ] or [
         'https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@{date}/v1/currencies/{base}.json',
         'https://{date}.currency-api.pages.dev/v1/currencies/{base}.json'
     ])
 
     CURRENCIES: tuple[str, ...] = ('EUR.AUD', 'GBP.AUD')
+    # Optional JSON file of extra instruments and portfolios valued alongside STOCK (see core/portfolios.py).
+    PORTFOLIOS_FILE: str = os.getenv('PORTFOLIOS_FILE', '')
     STOCK: dict[str, dict] = field(default_factory=lambda: {
         'VIV.PA': {
             'stock': 1565,
@@ -85,6 +158,12 @@ class Config:
     LOG_FORMAT: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     LOG_MAX_BYTES: int = 10485760
     LOG_BACKUP_COUNT: int = 5
+    # Timing spans as JSON lines in LOG_DIR/TRACE_FILE.
+    TRACE_SPANS: bool = _env_bool('TRACE_SPANS', False)
+    TRACE_FILE: str = os.getenv('TRACE_FILE', 'trace.jsonl')
+    # Sampling profiler output (collapsed stacks); also set per run with --profile FILE.
+    PROFILE_FILE: str = os.getenv('PROFILE_FILE', '')
+    PROFILE_INTERVAL_SECONDS: float = float(os.getenv('PROFILE_INTERVAL_SECONDS', '0.005'))
 
     def __post_init__(self) -> None:
         self.DATA_DIR.mkdir(parents=True, exist_ok=True)
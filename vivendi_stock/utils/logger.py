@@ -27,7 +27,8 @@ def setup_logger(
     file_handler = logging.handlers.RotatingFileHandler(
         log_file,
         maxBytes=config.LOG_MAX_BYTES,
-        backupCount=config.LOG_BACKUP_COUNT
+        backupCount=config.LOG_BACKUP_COUNT,
+        delay=True  # open the file on first record, not when the module is imported
     )
     file_handler.setLevel(log_level)
 
@@ -0,0 +1,335 @@
+"""Prometheus text-format metrics, aggregated across worker processes.
+
+Each process keeps its counters, gauges and histograms in memory; recording is a
+dict update under a lock. Long-running processes (web workers, the refresher)
+call ``registry.export()`` to also write their values to
+``metrics-<pid>-<token>.json`` under METRICS_DIR from a background thread every
+METRICS_FLUSH_INTERVAL_SECONDS. ``exposition()`` merges every process file, so
+any worker's ``/metrics`` reports the whole deployment.
+
+A file not rewritten for RETIRE_AFTER_FLUSHES intervals belongs to an exited
+process: its counters and histograms are folded into ``metrics-retired.json``
+(so totals never go backwards) and the file is removed; its gauges are dropped.
+"""
+from __future__ import annotations
+
+import atexit
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Iterable
+
+from .config import config
+from .files import atomic_write, file_lock
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Seconds; covers rate-limit sleeps and local renders through slow API calls.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Missed flush intervals after which a process file is treated as left behind by an exited process.
+RETIRE_AFTER_FLUSHES = 12
+RETIRED_FILE = 'metrics-retired.json'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: Registry, name: str, documentation: str, labels: Iterable[str]) -> None:
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[tuple[str, ...], object] = {}
+
+    def _describe(self) -> dict:
+        return {'type': self.kind, 'help': self.documentation, 'labels': list(self.labels)}
+
+
+class Counter(_Metric):
+    """Monotonic total; summed across processes."""
+
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        registry = self._registry
+        if not registry.enabled:
+            return
+        with registry.lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Last set value; across processes the most recently set one wins."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *labels: str) -> None:
+        registry = self._registry
+        if not registry.enabled:
+            return
+        with registry.lock:
+            self._values[labels] = (float(value), time.time())
+
+
+class Histogram(_Metric):
+    """Observation counts per upper bound plus their sum; summed across processes."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        registry: Registry,
+        name: str,
+        documentation: str,
+        labels: Iterable[str],
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        registry = self._registry
+        if not registry.enabled:
+            return
+        # Non-cumulative counts per bucket (the last one is +Inf), then the sum.
+        index = bisect.bisect_left(self.buckets, value)
+        with registry.lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def _describe(self) -> dict:
+        return {**super()._describe(), 'buckets': list(self.buckets)}
+
+
+class Registry:
+    """Metrics of one process, optionally exported to a per-process file for aggregation."""
+
+    def __init__(self, enabled: bool = True, flush_interval: float = 5.0) -> None:
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._exporting = False
+        self._file_id = self._new_file_id()
+        # Not available on Windows, which has no fork.
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labels, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def export(self) -> None:
+        """Write this process's values to METRICS_DIR so other workers' /metrics include them."""
+        if self.enabled and not self._exporting:
+            self._exporting = True
+            atexit.register(self.flush)
+            self._start_flusher()
+
+    def _after_fork(self) -> None:
+        # The parent's values stay in the parent's file; the child counts from zero in its own file.
+        # Threads do not survive fork, so the child starts its own flusher.
+        self.lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._values = {}
+        self._file_id = self._new_file_id()
+        if self._exporting:
+            self._start_flusher()
+
+    @staticmethod
+    def _new_file_id() -> str:
+        # The random part keeps a recycled PID (common in containers) from overwriting an earlier file.
+        return f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+    def _start_flusher(self) -> None:
+        threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self) -> None:
+        # Rewriting unchanged values keeps the file's mtime fresh, which marks the process as alive.
+        while True:
+            time.sleep(max(self.flush_interval, 1.0))
+            self.flush()
+
+    def _path(self) -> str:
+        return os.path.join(str(config.METRICS_DIR), f'metrics-{self._file_id}.json')
+
+    def snapshot(self) -> dict[str, dict]:
+        """Return this process's metrics in the file format."""
+        with self.lock:
+            return {
+                name: {**metric._describe(), 'samples': [
+                    [list(labels), list(value) if isinstance(value, list) else value]
+                    for labels, value in metric._values.items()
+                ]}
+                for name, metric in self._metrics.items()
+            }
+
+    def flush(self) -> None:
+        if not (self._exporting and self.enabled):
+            return
+        path = self._path()
+        payload = json.dumps(self.snapshot()).encode('utf8')
+        try:
+            # No fsync: losing the last few seconds of metrics in a crash is acceptable.
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning('Unable to write metrics to %s: %s', path, e)
+
+    def collect(self) -> dict[str, dict]:
+        """Return metrics merged across every exporting process (or only this one when not exporting)."""
+        if not self._exporting:
+            return _merge([self.snapshot()])
+        self.flush()
+        self._retire_stale_files()
+        dumps = []
+        for path in glob.glob(os.path.join(str(config.METRICS_DIR), 'metrics-*.json')):
+            try:
+                with open(path, encoding='utf8') as f:
+                    dumps.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning('Skipping unreadable metrics file %s: %s', path, e)
+        return _merge(dumps)
+
+    def _retire_stale_files(self) -> None:
+        """Fold the counters and histograms of files no process rewrote lately into the retired file."""
+        directory = str(config.METRICS_DIR)
+        retired_path = os.path.join(directory, RETIRED_FILE)
+        cutoff = time.time() - RETIRE_AFTER_FLUSHES * max(self.flush_interval, 1.0)
+        stale = []
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            try:
+                if path != retired_path and os.path.getmtime(path) < cutoff:
+                    stale.append(path)
+            except OSError:
+                pass
+        if not stale:
+            return
+        with file_lock(f'{retired_path}.lock'):
+            dumps = []
+            for path in [retired_path, *stale]:
+                try:
+                    with open(path, encoding='utf8') as f:
+                        dumps.append(json.load(f))
+                except FileNotFoundError:
+                    # Retired by another worker since the scan.
+                    if path != retired_path:
+                        stale.remove(path)
+                except (OSError, ValueError) as e:
+                    logger.warning('Skipping unreadable metrics file %s: %s', path, e)
+            if not stale:
+                return
+            retired = {
+                name: {**metric, 'samples': [[list(labels), value] for labels, value in metric['samples'].items()]}
+                for name, metric in _merge(dumps).items() if metric['type'] != 'gauge'
+            }
+            try:
+                atomic_write(retired_path, json.dumps(retired).encode('utf8'))
+                for path in stale:
+                    os.remove(path)
+            except OSError as e:
+                logger.warning('Unable to retire metrics files into %s: %s', retired_path, e)
+                return
+        logger.info('Retired %d metrics file(s) of exited processes', len(stale))
+
+
+def _merge(dumps: list[dict[str, dict]]) -> dict[str, dict]:
+    merged: dict[str, dict] = {}
+    for dump in dumps:
+        for name, metric in dump.items():
+            target = merged.setdefault(name, {**metric, 'samples': {}})
+            if target['type'] != metric['type'] or target.get('buckets') != metric.get('buckets'):
+                continue
+            samples = target['samples']
+            for labels, value in metric['samples']:
+                key = tuple(labels)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = value
+                elif metric['type'] == 'counter':
+                    samples[key] = current + value
+                elif metric['type'] == 'gauge':
+                    samples[key] = max(current, value, key=lambda item: item[1])
+                else:
+                    samples[key] = [a + b for a, b in zip(current, value)]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render(metrics: dict[str, dict]) -> str:
+    """Format merged metrics in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        names = metric['labels']
+        lines.append(f'# HELP {name} {metric["help"]}')
+        lines.append(f'# TYPE {name} {metric["type"]}')
+        for labels, value in sorted(metric['samples'].items()):
+            if metric['type'] == 'counter':
+                lines.append(f'{name}{_labels(names, labels)} {_number(value)}')
+            elif metric['type'] == 'gauge':
+                lines.append(f'{name}{_labels(names, labels)} {_number(value[0])}')
+            else:
+                cumulative = 0
+                for bound, count in zip([*metric['buckets'], math.inf], value[:-1]):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f'{name}_bucket{_labels(names, labels, le)} {cumulative}')
+                lines.append(f'{name}_sum{_labels(names, labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def exposition() -> str:
+    return render(registry.collect())
+
+
+registry = Registry(enabled=config.METRICS_ENABLED, flush_interval=config.METRICS_FLUSH_INTERVAL_SECONDS)
+counter = registry.counter
+gauge = registry.gauge
+histogram = registry.histogram
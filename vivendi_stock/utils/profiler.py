@@ -0,0 +1,85 @@
+"""Wall-clock sampling profiler writing collapsed stacks.
+
+A daemon thread snapshots every other thread's stack each PROFILE_INTERVAL_SECONDS
+with ``sys._current_frames()`` and counts identical stacks. The output has one
+``thread;outer;...;inner count`` line per stack, the input format of
+``flamegraph.pl`` and speedscope. Nothing runs unless a profile is requested with
+``--profile FILE`` or PROFILE_FILE.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import sys
+import threading
+from collections import Counter
+from types import CodeType
+
+from .config import config
+
+
+class SamplingProfiler:
+    """Samples all threads until stop(), then writes the collapsed stacks to path."""
+
+    def __init__(self, path: str, interval: float = 0.005) -> None:
+        self.path = path
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> SamplingProfiler:
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            # module:function, without the separators the collapsed format reserves.
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            label = self._labels[code] = f'{module}:{code.co_name}'.replace(';', ':').replace(' ', '_')
+        return label
+
+    def stop(self) -> str:
+        """Stop sampling and write the profile. Returns the output path."""
+        if self._thread is None:
+            return self.path
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        print(f'Wrote {self.samples} profile samples to {self.path}', file=sys.stderr)
+        return self.path
+
+
+def start_profiler(path: str | None = None) -> SamplingProfiler | None:
+    """Start profiling to path (or PROFILE_FILE) until the process exits; None when neither is set."""
+    path = path or config.PROFILE_FILE
+    if not path:
+        return None
+    profiler = SamplingProfiler(path, config.PROFILE_INTERVAL_SECONDS).start()
+    atexit.register(profiler.stop)
+    return profiler
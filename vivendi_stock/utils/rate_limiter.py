@@ -1,27 +1,186 @@
 """Rate limiting utility for API requests."""
 from __future__ import annotations
 
+import datetime
+import json
+import os
 import time
 import logging
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from pathlib import Path
 from threading import Lock
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from . import metrics
+from .files import atomic_write, file_lock
 
 logger = logging.getLogger(__name__)
+RATE_LIMIT_WAIT_SECONDS = metrics.histogram(
+    'vivendi_rate_limit_wait_seconds', 'Time requests slept waiting for their host rate limit.', ('host',))
+
+
+class QuotaExhaustedError(RuntimeError):
+    """Raised when a host's daily request quota has been used up."""
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `capacity` tokens."""
+
+    rate: float
+    capacity: float = 1.0
+    _tokens: float = field(default=0.0, init=False)
+    _updated: float = field(default_factory=time.monotonic, init=False)
+
+    def __post_init__(self) -> None:
+        self._tokens = self.capacity
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1.0
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+@dataclass
+class DailyQuota:
+    """Per-day request counter, optionally persisted to a JSON file so restarts keep the count.
+
+    With a path, every check re-reads the file under a lock before counting, so the CLI,
+    a backfill and server workers sharing the file draw from one quota.
+    """
+
+    limit: int
+    path: Path | None = None
+    _day: str = field(default='', init=False)
+    _used: int = field(default=0, init=False)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+    def _roll(self) -> None:
+        today = self._today()
+        if self._day != today:
+            self._day = today
+            self._used = 0
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf8') as f:
+                state = json.load(f)
+            self._day = str(state.get('day', ''))
+            self._used = int(state.get('used', 0))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning('Unable to read quota state from %s: %s', self.path, e)
+
+    @contextmanager
+    def _synced(self) -> Iterator[None]:
+        """Bring the count up to date with the shared file and hold its lock for the block."""
+        if self.path is None:
+            self._roll()
+            yield
+            return
+        with file_lock(f'{self.path}.lock'):
+            self._load()
+            self._roll()
+            yield
+
+    def remaining(self) -> int:
+        with self._synced():
+            return max(0, self.limit - self._used)
+
+    def consume(self) -> None:
+        with self._synced():
+            if self._used >= self.limit:
+                raise QuotaExhaustedError(f'Daily quota of {self.limit} requests exhausted')
+            self._used += 1
+            self._save()
+
+    def exhaust(self) -> None:
+        """Mark the quota as used up, e.g. after the server reported a rate-limit response."""
+        with self._synced():
+            self._used = max(self._used, self.limit)
+            self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            atomic_write(self.path, json.dumps({'day': self._day, 'used': self._used}).encode('utf8'))
+        except OSError as e:
+            logger.warning('Unable to persist quota state to %s: %s', self.path, e)
 
 
 @dataclass
-class RateLimiter:
-    """Thread-safe rate limiter for API calls."""
+class WaitStats:
+    """Wait-time statistics for one host."""
 
-    min_interval: float = 3.0
-    _last_call: float = field(default_factory=lambda: 0.0, init=False)
+    calls: int = 0
+    delayed_calls: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, wait: float) -> None:
+        self.calls += 1
+        if wait > 0:
+            self.delayed_calls += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+@dataclass
+class HostRateLimiter:
+    """Thread-safe multi-host limiter: a token bucket and optional daily quota per host.
+    Hosts without a bucket are not throttled.
+    """
+
+    buckets: dict[str, TokenBucket] = field(default_factory=dict)
+    quotas: dict[str, DailyQuota] = field(default_factory=dict)
+    _stats: dict[str, WaitStats] = field(default_factory=dict, init=False)
     _lock: Lock = field(default_factory=Lock, init=False)
 
-    def wait(self) -> None:
+    @staticmethod
+    def _host(url_or_host: str) -> str:
+        return (urlsplit(url_or_host).hostname or url_or_host).lower()
+
+    def wait(self, url: str) -> float:
+        """Block until a request to url's host may be sent. Returns the time slept.
+        Raises QuotaExhaustedError when the host's daily quota is used up.
+        """
+        host = self._host(url)
+        with self._lock:
+            quota = self.quotas.get(host)
+            if quota is not None:
+                quota.consume()
+            bucket = self.buckets.get(host)
+            sleep_time = bucket.reserve(time.monotonic()) if bucket is not None else 0.0
+            self._stats.setdefault(host, WaitStats()).record(sleep_time)
+        RATE_LIMIT_WAIT_SECONDS.observe(sleep_time, host)
+        if sleep_time > 0:
+            logger.debug('Rate limit for %s: sleeping for %.2fs', host, sleep_time)
+            time.sleep(sleep_time)
+        return sleep_time
+
+    def remaining(self, url_or_host: str) -> int | None:
+        """Return calls left today for a host, or None when it has no daily quota."""
+        with self._lock:
+            quota = self.quotas.get(self._host(url_or_host))
+            return None if quota is None else quota.remaining()
+
+    def exhaust(self, url_or_host: str) -> None:
+        with self._lock:
+            quota = self.quotas.get(self._host(url_or_host))
+            if quota is not None:
+                quota.exhaust()
+
+    def stats(self) -> dict[str, WaitStats]:
         with self._lock:
-            elapsed = time.time() - self._last_call
-            if elapsed < self.min_interval:
-                sleep_time = self.min_interval - elapsed
-                logger.debug('Rate limit: sleeping for %.2fs', sleep_time)
-                time.sleep(sleep_time)
-            self._last_call = time.time()
+            return {host: WaitStats(**vars(stats)) for host, stats in self._stats.items()}
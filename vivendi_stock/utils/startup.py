@@ -0,0 +1,43 @@
+"""Startup timing for the ``--profile-startup`` entry point flag."""
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+# Third-party packages worth reporting as loaded/not loaded at the end of startup.
+HEAVY_MODULES = ('dash', 'flask', 'pandas', 'numpy', 'requests', 'pydantic')
+
+
+class StartupTimer:
+    """Collects wall-clock durations of named startup stages."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.stages: list[tuple[str, float]] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self, stream: TextIO | None = None) -> None:
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        total = time.perf_counter() - self._started
+        print('Startup profile', file=stream)
+        for name, seconds in self.stages:
+            print(f'  {name:<28} {seconds * 1000:>9.1f} ms', file=stream)
+        print(f'  {"total":<28} {total * 1000:>9.1f} ms', file=stream)
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        deferred = [name for name in HEAVY_MODULES if name not in sys.modules]
+        print(f'  loaded: {", ".join(loaded) or "-"}; not loaded: {", ".join(deferred) or "-"}', file=stream)
@@ -0,0 +1,117 @@
+"""Timing spans for the refresh and render pipelines, written as JSON log lines.
+
+Enabled with TRACE_SPANS=true: every finished span becomes one JSON object in
+``logs/<TRACE_FILE>`` with its duration, trace/parent ids and attributes, so a
+slow refresh can be broken down into rate-limit sleeps, HTTP, parsing, FX
+backfill and serialization. Nesting follows the calling context, including
+``asyncio.to_thread`` workers. When disabled, ``span()`` returns a shared no-op
+object and nothing else runs.
+"""
+from __future__ import annotations
+
+import contextvars
+import datetime
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from types import TracebackType
+
+from .config import config
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar('vivendi_span', default=None)
+_ids = itertools.count(1)
+_logger: logging.Logger | None = None
+_logger_lock = threading.Lock()
+
+
+def _trace_logger() -> logging.Logger:
+    """The span sink: a rotating file of bare JSON lines, separate from the application logs."""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            logger = logging.getLogger('vivendi_stock.trace')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = logging.handlers.RotatingFileHandler(
+                config.LOG_DIR / config.TRACE_FILE,
+                maxBytes=config.LOG_MAX_BYTES,
+                backupCount=config.LOG_BACKUP_COUNT,
+                delay=True
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            _logger = logger
+    return _logger
+
+
+class Span:
+    """One timed operation; use as a context manager and add attributes with set()."""
+
+    __slots__ = ('name', 'attributes', 'trace_id', 'span_id', 'parent_id', '_wall', '_start', '_token')
+
+    def __init__(self, name: str, attributes: dict[str, object]) -> None:
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes: object) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        self.span_id = f'{os.getpid():x}-{next(_ids):x}'
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current.set(self)
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None
+    ) -> bool:
+        duration = time.perf_counter() - self._start
+        _current.reset(self._token)
+        record = {
+            'ts': datetime.datetime.fromtimestamp(self._wall, datetime.timezone.utc).isoformat(timespec='microseconds'),
+            'span': self.name,
+            'duration_ms': round(duration * 1000, 3),
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'thread': threading.current_thread().name,
+            **self.attributes
+        }
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        _trace_logger().info(json.dumps(record, default=str))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attributes: object) -> None:
+        pass
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info: object) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attributes: object) -> Span | _NullSpan:
+    """Return a span context manager, or a shared no-op when TRACE_SPANS is off."""
+    if not config.TRACE_SPANS:
+        return _NULL_SPAN
+    return Span(name, attributes)
@@ -1,3 +1,5 @@
-from vivendi_stock.dash_app import app
+from vivendi_stock.dash_app import app, warm_up
 
+# Warm up at import, as `python -m vivendi_stock` does: load the cached snapshot and claim the refresher role.
+warm_up()
 application = app.server